@@ -6,27 +6,37 @@ import numpy as np
 from datetime import date, datetime
 
 import utils.css as styling
-import utils.calendar as calendar
-import utils.colors as colors
-
-# ---- Plotly guard ----
-try:
-    import plotly.express as px
-    import plotly.graph_objects as go
-except ModuleNotFoundError:
-    st.error("Plotly isn’t installed. Run: pip install streamlit pandas numpy plotly")
-    st.stop()
+import utils.holiday_providers as holiday_providers
+import utils.query as query
+import utils.schedule as schedule
+import utils.engine as engine
+import utils.dependencies as dependencies
+import utils.gantt as gantt
+import utils.result_cache as result_cache
+import utils.portfolio as portfolio
+import utils.validation as validation
+import utils.project_store as project_store
+import utils.lead_times as lead_times
+import utils.jobs as jobs
+import utils.leveling as leveling
+import utils.spill as spill
+import utils.cashflow as cashflow
+import utils.grid as grid
 
 st.set_page_config(page_title="Procurement Calculator", layout="wide")
+
+@st.cache_resource
+def load_logos():
+    # SVG markup read once per process; st.logo accepts the markup directly.
+    with open("./assets/images/Mano_Logo_Main.svg", encoding="utf-8") as f_main, \
+         open("./assets/images/Mano_Mark_Mark.svg", encoding="utf-8") as f_mark:
+        return f_main.read(), f_mark.read()
+
 styling.inject_custom_css()
-st.logo("./assets/images/Mano_Logo_Main.svg", icon_image="./assets/images/Mano_Mark_Mark.svg")
+logo_main, logo_mark = load_logos()
+st.logo(logo_main, icon_image=logo_mark)
 
 # ================= Defaults / Constants =================
-DEFAULT_SUBMITTAL_DAYS = 15
-DEFAULT_SHIPPING_DAYS  = 15
-DEFAULT_BUFFER_DAYS    = 20
-TODAY = pd.to_datetime(date.today())
-
 STANDARD_EQUIPMENT = [
     {"Equipment": "Air Cooled Chiller",                   "Manufacturing (days)": 0},
     {"Equipment": "Computer Room Air Conditioner",        "Manufacturing (days)": 0},
@@ -52,272 +62,6 @@ STANDARD_EQUIPMENT = [
     {"Equipment": "Uninterruptible Power Supply (House)", "Manufacturing (days)": 0},
 ]
 
-# ================= Helpers =================
-def as_int(x, default=0):
-    try:
-        if pd.isna(x) or x == "":
-            return default
-        return int(float(x))
-    except Exception:
-        return default
-
-def bday_add(start, days, holidays=None):
-    if pd.isna(start) or days is None: return pd.NaT
-    return pd.to_datetime(np.busday_offset(np.datetime64(pd.to_datetime(start).date()),
-                                           int(days), holidays=sorted(list(holidays or set())), roll="forward"))
-
-def bday_sub(end, days, holidays=None):
-    if pd.isna(end) or days is None: return pd.NaT
-    return pd.to_datetime(np.busday_offset(np.datetime64(pd.to_datetime(end).date()),
-                                           -int(days), holidays=sorted(list(holidays or set())), roll="backward"))
-
-def bday_diff(d1, d2, holidays):
-    if pd.isna(d1) or pd.isna(d2): return None
-    return int(np.busday_count(np.datetime64(pd.to_datetime(d1).date()),
-                               np.datetime64(pd.to_datetime(d2).date()),
-                               holidays=sorted(list(holidays or set()))))
-
-def compute_pass(row, mode, holidays):
-    sub  = as_int(row.get("Submittal (days)"), DEFAULT_SUBMITTAL_DAYS)
-    mfg  = as_int(row.get("Manufacturing (days)"), 0)
-    ship = as_int(row.get("Shipping (days)"),  DEFAULT_SHIPPING_DAYS)
-    buf  = as_int(row.get("Buffer (days)"),    DEFAULT_BUFFER_DAYS)
-    po   = pd.to_datetime(row.get("PO Execution"), errors="coerce")
-    roj  = pd.to_datetime(row.get("ROJ"), errors="coerce")
-
-    if mode == "Forward":
-        if pd.isna(po): return {}
-        sub_end = bday_add(po, sub, holidays)
-        mfg_end = bday_add(sub_end, mfg, holidays)
-        ship_end = bday_add(mfg_end, ship, holidays)
-        roj_calc = bday_add(ship_end, buf, holidays)
-        return {"PO Execution": po,
-                "Submittal Start": po, "Submittal End": sub_end,
-                "Manufacturing Start": sub_end, "Manufacturing End": mfg_end,
-                "Shipping Start": mfg_end, "Shipping End": ship_end,
-                "Buffer Start": ship_end, "ROJ_calc": roj_calc, "Buffer End": roj_calc}
-
-    if mode == "Backward":
-        if pd.isna(roj): return {}
-        ship_end = bday_sub(roj, buf, holidays)
-        mfg_end  = bday_sub(ship_end, ship, holidays)
-        sub_end  = bday_sub(mfg_end, mfg, holidays)
-        po_calc  = bday_sub(sub_end, sub, holidays)
-        if pd.notna(po_calc) and po_calc < TODAY:
-            po_calc = TODAY
-        return {"PO Execution": po_calc,
-                "Submittal Start": po_calc, "Submittal End": sub_end,
-                "Manufacturing Start": sub_end, "Manufacturing End": mfg_end,
-                "Shipping Start": mfg_end, "Shipping End": ship_end,
-                "Buffer Start": ship_end, "ROJ_calc": roj, "Buffer End": roj}
-    return {}
-
-def compute_all(df: pd.DataFrame, holiday_set) -> pd.DataFrame:
-    recs = []
-    if df is None or df.empty:
-        return pd.DataFrame()
-
-    calc = df.copy()
-    for c in ["ROJ","PO Execution","Delivery Date (committed)"]:
-        calc[c] = pd.to_datetime(calc.get(c), errors="coerce")
-    for c in ["Submittal (days)","Manufacturing (days)","Shipping (days)","Buffer (days)"]:
-        calc[c] = pd.to_numeric(calc.get(c), errors="coerce")
-
-    for _, row in calc.iterrows():
-        mode = str(row.get("Mode","") or "")
-        if mode not in ("Forward","Backward"):
-            continue
-
-        committed_delivery = row.get("Delivery Date (committed)")
-        po = row.get("PO Execution")
-        sub = as_int(row.get("Submittal (days)"), DEFAULT_SUBMITTAL_DAYS)
-        mfg = row.get("Manufacturing (days)")
-        ship = as_int(row.get("Shipping (days)"), DEFAULT_SHIPPING_DAYS)
-        buf = as_int(row.get("Buffer (days)"), DEFAULT_BUFFER_DAYS)
-
-        # Derive Manufacturing (days) if committed delivery is present (Forward)
-        def _needs_mfg_calc(val):
-            if pd.isna(val):
-                return True
-            if isinstance(val, str) and val.strip() == "":
-                return True
-            try:
-                return float(val) == 0.0
-            except Exception:
-                return False
-
-        if mode == "Forward" and pd.notna(committed_delivery) and _needs_mfg_calc(mfg) and pd.notna(po):
-            mfg_end = bday_sub(committed_delivery, buf, holiday_set)
-            mfg_end = bday_sub(mfg_end, ship, holiday_set)
-            sub_end = bday_add(po, sub, holiday_set)
-            if pd.notna(sub_end) and pd.notna(mfg_end):
-                mfg_dur = bday_diff(sub_end, mfg_end, holiday_set)
-                if mfg_dur is not None and mfg_dur < 0:
-                    mfg_dur = 0
-                row["Manufacturing (days)"] = mfg_dur
-
-        res = compute_pass(row, mode, holiday_set)
-        if not res:
-            status_msg = "Missing inputs for calculation."
-            po_display = row.get("PO Execution")
-            if mode == "Forward" and pd.isna(po):
-                status_msg = "⚠️Missing PO Execution; dates not computed"
-                po_display = None
-
-            recs.append({
-                "Equipment": row.get("Equipment",""),
-                "Mode": mode,
-                "ROJ": row.get("ROJ"),
-                "PO Execution": po_display,
-                "Submittal (days)": sub,
-                "Submittal Start": None,
-                "Submittal End": None,
-                "Manufacturing (days)": as_int(row.get("Manufacturing (days)"), 0),
-                "Manufacturing Start": None,
-                "Manufacturing End": None,
-                "Shipping (days)": ship,
-                "Shipping Start": None,
-                "Shipping End": None,
-                "Buffer (days)": buf,
-                "Buffer Start": None,
-                "Status": status_msg,
-                "Delta/Float (days)": None,
-                "Delivery Date (committed)": committed_delivery,
-                "Delivery Date": None,
-            })
-            continue
-
-        ship_end = res.get("Shipping End")
-        buffer_end = res.get("Buffer End")
-        computed_delivery = buffer_end if buf > 0 else ship_end
-        final_delivery = computed_delivery
-
-        roj_user = row.get("ROJ")
-
-        delta = None
-        status = ""
-        if pd.notna(roj_user) and pd.notna(final_delivery):
-            delta = bday_diff(roj_user, final_delivery, holiday_set)
-            if delta is not None and delta > 0:
-                status = "⛔Late vs ROJ"
-            elif delta is not None and delta <= 0:
-                status = "✓ Meets/early vs ROJ"
-
-        flt = None
-        if mode == "Backward":
-            po_req = res.get("PO Execution")
-            if pd.notna(po_req):
-                flt = bday_diff(TODAY, po_req, holiday_set)
-                if flt is not None and flt <= 22:
-                    status = "‼️PO is critical. Execute ASAP"
-
-        combo = delta if delta is not None else flt
-
-        d = {
-            "Equipment": row.get("Equipment",""),
-            "Mode": mode,
-            "ROJ": roj_user,
-            "PO Execution": res.get("PO Execution"),
-            "Submittal (days)": sub,
-            "Submittal Start": res.get("Submittal Start"), "Submittal End": res.get("Submittal End"),
-            "Manufacturing (days)": as_int(row.get("Manufacturing (days)"), 0),
-            "Manufacturing Start": res.get("Manufacturing Start"), "Manufacturing End": res.get("Manufacturing End"),
-            "Shipping (days)": ship,
-            "Shipping Start": res.get("Shipping Start"), "Shipping End": res.get("Shipping End"),
-            "Buffer (days)": buf, "Buffer Start": res.get("Buffer Start"),
-            "Status": status if status else None,
-            "Delta/Float (days)": combo,
-            "Delivery Date (committed)": committed_delivery,
-            "Delivery Date": final_delivery,
-        }
-        recs.append(d)
-
-    if not recs:
-        return pd.DataFrame()
-
-    out = pd.DataFrame(recs)
-    table_cols = [
-        "Equipment","Mode","ROJ","PO Execution",
-        "Submittal (days)","Submittal Start","Submittal End",
-        "Manufacturing (days)","Manufacturing Start","Manufacturing End",
-        "Shipping (days)","Shipping Start","Shipping End",
-        "Buffer (days)","Buffer Start",
-        "Status","Delta/Float (days)",
-        "Delivery Date (committed)","Delivery Date",
-    ]
-    existing = [c for c in table_cols if c in out.columns]
-    return out[existing]
-
-# ====== NEW: Baseline helpers ===================================================
-DATE_COLS = [
-    "PO Execution","Submittal Start","Submittal End",
-    "Manufacturing Start","Manufacturing End",
-    "Shipping Start","Shipping End",
-    "Buffer Start","Delivery Date","ROJ","Delivery Date (committed)"
-]
-
-def _norm_dates(df: pd.DataFrame) -> pd.DataFrame:
-    if df is None or df.empty:
-        return df
-    out = df.copy()
-    for c in DATE_COLS:
-        if c in out.columns:
-            out[c] = pd.to_datetime(out[c], errors="coerce")
-    return out
-
-def compare_to_baseline(current: pd.DataFrame, baseline: pd.DataFrame, holiday_set) -> pd.DataFrame:
-    """Return a tidy comparison with Δ (business days) per key date."""
-    if current is None or current.empty or baseline is None or baseline.empty:
-        return pd.DataFrame()
-
-    cur = _norm_dates(current)
-    base = _norm_dates(baseline)
-
-    # Merge on Equipment (assumes unique Equipment per row; if not, consider adding an ID)
-    merged = pd.merge(
-        base.add_prefix("Base: "),
-        cur.add_prefix("New: "),
-        left_on="Base: Equipment", right_on="New: Equipment",
-        how="outer", indicator=True
-    )
-
-    # Compute deltas for each comparable date field
-    def delta_col(col_name):
-        bcol = f"Base: {col_name}"
-        ncol = f"New: {col_name}"
-        if bcol in merged.columns and ncol in merged.columns:
-            merged[f"Δ {col_name} (bd)"] = merged.apply(
-                lambda r: bday_diff(r[bcol], r[ncol], holiday_set) if not (pd.isna(r[bcol]) or pd.isna(r[ncol])) else None,
-                axis=1
-            )
-
-    for c in ["PO Execution","Submittal End","Manufacturing End","Shipping End","Delivery Date","ROJ"]:
-        delta_col(c)
-
-    # Flags
-    merged["Changed?"] = merged.apply(
-        lambda r: any([
-            r.get(f"Δ {c} (bd)") not in (None, 0) for c in ["PO Execution","Submittal End","Manufacturing End","Shipping End","Delivery Date","ROJ"]
-        ]),
-        axis=1
-    )
-
-    # Pretty ordering
-    keep = [
-        "New: Equipment","Changed?",
-        "Base: Mode","New: Mode",
-        "Base: PO Execution","New: PO Execution","Δ PO Execution (bd)",
-        "Base: Submittal End","New: Submittal End","Δ Submittal End (bd)",
-        "Base: Manufacturing End","New: Manufacturing End","Δ Manufacturing End (bd)",
-        "Base: Shipping End","New: Shipping End","Δ Shipping End (bd)",
-        "Base: Delivery Date","New: Delivery Date","Δ Delivery Date (bd)",
-        "Base: ROJ","New: ROJ","Δ ROJ (bd)",
-        "Base: Status","New: Status","Base: Delta/Float (days)","New: Delta/Float (days)"
-    ]
-    keep = [c for c in keep if c in merged.columns]
-    merged = merged[keep].rename(columns={"New: Equipment":"Equipment"})
-    return merged
-
 # ================= Title & Notes =================
 st.title("Procurement Calculator")
 with st.expander("Assumptions & Notes", expanded=True):
@@ -327,40 +71,140 @@ with st.expander("Assumptions & Notes", expanded=True):
 <b>Assumptions:</b> Business-day math (Mon–Fri). Choose a single holiday preset.<br>
 <b>Per-row Mode:</b> Forward = compute from PO; Backward = compute PO from ROJ.<br>
 <b>Committed Delivery:</b> If present, leave <i>Manufacturing (days)</i> blank and we’ll derive it.<br>
-<b>Backward PO cap:</b> If calculated PO lands before today, we cap it at today (manual past POs are allowed in Forward).<br>
+<b>Predecessors:</b> <i>UPS Board+5</i> holds this item from shipping until 5 business days after UPS Board is delivered; Backward predecessors are pulled earlier to suit.<br>
+<b>Backward PO cap:</b> If calculated PO lands before the <i>As of</i> date (today by default), we cap it there (manual past POs are allowed in Forward).<br>
 </div>
 """.strip(),
         unsafe_allow_html=True,
     )
 
 # ================= Sidebar: Holiday presets =================
+@st.cache_resource
+def shared_portfolio():
+    # One per server process: every session's latest results, pre-aggregated.
+    return portfolio.Portfolio()
+
+@st.cache_resource
+def load_holiday_registry():
+    # Built once per server process; regions are memory-mapped from the on-disk cache.
+    return holiday_providers.open_registry()
+
 with st.sidebar:
     st.header("Holiday Calendar")
-    calendar_choice = st.selectbox("Preset", ["None","US Federal","Spain (C. Valenciana)","Netherlands","Italy","UK (England & Wales)","Mexico"])
-    holiday_set = calendar.build_for_region(calendar_choice)
+    holiday_registry = load_holiday_registry()
+    calendar_choice = st.selectbox("Preset", holiday_registry.regions())
+    holiday_set = holiday_registry.holidays(calendar_choice)
+    as_of = schedule.as_of_date(st.date_input("As of", value=date.today(),
+                                              help="Backward POs are capped at, and float counted from, this date."))
+
+    st.header("Delivery Capacity")
+    level_on = st.toggle("Level large deliveries", help="Delay large deliveries so the site never receives more than "
+                                                        "the weekly capacity; least float goes first. Applied on Calculate.")
+    level_cap = st.number_input("Large deliveries per week", min_value=1, step=1, value=leveling.DEFAULT_CAPACITY,
+                                disabled=not level_on)
+    level_patterns = [p.strip() for p in st.text_input(
+        "Large items (name contains)", value=", ".join(leveling.LARGE_PATTERNS), disabled=not level_on).split(",") if p.strip()]
 
 # ================= Session init =================
+@st.cache_data
 def make_default_df():
     df = pd.DataFrame(STANDARD_EQUIPMENT)
+    df.insert(1, "Vendor", "")
+    df["Predecessors"] = ""
     df["Mode"] = ""
     df["ROJ"] = pd.NaT
     df["PO Execution"] = pd.NaT
-    df["Submittal (days)"] = DEFAULT_SUBMITTAL_DAYS
+    df["Submittal (days)"] = schedule.DEFAULT_SUBMITTAL_DAYS
     df["Manufacturing (days)"] = 0
-    df["Shipping (days)"]  = DEFAULT_SHIPPING_DAYS
-    df["Buffer (days)"]    = DEFAULT_BUFFER_DAYS
+    df["Shipping (days)"]  = schedule.DEFAULT_SHIPPING_DAYS
+    df["Buffer (days)"]    = schedule.DEFAULT_BUFFER_DAYS
     df["Delivery Date (committed)"] = pd.NaT
+    for c in schedule.ACTUAL_COLS:
+        df[c] = pd.NaT
+    df["Cost"] = np.nan
+    df["Payment Terms"] = ""
     return df
 
-if "work_df" not in st.session_state or st.session_state.work_df is None:
-    st.session_state.work_df = make_default_df()
-if "results" not in st.session_state:
-    st.session_state.results = pd.DataFrame()
+@st.cache_resource
+def load_project_store():
+    # One SQLite file per server; each session keeps only its active project in memory.
+    return project_store.ProjectStore()
+
+@st.cache_resource
+def load_lead_time_library():
+    return lead_times.LeadTimeLibrary(load_project_store())
+
+@st.cache_resource
+def memory_registry():
+    # One per server process: every session's frames, spilled to disk past the memory budgets.
+    return spill.MemoryRegistry()
+
+store = load_project_store()
+library = load_lead_time_library()
+
+# Large frames are held outside session state between runs (see utils/spill.py); put them back.
+SESSION_FRAMES = ("work_df", "results", "baseline")
+if "frames" not in st.session_state:
+    st.session_state.frames = memory_registry().session()
+st.session_state.frames.checkout(st.session_state)
+
+def session_frame(name):
+    # Spilled frames are read back from disk the first time a run asks for them.
+    return st.session_state.frames.get(st.session_state, name)
+
+def session_rows(name):
+    return st.session_state.frames.rows(st.session_state, name)
+
+def new_project_df():
+    # Stock durations, replaced by lead-time history for this calendar where we have any.
+    return library.apply(make_default_df(), calendar_choice)[0]
+
+if not store.projects():
+    store.save("Project 1", new_project_df(), calendar_choice)
+
+with st.sidebar:
+    st.header("Project")
+    with st.expander("Manage projects"):
+        new_name = st.text_input("New project name").strip()
+        if st.button("Create", disabled=not new_name or new_name in store.projects()):
+            store.save(new_name, new_project_df(), calendar_choice)
+            st.session_state.project_select = new_name
+        current = st.session_state.get("project_select")
+        if st.button("Delete current project", disabled=current is None or len(store.projects()) < 2):
+            store.delete(current)
+            shared_portfolio().remove(current)
+            st.session_state.project_select = store.projects()[0]
+            st.session_state.active_project = None  # don't autosave the deleted table back
+        if st.button("Record lead times from this project", disabled=not session_rows("results"),
+                     help="Once a project is complete, add its actual durations to the lead-time library. "
+                          "Rows already recorded are skipped."):
+            done = session_frame("results").merge(
+                session_frame("work_df")[["Equipment", "Vendor"]].drop_duplicates("Equipment"),
+                on="Equipment", how="left")
+            added = library.record(current, done, calendar_choice, holiday_set)
+            st.toast(f"Recorded {added} new duration{'s' if added != 1 else ''} in the lead-time library.")
+    project_name = st.selectbox("Project", store.projects(), key="project_select",
+                                help="Saved automatically on Calculate. Results roll up under this name in the Portfolio section.")
+
 if "editor_nonce" not in st.session_state:
     st.session_state.editor_nonce = 0
+if st.session_state.get("active_project") != project_name or session_frame("work_df") is None:
+    # Lazy load: only the selected project's table is read from disk and kept in the session.
+    if st.session_state.get("compute_job") is not None:
+        st.session_state.compute_job.cancel()
+        st.session_state.compute_job = None
+    loaded = store.load(project_name)
+    st.session_state.work_df = grid.ensure_columns(loaded if loaded is not None and not loaded.empty else make_default_df())
+    st.session_state.results = pd.DataFrame()
+    st.session_state.input_issues = None
+    st.session_state.leveling_moves = None
+    st.session_state.baseline = pd.DataFrame()
+    st.session_state.baseline_meta = {}
+    st.session_state.editor_nonce += 1
+    st.session_state.active_project = project_name
 
 # ====== NEW: baseline session slots ============================================
-if "baseline" not in st.session_state:
+if "baseline" not in st.session_state and not session_rows("baseline"):  # a spilled one is still pending
     st.session_state.baseline = pd.DataFrame()
 if "baseline_meta" not in st.session_state:
     st.session_state.baseline_meta = {}
@@ -432,37 +276,36 @@ if "baseline_notice" not in st.session_state:
 # ================= Data Editor (FORM; Calculate-only) =================
 
 st.markdown("### Equipment & Durations")
-st.caption("Only fill **Delivery Date (committed)** if a vendor has provided a firm date. If so, leave **Manufacturing (days)** blank and we’ll derive it.")
-
-editor_cols = [
-    "Equipment","Mode","ROJ","PO Execution",
-    "Submittal (days)","Manufacturing (days)","Shipping (days)","Buffer (days)",
-    "Delivery Date (committed)"
-]
-for c in editor_cols:
-    if c not in st.session_state.work_df.columns:
-        if c in ("Equipment","Mode"):
-            st.session_state.work_df[c] = ""
-        elif c in ("ROJ","PO Execution","Delivery Date (committed)"):
-            st.session_state.work_df[c] = pd.NaT
-        elif c == "Manufacturing (days)":
-            st.session_state.work_df[c] = 0
-        elif c == "Submittal (days)":
-            st.session_state.work_df[c] = DEFAULT_SUBMITTAL_DAYS
-        elif c == "Shipping (days)":
-            st.session_state.work_df[c] = DEFAULT_SHIPPING_DAYS
-        elif c == "Buffer (days)":
-            st.session_state.work_df[c] = DEFAULT_BUFFER_DAYS
+st.caption("Only fill **Delivery Date (committed)** if a vendor has provided a firm date. If so, leave **Manufacturing (days)** blank and we’ll derive it. "
+           "As work completes, enter the actual dates instead of editing durations: only the phases after the latest actual are replanned.")
+
+editor_cols = grid.EDITOR_COLS
+master = session_frame("work_df")
+windowed = len(master) > grid.FULL_ROWS
+if windowed:
+    # Large tables: the browser only gets one page of (optionally filtered) rows.
+    w1, w2, w3 = st.columns([4, 1, 1])
+    find = w1.text_input("Find rows", placeholder="Equipment or vendor contains…", key="grid_find")
+    page = w2.number_input("Page", min_value=1, step=1, key="grid_page")
+    page_size = w3.selectbox("Rows per page", grid.PAGE_SIZES, index=1, key="grid_page_size")
+    window_ids, n_match, n_pages = grid.window(master, find, page, page_size)
+    st.caption(f"Page {min(page, n_pages)} of {n_pages}: {len(window_ids):,} of {n_match:,} matching rows "
+               f"({len(master):,} in the table). **Apply Edits** or **Calculate** before changing page; "
+               "new rows are added at the end of the table.")
+else:
+    window_ids = master.index.to_numpy()
 
 with st.form("grid_form", clear_on_submit=False):
     edited_df = st.data_editor(
-        st.session_state.work_df[editor_cols],
+        grid.view(master, window_ids),
         key=f"equipment_editor_{st.session_state.editor_nonce}",
         num_rows="dynamic",
         use_container_width=True,
         hide_index=True,
         column_order=editor_cols,
         column_config={
+            "Vendor": st.column_config.TextColumn("Vendor", help="Used to look up lead times from past projects."),
+            "Predecessors": st.column_config.TextColumn("Predecessors", help="Finish-to-start links, e.g. `UPS Board+5, Generator` (name + lag in business days)."),
             "Mode": st.column_config.SelectboxColumn("Mode", options=["","Forward","Backward"]),
             "ROJ": st.column_config.DateColumn("ROJ"),
             "PO Execution": st.column_config.DateColumn("PO Execution"),
@@ -471,22 +314,108 @@ with st.form("grid_form", clear_on_submit=False):
             "Shipping (days)":      st.column_config.NumberColumn(min_value=0, step=1),
             "Buffer (days)":        st.column_config.NumberColumn(min_value=0, step=1),
             "Delivery Date (committed)": st.column_config.DateColumn("Delivery Date (committed)"),
+            "Submittal Actual End": st.column_config.DateColumn("Submittal Actual End",
+                                                                help="Approved submittal date. Manufacturing onward is replanned from it."),
+            "Manufacturing Actual End": st.column_config.DateColumn("Manufacturing Actual End",
+                                                                    help="Date the item was ready to ship. Shipping onward is replanned from it."),
+            "Shipped": st.column_config.DateColumn("Shipped", help="Date the item left the factory. "
+                                                   "Shipped items are no longer moved by predecessors or delivery leveling."),
+            "Cost": st.column_config.NumberColumn("Cost", min_value=0, format="%.0f",
+                                                  help="Optional. Drives the cash-flow projection."),
+            "Payment Terms": st.column_config.TextColumn("Payment Terms",
+                                                         help="% paid at PO / manufacturing end / delivery, "
+                                                              "e.g. `30/40/30` (the default when blank)."),
         },
     )
     # calc_clicked = st.form_submit_button("Calculate", type="primary")
-    col1, col2 = st.columns([1, 1])
-    with col2:
+    apply_edits = False
+    *col0, col1, col2, col3 = st.columns([1, 1, 1, 1] if windowed else [1, 1, 1])
+    if windowed:
+        with col0[0]:
+            apply_edits = st.form_submit_button("Apply Edits", type="secondary",
+                                                help="Save this page's edits without recalculating.")
+    with col3:
         calc_clicked = st.form_submit_button("Calculate", type="primary")
+    with col2:
+        fill_lead_times = st.form_submit_button("Fill Lead Times", type="secondary",
+                                                help="Replace blank or stock durations with lead-time history "
+                                                     "for the equipment, vendor and calendar.")
     with col1:
         reset = st.form_submit_button("Clear All Inputs", type="secondary")
 
+@st.cache_resource
+def shared_cache():
+    # One per server process: identical inputs across sessions compute once.
+    return result_cache.ResultCache()
+
+def run_compute(df):
+    key = result_cache.make_key("results", df, calendar_choice, str(as_of.date()))
+    try:
+        return shared_cache().get_or_compute(key, lambda: engine.compute_all(df, holiday_set, as_of=as_of))
+    except dependencies.CycleError as e:
+        st.error(f"{e}. Scheduling items independently until the loop is removed.")
+        unlinked = df.drop(columns=["Predecessors"])
+        return shared_cache().get_or_compute(key + ":unlinked", lambda: engine.compute_all(unlinked, holiday_set, as_of=as_of))
+
+@st.cache_resource
+def compute_executor():
+    # Shared worker threads for large recalculations; the script thread only polls them.
+    return jobs.make_executor()
+
+def cancel_compute():
+    job = st.session_state.get("compute_job")
+    if job is not None:
+        job.cancel()
+    st.session_state.compute_job = None
+
+def adopt_results(results, inputs):
+    st.session_state.leveling_moves = None
+    if level_on and results is not None and not results.empty:
+        # The project is one site; leveling is cheap, so it runs on every adopt (cached or fresh).
+        results, st.session_state.leveling_moves = leveling.level(
+            results, holiday_set, leveling.is_large(results["Equipment"], level_patterns), int(level_cap),
+            fixed=schedule.actual_masks(results)[1])
+    results = cashflow.attach(results, inputs)
+    st.session_state.results = results
+    shared_portfolio().update(project_name, calendar_choice, results)
+
+def start_compute(df):
+    cancel_compute()
+    key = result_cache.make_key("results", df, calendar_choice, str(as_of.date()))
+    if len(df) < jobs.BACKGROUND_ROWS or shared_cache().get(key) is not None:
+        adopt_results(run_compute(df), df)
+        return
+
+    cache = shared_cache()  # resolved here: on_done runs on a worker thread without a script context
+
+    def on_done(job):
+        cache.put(key + (":unlinked" if job.error else ""), job.result)
+
+    st.session_state.results = pd.DataFrame()
+    st.session_state.compute_job = jobs.ComputeJob(compute_executor(), df, holiday_set, as_of=as_of, on_done=on_done)
+
+if calc_clicked or apply_edits:
+    st.session_state.work_df = grid.merge(master, window_ids, edited_df)
+
+if apply_edits:
+    store.save(project_name, session_frame("work_df"), calendar_choice)
+
 if calc_clicked:
-    st.session_state.work_df = edited_df.copy()
-    st.session_state.results = compute_all(st.session_state.work_df, holiday_set)
+    start_compute(session_frame("work_df"))
+    st.session_state.input_issues = validation.validate(session_frame("work_df")).issues()
+    store.save(project_name, session_frame("work_df"), calendar_choice)
+
+if fill_lead_times:
+    st.session_state.work_df, filled = library.apply(grid.merge(master, window_ids, edited_df), calendar_choice)
+    st.session_state.editor_nonce += 1
+    store.save(project_name, session_frame("work_df"), calendar_choice)
+    st.toast(f"Filled {filled} duration{'s' if filled != 1 else ''} from the lead-time library.")
+    st.rerun()
 
 if reset:
-    df = st.session_state.work_df.copy()
-    for c in ["Mode","ROJ","PO Execution","Delivery Date (committed)"]:
+    cancel_compute()
+    df = session_frame("work_df").copy()
+    for c in ["Mode","ROJ","PO Execution","Delivery Date (committed)", *schedule.ACTUAL_COLS]:
         if c == "Mode" and c in df:
             df[c] = ""
         elif c in df:
@@ -496,36 +425,82 @@ if reset:
             if c == "Manufacturing (days)":
                 df[c] = 0
             elif c == "Submittal (days)":
-                df[c] = DEFAULT_SUBMITTAL_DAYS
+                df[c] = schedule.DEFAULT_SUBMITTAL_DAYS
             elif c == "Shipping (days)":
-                df[c] = DEFAULT_SHIPPING_DAYS
+                df[c] = schedule.DEFAULT_SHIPPING_DAYS
             elif c == "Buffer (days)":
-                df[c] = DEFAULT_BUFFER_DAYS
+                df[c] = schedule.DEFAULT_BUFFER_DAYS
     st.session_state.work_df = df
+    store.save(project_name, df, calendar_choice)
     st.session_state.results = pd.DataFrame()   # clear output
+    st.session_state.input_issues = None
+    st.session_state.leveling_moves = None
+    shared_portfolio().remove(project_name)
     st.session_state.editor_nonce += 1          # force editor refresh
 
 
+# ================= Sidebar: Result filters =================
+res_all = session_frame("results")
+if st.session_state.get("results_index") is None or st.session_state.results_index.source is not res_all:
+    st.session_state.results_index = query.ScheduleIndex(res_all)
+results_index = st.session_state.results_index
+
+with st.sidebar:
+    st.header("Filters")
+    filters = {}
+    has_res = res_all is not None and not res_all.empty
+    status_opts = results_index.values("Status")
+    filters["Status"] = st.multiselect("Status", status_opts, format_func=lambda v: v or "(none)", disabled=not has_res)
+    filters["Mode"] = st.multiselect("Mode", [m for m in results_index.values("Mode") if m], disabled=not has_res)
+    filters["Equipment"] = st.text_input("Equipment contains", disabled=not has_res)
+    filters["Date field"] = st.selectbox("Date field", ["None"] + query.DATE_KEYS, disabled=not has_res)
+    if filters["Date field"] != "None":
+        filters["Date range"] = st.date_input("Between", value=(), disabled=not has_res)
+    filters["Due within (bd)"] = st.number_input("PO due within (business days)", min_value=0, step=1, value=0,
+                                                 help="0 = off. Counts from the As of date on the selected holiday calendar.",
+                                                 disabled=not has_res)
+
+if has_res:
+    row_mask = query.apply_filters(results_index, filters, today=as_of, holidays=holiday_set)
+    view_results = results_index.select(row_mask)
+    if not row_mask.all():
+        st.sidebar.caption(f"Showing {int(row_mask.sum())} of {len(row_mask)} rows")
+else:
+    view_results = res_all
+    row_mask = None
+
 # ================= Output: Table =================
 st.markdown("### Calculated Dates")
+input_issues = st.session_state.get("input_issues")
+if input_issues is not None and not input_issues.empty:
+    n_rows = input_issues["Row"].nunique()
+    with st.expander(f"⚠️ {n_rows} row{'s' if n_rows != 1 else ''} with input issues"):
+        st.dataframe(input_issues, use_container_width=True, hide_index=True)
+leveling_moves = st.session_state.get("leveling_moves")
+if leveling_moves is not None and not leveling_moves.empty:
+    with st.expander(f"📦 {len(leveling_moves)} large deliver{'ies' if len(leveling_moves) != 1 else 'y'} "
+                     f"delayed to fit {int(level_cap)} per week"):
+        st.dataframe(leveling_moves, use_container_width=True, hide_index=True,
+                     column_config={c: st.column_config.DateColumn(c) for c in ("Week of", "Computed Delivery", "Leveled Delivery")})
 
 def renderBaselineButtons(c2, c3, c4):
   # ====== NEW: Baseline lock / reset =============================================
   with c2:
       # Enable if there are results OR at least one row has a Mode set
       has_modes = False
-      if isinstance(st.session_state.work_df, pd.DataFrame) and "Mode" in st.session_state.work_df.columns:
-          modes_series = st.session_state.work_df["Mode"].fillna("")
+      work = session_frame("work_df")
+      if isinstance(work, pd.DataFrame) and "Mode" in work.columns:
+          modes_series = work["Mode"].fillna("")
           has_modes = modes_series.isin(["Forward", "Backward"]).any()
 
-      has_results = st.session_state.results is not None and not st.session_state.results.empty
+      has_results = session_rows("results") > 0
       lockable = has_results or has_modes
 
       if st.button("Lock Baseline", disabled=not lockable, type="primary"):
           # Ensure we lock the latest calc; if empty, compute on the fly
-          current = st.session_state.results
+          current = session_frame("results")
           if current is None or current.empty:
-              current = compute_all(st.session_state.work_df, holiday_set)
+              current = cashflow.attach(run_compute(session_frame("work_df")), session_frame("work_df"))
 
           base = current.copy()
           for c in [
@@ -544,28 +519,63 @@ def renderBaselineButtons(c2, c3, c4):
           }
 
   with c3:
-      can_adopt = (st.session_state.results is not None and not st.session_state.results.empty and
-                   not st.session_state.baseline.empty)
+      can_adopt = session_rows("results") > 0 and session_rows("baseline") > 0
       if st.button("Adopt Scenario", disabled=not can_adopt, type="primary"):
           st.session_state.baseline = pd.DataFrame()
           st.session_state.baseline_meta = {}
           st.session_state.baseline_notice = "New scenario adopted. Baseline cleared."
 
   with c4:
-      if st.button("Reset Baseline", disabled=st.session_state.baseline.empty, type="secondary"):
+      if st.button("Reset Baseline", disabled=not session_rows("baseline"), type="secondary"):
           st.session_state.baseline = pd.DataFrame()
           st.session_state.baseline_meta = {}
           st.session_state.baseline_notice = "Baseline cleared."
 
-if st.session_state.results is None or st.session_state.results.empty:
+@st.fragment(run_every=0.5)
+def compute_progress():
+    # Polls the background job; the full page reruns once it finishes.
+    job = st.session_state.get("compute_job")
+    if job is None:
+        return
+    if job.finished:
+        st.session_state.compute_job = None
+        if job.failure is not None:
+            st.session_state.compute_notice = f"Calculation failed: {job.failure!r}"
+        elif job.result is not None:
+            adopt_results(job.result, job.df)
+            st.session_state.compute_notice = job.error
+        st.rerun()
+    st.progress(job.progress, text=f"Calculating {len(job.df):,} rows… ({job.done}/{job.total} chunks)")
+    if st.button("Cancel calculation"):
+        cancel_compute()
+        st.rerun()
+    partial = job.partial()
+    if not partial.empty:
+        st.caption(f"{len(partial):,} rows ready so far; predecessor links are applied once every chunk is done.")
+        st.dataframe(partial, use_container_width=True, hide_index=True)
+
+compute_notice = st.session_state.pop("compute_notice", None)
+if compute_notice:
+    st.error(compute_notice)
+
+if st.session_state.get("compute_job") is not None:
+    compute_progress()
+elif not session_rows("results"):
     st.info("Fill the table, then click **Calculate**.")
+elif view_results.empty:
+    st.info("No rows match the sidebar filters.")
+    c2, c3, c4, _ = st.columns([2,2,2,7], gap="small")
+    renderBaselineButtons(c2, c3, c4)
 else:
     # View toggle: Current vs Compare
-    view = "Current"
-    if not st.session_state.baseline.empty:
+    views = ["Current", "Latest PO / Slack"]
+    if session_rows("baseline"):
+        views.append("Compare to Baseline")
+    view = st.radio("View", views, horizontal=True, index=0,
+                    help="Latest PO / Slack: latest dates that still meet ROJ. Lock a baseline to compare.")
+    if session_rows("baseline"):
         meta = st.session_state.baseline_meta
         blurb = f" (baseline {meta.get('locked_at','')} – {meta.get('calendar','')})"
-        view = st.radio("View", ["Current","Compare to Baseline"], horizontal=True, index=0, help="Lock a baseline, then compare.")
         st.caption(f"Baseline locked{blurb}")
 
     notice = st.session_state.get("baseline_notice")
@@ -577,20 +587,56 @@ else:
     def _dates_to_date(df):
         out = df.copy()
         for c in out.columns:
-            if ("Start" in c or "End" in c or c in {"PO Execution","ROJ","Delivery Date (committed)","Delivery Date"}) and pd.api.types.is_datetime64_any_dtype(out[c]):
+            if ("Start" in c or "End" in c or c in {"PO Execution","Latest PO Execution","ROJ","Delivery Date (committed)","Delivery Date","Shipped"}) and pd.api.types.is_datetime64_any_dtype(out[c]):
                 out[c] = pd.to_datetime(out[c]).dt.date
         return out
 
     if view == "Current":
-        show = _dates_to_date(st.session_state.results.copy())
+        show = _dates_to_date(view_results.copy())
         st.dataframe(show, use_container_width=True, hide_index=True)
         # ================= Buttons Baseline =================
         c2, c3, c4, _, c1 = st.columns([2,2,2,4,3], gap="small")
         with c1: st.download_button("Download Results (CSV)", data=show.to_csv(index=False).encode("utf-8"),
                            file_name="procurement_pass_results.csv", mime="text/csv")
         renderBaselineButtons(c2, c3, c4)
+    elif view == "Latest PO / Slack":
+        slack = engine.solve_latest(view_results, holiday_set, as_of=as_of)
+        st.caption("Latest dates that still meet ROJ, and how long each phase could run with the others unchanged. "
+                   "Backward rows count slack from the As of date; negative slack means ROJ is already out of reach.")
+        show = _dates_to_date(slack)
+        st.dataframe(show, use_container_width=True, hide_index=True)
+        c2, c3, c4, _, c1 = st.columns([2,2,2,4,3], gap="small")
+        with c1: st.download_button("Download Slack (CSV)", data=show.to_csv(index=False).encode("utf-8"),
+                           file_name="procurement_latest_po.csv", mime="text/csv")
+        renderBaselineButtons(c2, c3, c4)
+        backward = view_results[view_results["Mode"].eq("Backward")]
+        if not backward.empty:
+            with st.expander("PO float history (Backward rows, last 12 weeks)"):
+                history = engine.replay(backward, holiday_set, pd.date_range(end=as_of, periods=13, freq="7D"))
+                st.line_chart(history.pivot_table(index="As Of", columns="Equipment", values="PO Float (bd)"))
+    elif not st.toggle("Show full comparison", help="Every Base:/New: column for every item, changed or not."):
+        changes = engine.compare_sparse(view_results, session_frame("baseline"), holiday_set)
+        filtered = len(view_results) < len(session_frame("results"))
+        if filtered:
+            changes = changes[changes["Equipment"].isin(view_results["Equipment"])]
+        n_items = changes["Equipment"].nunique()
+        st.caption(f"{n_items} item{'s' if n_items != 1 else ''} changed vs baseline ({len(changes)} milestone moves)."
+                   if n_items else "No milestone moved vs baseline.")
+        display = changes.copy()
+        delta = display["Δ (bd)"]
+        icon = np.where(delta.fillna(0).to_numpy() > 0, "▲ ", np.where(delta.fillna(0).to_numpy() < 0, "▼ ", ""))
+        display["Δ (bd)"] = np.where(delta.notna(), icon + delta.astype(str) + " bd", "")
+        for c in ("Old", "New"):
+            display[c] = display[c].dt.date
+        st.dataframe(display, use_container_width=True, hide_index=True)
+        c2, c3, c4, _, c1 = st.columns([2,2,2,4,3], gap="small")
+        with c1:
+          st.download_button("Download Changes (CSV)", data=changes.to_csv(index=False).encode("utf-8"),
+                           file_name="procurement_baseline_changes.csv", mime="text/csv")
+        renderBaselineButtons(c2, c3, c4)
     else:
-        comp = compare_to_baseline(st.session_state.results, st.session_state.baseline, holiday_set)
+        comp = engine.compare_to_baseline(session_frame("results"), session_frame("baseline"), holiday_set)
+        comp = comp[comp["Equipment"].isin(view_results["Equipment"]) | comp["Equipment"].isna()] if len(view_results) < len(session_frame("results")) else comp
         # Show deltas with simple emoji cues
         def delta_icon(v):
             if pd.isna(v) or v == 0: return ""
@@ -620,144 +666,80 @@ else:
 
 # ================= Output: Gantt =================
 st.markdown("### Timeline (per Equipment)")
-res = st.session_state.results
+res = view_results
 if res is not None and not res.empty:
-    bars = []
-    phases = [("Submittal","Submittal Start","Submittal End"),
-              ("Manufacturing","Manufacturing Start","Manufacturing End"),
-              ("Shipping","Shipping Start","Shipping End"),
-              ("Buffer","Buffer Start","Delivery Date")]
-
-    # Current bars
-    for _, r in res.iterrows():
-        has_any = False
-        for p, s, e in phases:
-            s_val, e_val = r.get(s), r.get(e)
-            if pd.isna(s_val) or pd.isna(e_val):
-                continue
-            has_any = True
-            bars.append({"Series":"Current","Equipment": r["Equipment"], "Phase": p,
-                         "Start": pd.to_datetime(s_val), "Finish": pd.to_datetime(e_val)})
-        if pd.notna(r.get("ROJ")):
-            roj_val = pd.to_datetime(r.get("ROJ"))
-            bars.append({"Series":"Current","Equipment": r["Equipment"], "Phase": "ROJ",
-                         "Start": roj_val, "Finish": roj_val + pd.Timedelta(days=1)})
-        if not has_any and pd.isna(r.get("ROJ")):
-            milestone = r.get("Delivery Date") or r.get("PO Execution")
-            if pd.notna(milestone):
-                start = pd.to_datetime(milestone)
-                finish = start + pd.Timedelta(days=1)
-                bars.append({"Series":"Current","Equipment": r["Equipment"], "Phase": "Milestone",
-                             "Start": start, "Finish": finish})
-
-    # ====== NEW: Baseline ghost bars ===========================================
-    if not st.session_state.baseline.empty:
-        base = st.session_state.baseline
-        for _, r in base.iterrows():
-            for p, s, e in phases:
-                s_val, e_val = r.get(s), r.get(e)
-                if pd.isna(s_val) or pd.isna(e_val):
-                    continue
-                bars.append({"Series":"Baseline","Equipment": r["Equipment"], "Phase": p,
-                             "Start": pd.to_datetime(s_val), "Finish": pd.to_datetime(e_val)})
-            if pd.notna(r.get("ROJ")):
-                roj_val = pd.to_datetime(r.get("ROJ"))
-                bars.append({"Series":"Baseline","Equipment": r["Equipment"], "Phase": "ROJ",
-                             "Start": roj_val, "Finish": roj_val + pd.Timedelta(days=1)})
-
-    if bars:
-        gantt_df = pd.DataFrame(bars)
-
-        # Color map: Current vivid, Baseline ghosted (same hues lower alpha)
-        phase_colors = {
-            "Submittal": colors.MANO_BLUE,
-            "Manufacturing": colors.MANUFACTURING,
-            "Shipping": colors.SHIPPING,
-            "Buffer": colors.BUFFER,
-            "ROJ": colors.MANO_GREY,
-            "Milestone": colors.MANO_BLUE,
-        }
-
-        # Add combined Y axis label = Equipment + Series
-        gantt_df["Equip"] = gantt_df["Equipment"] + " - " + gantt_df["Series"]
-
-        # Order so Current is always above Baseline
-        ordered_y = []
-        for eq in gantt_df["Equipment"].unique():
-          ordered_y.append(f"{eq} - Current")
-          if f"{eq} - Baseline" in gantt_df["Equip"].values:
-              ordered_y.append(f"{eq} - Baseline")
-        
-        # --- Current ---
-        cur_df = gantt_df[gantt_df["Series"] == "Current"]
-        fig = px.timeline(
-            cur_df,
-            x_start="Start",
-            x_end="Finish",
-            y="Equip",
-            color="Phase",
-            category_orders={
-              "Phase": ["Submittal","Manufacturing","Shipping","Buffer","ROJ","Milestone"],
-              "Equip": ordered_y,
-            },
-            color_discrete_map=phase_colors,
-        )
-
-        # --- Baseline ---
-        base_df = gantt_df[gantt_df["Series"] == "Baseline"]
-        if not base_df.empty:
-          base_fig = px.timeline(
-            base_df,
-            x_start="Start",
-            x_end="Finish",
-            y="Equip",
-            color="Phase",
-            category_orders={
-              "Phase": ["Submittal","Manufacturing","Shipping","Buffer","ROJ","Milestone"],
-              "Equip": ordered_y,
-            },
-            color_discrete_map=phase_colors,
-          )
-          for tr in base_fig.data:
-            tr.opacity = 0.25       # 👈 ghosted baseline
-            tr.showlegend = False   # avoid duplicate legend
-            tr.width = 0.5
-            fig.add_trace(tr)
-
-        tick_map = {}
-        for eq in gantt_df["Equipment"].unique():
-          tick_map[f"{eq} - Current"] = eq        # show just equipment name
-          tick_map[f"{eq} - Baseline"] = ""  # indented baseline
-
-        # Axes + layout
-        fig.update_xaxes(
-          showgrid=True,
-          gridcolor="lightgray",
-          linewidth=1,
-          linecolor=colors.MANO_BLUE,
-          title="Timeline"
-        )
-        fig.update_yaxes(
-          showgrid=True,
-          autorange="reversed",
-          tickmode="array",
-          tickvals=list(tick_map.keys()),   # real values
-          ticktext=list(tick_map.values()), # what gets shown,
-          categoryorder="array",
-          categoryarray=ordered_y,
-          linewidth=1,
-          linecolor=colors.MANO_BLUE,
-          title="Equipment"
-        )
-
-        fig.update_layout(
-            height=520,
-            margin=dict(l=20, r=20, t=20, b=20),
-            legend_title_text="",
-            plot_bgcolor="#FFFFFF",
-            paper_bgcolor=colors.MANO_OFFWHITE
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    # Per-session figure: reruns that don't replace results / baseline / filters reuse its spec as
+    # is; a changed view is patched per row, and identical views across sessions share one spec.
+    timeline = st.session_state.setdefault("timeline", gantt.Timeline())
+    try:
+        spec = timeline.serialized(res_all, session_frame("baseline"), row_mask, holiday_set,
+                                   shared_cache(), calendar_choice)
+    except ModuleNotFoundError:
+        st.error("Plotly isn’t installed. Run: pip install streamlit pandas numpy plotly")
+        st.stop()
+    if spec is not None:
+        gantt.show(spec)
     else:
         st.info("No timeline bars yet — click **Calculate** first.")
 
+# ================= Output: Cash flow =================
+if res is not None and cashflow.has_costs(res):
+    base = session_frame("baseline")
+    if not base.empty and len(res) < len(res_all):
+        base = base[base["Equipment"].isin(res["Equipment"])]
+    flow = cashflow.monthly(cashflow.payments(res, project_name),
+                            cashflow.payments(base, project_name) if cashflow.has_costs(base) else None)
+    dated = flow[flow["Month"].notna()]
+    with st.expander(f"💵 Cash flow ({flow['Current'].sum():,.0f} total)"):
+        st.caption("Cash out per month: deposit at PO Execution, progress payment at Manufacturing End, "
+                   "balance at Delivery Date (per each row's Payment Terms).")
+        series = ["Current", "Baseline"] if "Baseline" in flow.columns else ["Current"]
+        st.bar_chart(dated.set_index("Month")[series], stack=False)
+        st.dataframe(dated, use_container_width=True, hide_index=True, column_config={
+            "Month": st.column_config.DateColumn("Month", format="YYYY-MM"),
+            **{c: st.column_config.NumberColumn(c, format="%.0f") for c in ["Current", "Cumulative", "Baseline", "Delta"]},
+        })
+        unscheduled = flow.loc[flow["Month"].isna(), "Current"].sum()
+        if unscheduled:
+            st.caption(f"{unscheduled:,.0f} is not scheduled yet (rows without computed milestone dates).")
+        st.download_button("Download Cash Flow (CSV)", data=flow.to_csv(index=False).encode("utf-8"),
+                           file_name="procurement_cash_flow.csv", mime="text/csv")
+
+# ================= Output: Portfolio roll-up =================
+pf = shared_portfolio()
+pf_projects = pf.projects()
+if pf_projects:
+    with st.expander(f"Portfolio roll-up ({len(pf_projects)} project{'s' if len(pf_projects) != 1 else ''})"):
+        totals = pf.totals()
+        for col, (label, value) in zip(st.columns(len(totals)), totals.items()):
+            col.metric(label, value)
+        group_by = st.multiselect("Group by", portfolio.GROUP_KEYS, default=["Equipment"])
+        st.dataframe(pf.frame(by=group_by), use_container_width=True, hide_index=True)
+        st.caption("Delta/Float (days) distribution across all projects (> 0 = late vs ROJ)")
+        st.bar_chart(pf.histogram())
+        pf_cash = pf.cash_flow()
+        pf_cash = pf_cash[pf_cash["Month"].notna()]
+        if not pf_cash.empty:
+            st.caption("Monthly cash out by project")
+            st.bar_chart(pf_cash.pivot(index="Month", columns="Project", values="Current"))
+
+lead_time_stats = library.summary()
+if not lead_time_stats.empty:
+    with st.expander(f"Lead-time library ({lead_time_stats[['equipment', 'vendor', 'region']].drop_duplicates().shape[0]} keys)"):
+        st.dataframe(lead_time_stats, use_container_width=True, hide_index=True)
+
+# ================= Sidebar: Server memory =================
+with st.sidebar:
+    with st.expander("Server memory"):
+        mb = lambda n: "n/a" if n is None else f"{n / 2**20:,.1f} MB"
+        mem = memory_registry().stats()
+        m1, m2 = st.columns(2)
+        m1.metric("Process RSS", mb(mem["rss_bytes"]))
+        m2.metric("Sessions", mem["sessions"])
+        m1.metric("Frames in memory", mb(mem["held_bytes"] + mem["running_bytes"]))
+        m2.metric("Spilled to disk", mb(mem["spilled_bytes"]))
+        m1.metric("Result cache", mb(shared_cache().stats()["bytes"]))
+        st.caption(f"Budgets: {mb(spill.SESSION_BUDGET)} per session, {mb(spill.SERVER_BUDGET)} per server. "
+                   f"{mem['spills']} frames spilled, {mem['loads']} reloaded since start.")
+
+st.session_state.frames.checkin(st.session_state, SESSION_FRAMES, derived=("results_index", "timeline"))
@@ -0,0 +1,224 @@
+"""Local HTTP scheduling service over the vectorized engine (stdlib asyncio + a process pool).
+
+    python scheduling_service.py --port 8765 --workers 4
+
+GET  /health                     {"ok": true}
+GET  /calendars                  {"calendars": [...]}
+GET  /calendars/<name>           {"name": ..., "holidays": ["YYYY-MM-DD", ...]}  (404 if unknown)
+POST /compute                    {"calendar": "US Federal", "as_of": "YYYY-MM-DD", "rows": <table>}
+POST /compare                    {"calendar": ..., "current": <table>, "baseline": <table>, "sparse": false}
+                                 (sparse: change list, one row per moved milestone)
+POST /replay                     {"calendar": ..., "rows": <table>, "dates": ["YYYY-MM-DD", ...]}
+
+<table> is columnar ({"Equipment": [...], "Mode": [...], ...}) or a list of records.
+/compute also takes an Arrow IPC stream body (Content-Type: application/vnd.apache.arrow.stream,
+calendar in ?calendar=, as-of in ?as_of=). "as_of" defaults to the server's current date.
+Responses are columnar JSON {"columns": [...], "data": {col: [...]}, "rows": n},
+or Arrow when the request sends Accept: application/vnd.apache.arrow.stream.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import utils.engine as engine
+import utils.holiday_providers as holiday_providers
+import utils.schedule as schedule
+
+ARROW = "application/vnd.apache.arrow.stream"
+JSON = "application/json"
+MAX_BODY = 64 * 1024 * 1024
+
+# ---- worker side (one registry + busday calendars per process) ----
+_registry = None
+_cals = {}
+
+def _init_worker(cache_dir):
+    global _registry
+    _registry = holiday_providers.HolidayRegistry(cache_dir)
+
+def _calendar(name):
+    name = name or "None"
+    if name != "None" and name not in _registry.index["regions"]:
+        raise KeyError(f"unknown calendar: {name}")
+    if name not in _cals:
+        hs = _registry.holidays(name)
+        _cals[name] = (hs, engine.busdaycal(hs))
+    return _cals[name]
+
+def decode_table(obj) -> pd.DataFrame:
+    if isinstance(obj, list):
+        df = pd.DataFrame.from_records(obj)
+    elif isinstance(obj, dict):
+        df = pd.DataFrame(obj)
+    else:
+        raise ValueError("table must be a column dict or a list of records")
+    for c in df.columns:
+        # ISO strings parse on pandas' fast path here, so the engine sees real datetimes.
+        if c.removeprefix("Base: ").removeprefix("New: ") in schedule.DATE_COLS and df[c].dtype == object:
+            df[c] = pd.to_datetime(df[c], format="ISO8601", errors="coerce")
+    return df
+
+def encode_table(df: pd.DataFrame) -> dict:
+    data = {}
+    for c in df.columns:
+        s = df[c]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            txt = np.datetime_as_string(s.to_numpy(dtype="datetime64[D]")).astype(object)
+            txt[s.isna().to_numpy()] = None
+            data[c] = txt.tolist()
+        elif pd.api.types.is_float_dtype(s):
+            data[c] = [None if v != v else (int(v) if v.is_integer() else v) for v in s.tolist()]
+        else:
+            data[c] = s.astype(object).where(s.notna(), None).tolist()
+    return {"columns": list(map(str, df.columns)), "data": data, "rows": len(df)}
+
+def _arrow_in(body):
+    import pyarrow as pa
+    return pa.ipc.open_stream(body).read_all().to_pandas()
+
+def _arrow_out(df):
+    import pyarrow as pa
+    table = pa.Table.from_pandas(df.astype({c: "string" for c in df.columns if df[c].dtype == object}),
+                                 preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as w:
+        w.write_table(table)
+    return sink.getvalue()
+
+def run_job(kind, body, content_type, accept, query):
+    """Decode -> compute -> encode, all inside the worker so only bytes cross processes."""
+    try:
+        if kind == "compute":
+            if content_type.startswith(ARROW):
+                rows, cal_name = _arrow_in(body), query.get("calendar", ["None"])[0]
+                as_of = query.get("as_of", [None])[0]
+            else:
+                req = json.loads(body or b"{}")
+                rows, cal_name = decode_table(req.get("rows", {})), req.get("calendar", "None")
+                as_of = req.get("as_of")
+            hs, cal = _calendar(cal_name)
+            out = engine.compute_all(rows, hs, cal=cal, as_of=as_of)
+        elif kind == "compare":
+            req = json.loads(body or b"{}")
+            hs, cal = _calendar(req.get("calendar", "None"))
+            compare = engine.compare_sparse if req.get("sparse") else engine.compare_to_baseline
+            out = compare(decode_table(req.get("current", {})), decode_table(req.get("baseline", {})), hs, cal=cal)
+        elif kind == "replay":
+            req = json.loads(body or b"{}")
+            hs, cal = _calendar(req.get("calendar", "None"))
+            dates = req.get("dates") or []
+            res = engine.compute_all(decode_table(req.get("rows", {})), hs, cal=cal, as_of=min(dates, default=None))
+            out = engine.replay(res, hs, dates, cal=cal)
+        else:
+            return 404, JSON, json.dumps({"error": f"unknown endpoint: {kind}"}).encode()
+    except (KeyError, ValueError) as e:
+        return 400, JSON, json.dumps({"error": str(e)}).encode()
+    if accept.startswith(ARROW):
+        return 200, ARROW, _arrow_out(out)
+    return 200, JSON, json.dumps(encode_table(out), separators=(",", ":"), default=str).encode()
+
+# ---- server side ----
+class Service:
+    def __init__(self, workers, cache_dir=holiday_providers.CACHE_DIR):
+        self.registry = holiday_providers.open_registry(cache_dir)  # refresh once, before forking
+        if workers > 0:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_dir,))
+        else:
+            _init_worker(cache_dir)
+            self.pool = None
+
+    async def dispatch(self, method, path, headers, body):
+        url = urlsplit(path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+        if method == "GET" and parts == ["health"]:
+            return 200, JSON, b'{"ok":true}'
+        if method == "GET" and parts[:1] == ["calendars"]:
+            if len(parts) == 1:
+                return 200, JSON, json.dumps({"calendars": self.registry.regions()}).encode()
+            if len(parts) > 2 or parts[1] not in self.registry.regions():
+                return 404, JSON, json.dumps({"error": f"unknown calendar: {'/'.join(parts[1:])}"}).encode()
+            days = self.registry.array(parts[1])
+            return 200, JSON, json.dumps({"name": parts[1], "holidays": [str(d) for d in days]}).encode()
+        if method == "POST" and len(parts) == 1:
+            args = (parts[0], body, headers.get("content-type", JSON), headers.get("accept", JSON),
+                    parse_qs(url.query))
+            if self.pool is None:
+                return run_job(*args)
+            return await asyncio.get_running_loop().run_in_executor(self.pool, run_job, *args)
+        return 404, JSON, b'{"error":"not found"}'
+
+    @staticmethod
+    async def _reply(writer, status, ctype, payload, keep):
+        writer.write(f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                     f"Content-Type: {ctype}\r\nContent-Length: {len(payload)}\r\n"
+                     f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n".encode("latin-1") + payload)
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, path, _ = line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    await self._reply(writer, 400, JSON, b'{"error":"malformed request line"}', keep=False)
+                    break
+                headers = {}
+                while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                try:
+                    size = int(headers.get("content-length", 0))
+                    if size < 0:
+                        raise ValueError(size)
+                except ValueError:
+                    await self._reply(writer, 400, JSON, b'{"error":"bad Content-Length"}', keep=False)
+                    break
+                if size > MAX_BODY:
+                    status, ctype, payload = 413, JSON, b'{"error":"payload too large"}'
+                else:
+                    body = await reader.readexactly(size) if size else b""
+                    try:
+                        status, ctype, payload = await self.dispatch(method, path, headers, body)
+                    except Exception as e:  # keep serving; report the failure to the caller
+                        status, ctype, payload = 500, JSON, json.dumps({"error": repr(e)}).encode()
+                keep = headers.get("connection", "").lower() != "close" and size <= MAX_BODY
+                await self._reply(writer, status, ctype, payload, keep)
+                if not keep:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"scheduling service on http://{host}:{port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local scheduling service")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="process-pool size for compute batches (0 = run in the event loop)")
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(Service(args.workers).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
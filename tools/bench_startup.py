@@ -0,0 +1,88 @@
+"""Cold-start / warm-rerun timing for the Streamlit app, checked against perf/startup_budget.json.
+
+    python tools/bench_startup.py            # measure, append to perf/startup_history.csv, check budget
+    python tools/bench_startup.py --no-log   # measure + check only
+
+Cold start = first script run in a fresh interpreter (imports, cached assets, holiday
+registry). Warm rerun = median of repeated reruns of the same session. Each measurement
+runs in its own subprocess so module caches from one sample never leak into the next.
+"""
+import argparse
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+BUDGET = ROOT / "perf" / "startup_budget.json"
+HISTORY = ROOT / "perf" / "startup_history.csv"
+
+_SAMPLE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t_import = time.perf_counter() - t0
+at = AppTest.from_file("Procurement_Calculator.py", default_timeout=120)
+t0 = time.perf_counter(); at.run(); cold = time.perf_counter() - t0
+assert not at.exception, at.exception
+warm = []
+for _ in range(int(sys.argv[1])):
+    t0 = time.perf_counter(); at.run(); warm.append(time.perf_counter() - t0)
+print(json.dumps({"import_s": t_import, "cold_s": cold, "warm_s": warm,
+                  "plotly_loaded": "plotly.express" in sys.modules}))
+"""
+
+def sample(reruns):
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    out = subprocess.run([sys.executable, "-c", _SAMPLE, str(reruns)], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--samples", type=int, default=3, help="fresh-process cold starts to take")
+    ap.add_argument("--reruns", type=int, default=10, help="warm reruns per sample")
+    ap.add_argument("--no-log", action="store_true", help="don't append to the history file")
+    args = ap.parse_args(argv)
+
+    runs = [sample(args.reruns) for _ in range(args.samples)]
+    cold = statistics.median(r["cold_s"] for r in runs)
+    warm = statistics.median(w for r in runs for w in r["warm_s"])
+    row = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rev": git_rev(),
+        "cold_start_s": round(cold, 4),
+        "warm_rerun_s": round(warm, 4),
+        "plotly_express_on_start": any(r["plotly_loaded"] for r in runs),
+    }
+    print(json.dumps(row, indent=1))
+
+    if not args.no_log:
+        new = not HISTORY.exists()
+        with HISTORY.open("a", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(row))
+            if new:
+                w.writeheader()
+            w.writerow(row)
+
+    budget = json.loads(BUDGET.read_text(encoding="utf-8"))
+    over = [k for k in ("cold_start_s", "warm_rerun_s") if row[k] > budget[k]]
+    if row["plotly_express_on_start"] and not budget.get("plotly_express_on_start", False):
+        over.append("plotly_express_on_start")
+    for k in over:
+        print(f"OVER BUDGET: {k} = {row[k]} (budget {budget.get(k)})", file=sys.stderr)
+    return 1 if over else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
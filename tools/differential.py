@@ -0,0 +1,402 @@
+"""Differential test: the vectorized engine (utils/engine.py) against the row-wise
+reference (utils/schedule.py) on randomized edge-case tables, for every holiday preset.
+
+    python tools/differential.py                                 # 1,000,000 rows over all presets
+    python tools/differential.py --rows 5000000 --workers 8 --seed 7
+    python tools/differential.py --preset "US Federal" --rows 20000 --out diff/
+
+The row-wise engine is the oracle. Rows are generated to sit on its quirks: forward
+rolls off weekends / holidays, Backward POs around the as-of cap, buffer 0 vs > 0,
+float right at the 22-day critical threshold, blank / 0 / junk manufacturing with and
+without a committed delivery, negative and fractional durations, junk dates and modes.
+Checks per chunk: compute_all (both engines, identical frames), compare_to_baseline,
+solve_latest's latest PO (check_latest), progress actuals and replay (check_actuals),
+the input-issues list (check_issues) and the shared workday table against numpy's busday functions.
+
+Exits 1 on any mismatch after printing the first differing cells; with --out the
+failing input chunks are written as CSV so a single chunk can be replayed.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import utils.engine as engine  # noqa: E402
+import utils.holiday_providers as holiday_providers  # noqa: E402
+import utils.schedule as schedule  # noqa: E402
+import utils.validation as validation  # noqa: E402
+import utils.workdays as workdays  # noqa: E402
+
+CHUNK_ROWS = 5_000
+EXAMPLES = 3          # differing cells printed per (check, column)
+_registry = None      # one per worker process
+
+def _holidays(preset):
+    global _registry
+    if _registry is None:
+        _registry = holiday_providers.open_registry()
+    return _registry.holidays(preset)
+
+# ---------------- generators ----------------
+def _dates(rng, n, as_of, hol, p_nat=0.15, p_junk=0.03):
+    """Mostly near the as-of date, plus holidays ±1, weekends, far-off years, blanks and junk."""
+    pick = rng.random(n)
+    near = as_of + rng.integers(-120, 500, n)
+    d = near.copy()
+    if len(hol):
+        on_hol = pick < 0.15
+        d[on_hol] = rng.choice(hol, on_hol.sum()) + rng.integers(-1, 2, on_hol.sum())
+    wkend = (pick >= 0.15) & (pick < 0.25)
+    d[wkend] = np.busday_offset(near[wkend], 0, roll="forward", weekmask="0000011")
+    far = (pick >= 0.25) & (pick < 0.28)
+    d[far] = np.datetime64("1999-12-31") + rng.integers(0, 36_500, far.sum())
+    out = pd.Series(pd.to_datetime(d.astype("datetime64[ns]")), dtype="object")
+    out[rng.random(n) < p_nat] = None
+    junk = rng.random(n) < p_junk
+    out[junk] = rng.choice(["", " ", "n/a", "2025-13-45", "TBD"], junk.sum())
+    return out
+
+def _days(rng, n, typical):
+    """Typical values plus 0, negatives, fractions, numeric strings, blanks and junk."""
+    v = rng.integers(0, typical * 3, n).astype(object)
+    r = rng.random(n)
+    edges = [(0.06, None), (0.10, 0), (0.13, -1), (0.15, -typical), (0.18, 7.9), (0.20, 0.4),
+             (0.22, "12"), (0.24, "abc"), (0.25, ""), (0.26, np.nan), (0.27, 10_000)]
+    lo = 0.0
+    for hi, val in edges:
+        sel = (r >= lo) & (r < hi)
+        for i in np.flatnonzero(sel):
+            v[i] = val
+        lo = hi
+    return v
+
+def _numeric(v, default):
+    x = pd.to_numeric(pd.Series(v), errors="coerce").to_numpy(dtype="float64")
+    return np.where(np.isfinite(x), np.trunc(np.nan_to_num(x)), default).astype(np.int64)
+
+def make_table(rng, n, as_of, holidays, links=False):
+    hol = np.array(sorted(holidays), dtype="datetime64[D]") if holidays else np.array([], dtype="datetime64[D]")
+    df = pd.DataFrame({
+        "Equipment": [f"E{i}" for i in range(n)],
+        "Mode": rng.choice(["Forward", "Backward", "", None, "forward", "x"], n,
+                           p=[.44, .44, .04, .03, .02, .03]),
+        "ROJ": _dates(rng, n, as_of, hol),
+        "PO Execution": _dates(rng, n, as_of, hol),
+        "Submittal (days)": _days(rng, n, 15),
+        "Manufacturing (days)": _days(rng, n, 60),
+        "Shipping (days)": _days(rng, n, 15),
+        "Buffer (days)": _days(rng, n, 20),
+        "Delivery Date (committed)": _dates(rng, n, as_of, hol, p_nat=0.7),
+    })
+    # A slice of Backward rows whose required PO lands right around the float-22 threshold.
+    cal = workdays.table(holidays)
+    edge = np.flatnonzero(rng.random(n) < 0.15)
+    chain = (_numeric(df["Submittal (days)"].iloc[edge], schedule.DEFAULT_SUBMITTAL_DAYS)
+             + _numeric(df["Manufacturing (days)"].iloc[edge], 0)
+             + _numeric(df["Shipping (days)"].iloc[edge], schedule.DEFAULT_SHIPPING_DAYS)
+             + np.maximum(_numeric(df["Buffer (days)"].iloc[edge], schedule.DEFAULT_BUFFER_DAYS), 0))
+    target = chain + 22 + rng.integers(-3, 4, len(edge))
+    roj = cal.offset(np.full(len(edge), as_of), np.clip(target, -50_000, 50_000), "forward")
+    df.loc[edge, "Mode"] = "Backward"
+    df.loc[edge, "ROJ"] = pd.Series(pd.to_datetime(roj.astype("datetime64[ns]")), index=edge).astype(object)
+    if links:
+        # Acyclic finish-to-start links to earlier rows, some with lags, some to unknown names.
+        src = np.flatnonzero(rng.random(n) < 0.2)
+        src = src[src > 0]
+        pred = np.full(n, "", dtype=object)
+        for i in src:
+            j = rng.integers(0, i)
+            lag = rng.integers(-3, 10)
+            pred[i] = f"E{j}{lag:+d}" if lag else f"E{j}"
+            if rng.random() < 0.1:
+                pred[i] += ", Nope"
+        df.insert(1, "Predecessors", pred)
+    return df
+
+def add_actuals(rng, df, as_of):
+    """Progress actuals on ~35% of rows: 1-3 phases reported, in order mostly, sometimes
+    only a later one, out of order, on weekends, or junk."""
+    n = len(df)
+    out = df.copy()
+    sa = as_of + rng.integers(-200, 120, n)
+    ma = sa + rng.integers(0, 150, n)
+    sh = ma + rng.integers(0, 40, n)
+    level = np.where(rng.random(n) < 0.35, rng.integers(1, 4, n), 0)
+    cols = []
+    for k, d in enumerate((sa, ma, sh)):
+        have = (level > k) & ~((k < level - 1) & (rng.random(n) < 0.2))  # skip an earlier phase now and then
+        col = pd.Series(pd.to_datetime(d.astype("datetime64[ns]")), dtype="object")
+        col[~have] = None
+        junk = have & (rng.random(n) < 0.02)
+        junk[np.argmax(have)] = False  # a leading junk string would stop pandas inferring the format
+        col[junk] = rng.choice(["TBD", "2025-02-30"], junk.sum())
+        cols.append(col)
+    swap = rng.random(n) < 0.04
+    cols[0][swap], cols[1][swap] = cols[1][swap].to_numpy(), cols[0][swap].to_numpy()
+    for c, col in zip(schedule.ACTUAL_COLS, cols):
+        out[c] = col
+    return out
+
+def perturb(rng, df):
+    """Same equipment, some durations / dates moved: a 'current' table to compare to a baseline."""
+    out = df.copy()
+    rows = np.flatnonzero(rng.random(len(out)) < 0.3)
+    for c in ("Submittal (days)", "Manufacturing (days)", "Shipping (days)"):
+        out.loc[rows, c] = _days(rng, len(rows), 20)
+    drop = rng.random(len(out)) < 0.05
+    return out[~drop].reset_index(drop=True)
+
+# ---------------- comparison ----------------
+def _same(a: pd.Series, b: pd.Series) -> np.ndarray:
+    """Cell-wise equality with missing == missing; dates compared as timestamps, numbers as floats."""
+    a, b = a.reset_index(drop=True), b.reset_index(drop=True)
+    if pd.api.types.is_datetime64_any_dtype(a) or pd.api.types.is_datetime64_any_dtype(b):
+        x, y = pd.to_datetime(a, errors="coerce"), pd.to_datetime(b, errors="coerce")
+    elif pd.api.types.is_numeric_dtype(a) or pd.api.types.is_numeric_dtype(b):
+        x, y = pd.to_numeric(a, errors="coerce"), pd.to_numeric(b, errors="coerce")
+    else:
+        x, y = a.astype(object), b.astype(object)
+    eq = (x == y).astype("boolean").fillna(False).to_numpy(dtype=bool)
+    return eq | (x.isna() & y.isna()).to_numpy(dtype=bool)
+
+def diff_frames(check, ref: pd.DataFrame, fast: pd.DataFrame):
+    """List of (check, column, n_bad, examples) differences between two result frames."""
+    if list(ref.columns) != list(fast.columns):
+        return [(check, "<columns>", 1, [(list(ref.columns), list(fast.columns))])]
+    if len(ref) != len(fast):
+        return [(check, "<rows>", abs(len(ref) - len(fast)), [(len(ref), len(fast))])]
+    out = []
+    for c in ref.columns:
+        bad = np.flatnonzero(~_same(ref[c], fast[c]))
+        if bad.size:
+            out.append((check, c, int(bad.size),
+                        [(int(i), ref[c].iloc[i], fast[c].iloc[i]) for i in bad[:EXAMPLES]]))
+    return out
+
+def _col_days(df, c):
+    return pd.to_datetime(df[c], errors="coerce").to_numpy(dtype="datetime64[D]")
+
+def _offset(d, n, roll, cal):
+    out = np.full(len(d), np.datetime64("NaT"), dtype="datetime64[D]")
+    ok = ~np.isnat(d)
+    out[ok] = np.busday_offset(d[ok], n[ok], roll=roll, busdaycal=cal)
+    return out
+
+def check_actuals(df, holidays, as_of_ts, cal):
+    """Progress actuals, which the row-wise engine doesn't read. Rows without actuals must
+    match it exactly; rows with actuals are checked against the anchoring rules, rebuilt
+    here on numpy's busday functions:
+
+    SE = Submittal Actual End, else the plan (Forward: PO + sub; Backward: walked back
+    from the earliest actual); ME = Manufacturing Actual End, else Shipped, else SE + mfg;
+    Shipping Start = Shipped, else ME; Shipping End / delivery follow from there. Backward
+    PO = SE - sub, never capped at the as-of date; no PO float, never "PO is critical".
+    With links, shipped rows are never moved and started rows are never pulled earlier.
+    """
+    problems = []
+    act_df = df.drop(columns=["Predecessors"], errors="ignore")
+    ref, ref_err = _run(lambda: schedule.compute_all(act_df.drop(columns=schedule.ACTUAL_COLS), holidays, as_of=as_of_ts))
+    fast, fast_err = _run(lambda: engine.compute_all(act_df, holidays, as_of=as_of_ts))
+    if ref_err or fast_err:
+        return [("actuals", "<exception>", 1, [(ref_err, fast_err)])] if ref_err != fast_err else []
+    started = schedule.actual_masks(fast)[0]
+    problems += diff_frames("actuals/unstarted", ref[~started], fast.loc[~started, ref.columns])
+
+    f = fast[started].reset_index(drop=True)
+    sa, ma, sh = (_col_days(f, c) for c in schedule.ACTUAL_COLS)
+    po, roj = _col_days(f, "PO Execution"), _col_days(f, "ROJ")
+    sub, mfg, ship, buf = (f[c].to_numpy(dtype=np.int64) for c in
+                           ("Submittal (days)", "Manufacturing (days)", "Shipping (days)", "Buffer (days)"))
+    bwd = f["Mode"].eq("Backward").to_numpy(dtype=bool)
+    first = np.where(~np.isnat(sa), sa, np.where(~np.isnat(ma), ma, sh))
+    raw_po = pd.to_datetime(act_df.loc[schedule.actual_masks(act_df)[0] & (
+        act_df["Mode"].eq("Forward") | act_df["Mode"].eq("Backward")).to_numpy(), "PO Execution"],
+        errors="coerce").to_numpy(dtype="datetime64[D]")
+    se = np.where(~np.isnat(sa), sa, np.where(bwd, _offset(first, -mfg, "backward", cal),
+                                              _offset(raw_po, sub, "forward", cal)))
+    me = np.where(~np.isnat(ma), ma, np.where(~np.isnat(sh), sh, _offset(se, mfg, "forward", cal)))
+    ss = np.where(~np.isnat(sh), sh, me)
+    she = _offset(ss, ship, "forward", cal)
+    deliv = np.where(buf > 0, _offset(she, buf, "forward", cal), she)
+    exp_po = np.where(bwd, _offset(se, -sub, "backward", cal), raw_po)
+    has_roj = ~np.isnat(roj)
+    delta = np.zeros(len(f), dtype=np.int64)
+    delta[has_roj] = np.busday_count(roj[has_roj], deliv[has_roj], busdaycal=cal)
+    ts = lambda a: pd.Series(a.astype("datetime64[ns]"))  # noqa: E731
+    expected = pd.DataFrame({
+        "PO Execution": ts(exp_po),
+        "Submittal End": ts(se), "Manufacturing Start": ts(se), "Manufacturing End": ts(me),
+        "Shipping Start": ts(ss), "Shipping End": ts(she), "Buffer Start": ts(she), "Delivery Date": ts(deliv),
+        "Status": np.where(has_roj, np.where(delta > 0, "⛔Late vs ROJ", "✓ Meets/early vs ROJ"), None),
+        "Delta/Float (days)": np.where(has_roj, delta, np.nan),
+    })
+    problems += diff_frames("actuals/started", expected, f[expected.columns])
+
+    # Links: shipped rows stay put, started rows are never pulled earlier.
+    if "Predecessors" in df.columns:
+        linked, err = _run(lambda: engine.compute_all(df, holidays, as_of=as_of_ts))
+        if err is None:
+            started, shipped = schedule.actual_masks(linked)
+            for c in ("Submittal End", "Manufacturing End", "Shipping Start", "Delivery Date"):
+                a, b = _col_days(linked, c), _col_days(fast, c)
+                moved = (a != b) & ~(np.isnat(a) & np.isnat(b))
+                bad = np.flatnonzero((shipped & moved) | (started & (a < b)))
+                if bad.size:
+                    problems.append(("actuals/links", c, int(bad.size),
+                                     [(int(i), str(b[i]), str(a[i])) for i in bad[:EXAMPLES]]))
+
+    # replay at later dates == a full recompute as of each date.
+    dates = [as_of_ts + pd.Timedelta(days=int(k)) for k in (0, 9, 40)]
+    rep = engine.replay(fast, holidays, dates)
+    for d in dates:
+        again = engine.compute_all(act_df, holidays, as_of=d)
+        problems += diff_frames(f"replay@{d:%Y-%m-%d}", again[["Status", "PO Execution"]],
+                                rep.loc[rep["As Of"].eq(d), ["Status", "PO Execution"]])
+    return problems
+
+def check_latest(ref, holidays, as_of_ts, cal):
+    """solve_latest against compute_all: a Forward PO on Latest PO Execution meets ROJ and
+    one business day later is late (rows with non-negative durations, ROJ on any day)."""
+    latest = engine.solve_latest(ref, holidays, as_of=as_of_ts)
+    l_po = _col_days(latest, "Latest PO Execution")
+    days = ref[["Submittal (days)", "Manufacturing (days)", "Shipping (days)", "Buffer (days)"]]
+    keep = ~np.isnat(l_po) & (days.to_numpy(dtype=np.int64) >= 0).all(axis=1)
+    if not keep.any():
+        return []
+    base = pd.DataFrame({
+        "Equipment": ref["Equipment"].to_numpy()[keep],
+        "Mode": "Forward",
+        "ROJ": ref["ROJ"].to_numpy()[keep],
+        **{c: days[c].to_numpy()[keep] for c in days.columns},
+    })
+    problems = []
+    for shift, want in ((0, "✓ Meets/early vs ROJ"), (1, "⛔Late vs ROJ")):
+        po = np.busday_offset(l_po[keep], shift, roll="forward", busdaycal=cal)
+        got = engine.compute_all(base.assign(**{"PO Execution": po.astype("datetime64[ns]")}),
+                                 holidays, as_of=as_of_ts)["Status"]
+        bad = np.flatnonzero(got.to_numpy() != want)
+        if bad.size:
+            problems.append((f"solve_latest/+{shift}bd", "Status", int(bad.size),
+                             [(str(base["ROJ"].iloc[i])[:10], str(po[i]), got.iloc[i]) for i in bad[:EXAMPLES]]))
+    return problems
+
+def check_issues(df):
+    """validation.issues: rows with a blank Mode are never listed, even with junk dates,
+    while the same junk on a Forward row is. The first two rows are forced to both cases."""
+    t = df.copy()
+    t["PO Execution"] = t["PO Execution"].astype(object)
+    t.loc[t.index[:2], "Mode"] = ["", "Forward"]
+    t.loc[t.index[:2], "PO Execution"] = "garbage"
+    issues = validation.validate(t).issues()
+    mode = t["Mode"].astype(object).reset_index(drop=True)
+    blank = (mode.isna() | mode.astype(str).str.strip().eq("")).to_numpy()
+    listed = issues["Row"].to_numpy() - 1
+    problems = []
+    bad = np.unique(listed[blank[listed]])
+    if bad.size:
+        problems.append(("issues/blank Mode", "Row", int(bad.size), [int(i) + 1 for i in bad[:EXAMPLES]]))
+    po_msg = validation.MESSAGES[validation.BAD_PO]
+    if not ((issues["Row"] == 2) & (issues["Issue"] == po_msg)).any():
+        problems.append(("issues/junk PO", "Row", 1, [2]))
+    return problems
+
+def _run(fn):
+    try:
+        return fn(), None
+    except Exception as e:  # both engines must fail the same way (e.g. a predecessor cycle)
+        return None, type(e).__name__
+
+def check_chunk(task):
+    preset, seed, n = task
+    rng = np.random.default_rng(seed)
+    holidays = _holidays(preset)
+    as_of = np.datetime64("2024-01-01") + rng.integers(0, 1_500)
+    as_of_ts = pd.Timestamp(as_of)
+    df = make_table(rng, n, as_of, holidays, links=rng.random() < 0.3)
+    problems = []
+
+    ref, ref_err = _run(lambda: schedule.compute_all(df, holidays, as_of=as_of_ts))
+    fast, fast_err = _run(lambda: engine.compute_all(df, holidays, as_of=as_of_ts))
+    if ref_err or fast_err:
+        if ref_err != fast_err:
+            problems.append(("compute_all", "<exception>", 1, [(ref_err, fast_err)]))
+    else:
+        problems += diff_frames("compute_all", ref, fast)
+        problems += check_latest(ref, holidays, as_of_ts, np.busdaycalendar(holidays=sorted(holidays)))
+
+        cur_df = perturb(rng, df)
+        if "Predecessors" in cur_df.columns:
+            cur_df = cur_df.drop(columns=["Predecessors"])
+        cur, err = _run(lambda: schedule.compute_all(cur_df, holidays, as_of=as_of_ts))
+        if err is None:
+            problems += diff_frames("compare_to_baseline",
+                                    schedule.compare_to_baseline(cur, ref, holidays),
+                                    engine.compare_to_baseline(cur, ref, holidays))
+
+    cal = np.busdaycalendar(holidays=sorted(holidays))
+    problems += check_actuals(add_actuals(rng, df, as_of), holidays, as_of_ts, cal)
+    problems += check_issues(df)
+
+    # The shared workday table both engines now sit on, against numpy itself.
+    table = workdays.table(holidays)
+    d = as_of + rng.integers(-3_000, 3_000, n)
+    e = as_of + rng.integers(-3_000, 3_000, n)
+    k = rng.integers(-800, 800, n)
+    for roll in ("forward", "backward"):
+        bad = np.flatnonzero(table.offset(d, k, roll) != np.busday_offset(d, k, roll=roll, busdaycal=cal))
+        if bad.size:
+            problems.append((f"workdays.offset/{roll}", "-", int(bad.size), [(str(d[i]), int(k[i])) for i in bad[:EXAMPLES]]))
+    bad = np.flatnonzero(table.count(d, e) != np.busday_count(d, e, busdaycal=cal))
+    if bad.size:
+        problems.append(("workdays.count", "-", int(bad.size), [(str(d[i]), str(e[i])) for i in bad[:EXAMPLES]]))
+
+    return preset, seed, n, problems, (df if problems else None)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--rows", type=int, default=1_000_000, help="total rows across all presets")
+    ap.add_argument("--chunk", type=int, default=CHUNK_ROWS)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--preset", action="append", help="limit to these presets (repeatable)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", type=Path, help="write failing input chunks here as CSV")
+    args = ap.parse_args(argv)
+
+    presets = args.preset or holiday_providers.open_registry().regions()
+    n_chunks = max(1, -(-args.rows // args.chunk))
+    tasks = [(presets[i % len(presets)], args.seed * 1_000_003 + i, args.chunk) for i in range(n_chunks)]
+    t0 = time.perf_counter()
+    mismatches = rows = 0
+    pool = ProcessPoolExecutor(args.workers) if args.workers > 1 else None
+    try:
+        results = pool.map(check_chunk, tasks) if pool else map(check_chunk, tasks)
+        for done, (preset, seed, n, problems, failing) in enumerate(results, 1):
+            rows += n
+            for check, col, count, examples in problems:
+                mismatches += count
+                print(f"MISMATCH [{preset}] seed={seed} {check} {col}: {count} cell(s)")
+                for ex in examples:
+                    print(f"    {ex}")
+            if failing is not None and args.out:
+                args.out.mkdir(parents=True, exist_ok=True)
+                failing.to_csv(args.out / f"chunk_{seed}.csv", index=False)
+            if done % max(1, n_chunks // 20) == 0 or done == n_chunks:
+                print(f"{done}/{n_chunks} chunks, {rows:,} rows, {mismatches} mismatches, "
+                      f"{time.perf_counter() - t0:.0f}s", flush=True)
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+    print(f"{'OK' if not mismatches else 'FAIL'}: {rows:,} rows over {len(presets)} preset(s), "
+          f"{mismatches} mismatching cell(s)")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
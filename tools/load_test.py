@@ -0,0 +1,401 @@
+"""Multi-session load test for the Streamlit app, driven over the browser's websocket protocol.
+
+    python tools/load_test.py                                # launch the app, ramp 1,4,8,16 sessions
+    python tools/load_test.py --sessions 1,10,25 --rows 2000 --iterations 3
+    python tools/load_test.py --url http://localhost:8501 --pid 1234   # an already running server
+    python tools/load_test.py --no-log --out load.json
+
+Each simulated planner opens its own project ("Load 001", ...), then repeats: edit grid cells
+and Calculate, Lock Baseline, switch the View to Compare, switch back and download the
+results CSV. An action is timed from the message the browser would send to the server's
+script_finished (plus the CSV fetch), so it is the latency a planner sees. Per concurrency
+level the report gives latency percentiles per action, server CPU and RSS; one summary row
+per level is appended to perf/load_history.csv.
+
+AppTest can't run sessions concurrently (every run swaps a process-global Runtime), so this
+talks to a real server instead. The launched server gets a throwaway workspace, seeded with
+one project per session. Tables stay below utils.jobs.BACKGROUND_ROWS: larger ones finish on a
+timer-driven fragment this client doesn't poll.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import utils.jobs as jobs  # noqa: E402
+import utils.project_store as project_store  # noqa: E402
+
+HISTORY = ROOT / "perf" / "load_history.csv"
+ACTIONS = ["open", "calculate", "lock_baseline", "compare", "download_csv"]
+EQUIPMENT = ["Generator", "MV Switchgear", "UPS Board", "Air Cooled Chiller", "Padmount Transformer",
+             "Main Switchboard", "Power Distribution Unit", "Static Transfer Switch", "UPS Battery Cabinet"]
+
+# ---------------- workspace + server ----------------
+def make_table(rows, seed) -> pd.DataFrame:
+    """An editor table shaped like a real project: both modes, some links, committed dates, costs."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2026-01-05")
+    roj = start + rng.integers(120, 600, rows).astype("timedelta64[D]")
+    po = start + rng.integers(0, 90, rows).astype("timedelta64[D]")
+    backward = rng.random(rows) < 0.5
+    names = [f"{EQUIPMENT[i % len(EQUIPMENT)]} {i // len(EQUIPMENT) + 1}" for i in range(rows)]
+    preds = [f"{names[i - 1]}+5" if i and rng.random() < 0.1 else "" for i in range(rows)]
+    committed = np.where(rng.random(rows) < 0.1, roj - np.timedelta64(20, "D"), np.datetime64("NaT"))
+    return pd.DataFrame({
+        "Equipment": names,
+        "Vendor": rng.choice(["", "Acme", "Volt"], rows),
+        "Predecessors": preds,
+        "Mode": np.where(backward, "Backward", "Forward"),
+        "ROJ": pd.to_datetime(roj),
+        "PO Execution": pd.to_datetime(np.where(backward, np.datetime64("NaT"), po)),
+        "Submittal (days)": rng.integers(10, 30, rows).astype(float),
+        "Manufacturing (days)": np.where(np.isnat(committed), rng.integers(40, 200, rows), 0).astype(float),
+        "Shipping (days)": rng.integers(5, 30, rows).astype(float),
+        "Buffer (days)": rng.integers(0, 10, rows).astype(float),
+        "Delivery Date (committed)": pd.to_datetime(committed),
+        "Cost": rng.integers(10, 900, rows) * 1000.0,
+        "Payment Terms": rng.choice(["", "30/40/30", "10/80/10"], rows),
+    })
+
+def project_name(i):
+    return f"Load {i + 1:03d}"
+
+def seed_workspace(path, sessions, rows):
+    store = project_store.ProjectStore(path)
+    for i in range(sessions):
+        store.save(project_name(i), make_table(rows, i))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def launch(port, workdir):
+    env = dict(os.environ,
+               PROCUREMENT_WORKSPACE=str(Path(workdir) / "projects.sqlite"),
+               PROCUREMENT_SPILL_DIR=str(Path(workdir) / "spill"))
+    cmd = [sys.executable, "-m", "streamlit", "run", "Procurement_Calculator.py",
+           "--server.headless=true", f"--server.port={port}", "--server.address=127.0.0.1",
+           "--browser.gatherUsageStats=false", "--server.enableXsrfProtection=false",
+           "--server.fileWatcherType=none", "--server.runOnSave=false"]
+    return subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+async def wait_healthy(base_url, timeout=60):
+    from tornado.httpclient import AsyncHTTPClient
+    client, deadline = AsyncHTTPClient(), time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.fetch(f"{base_url}/_stcore/health", raise_error=False)).code == 200:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.25)
+    raise TimeoutError(f"{base_url} did not become healthy in {timeout}s")
+
+# ---------------- server process stats (Linux /proc; blank elsewhere) ----------------
+class ProcStats:
+    def __init__(self, pid):
+        self.pid = pid
+        self.tick = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def cpu_s(self):
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / self.tick   # utime + stime
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def rss(self):
+        try:
+            with open(f"/proc/{self.pid}/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, TypeError):
+            return None
+
+# ---------------- one simulated browser tab ----------------
+class Session:
+    """Keeps the widget state a browser would resend and the widgets of the last run, by (kind, label)."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.ws = None
+        self.widgets = {}      # (kind, label) -> element proto from the latest run
+        self.editor = None     # the editable grid (kept: big messages can arrive as cache refs)
+        self.state = {}        # widget id -> WidgetState resent on every rerun
+        self.edits = {"edited_rows": {}, "added_rows": [], "deleted_rows": []}
+        self.exceptions = []
+
+    async def connect(self):
+        from tornado.websocket import websocket_connect
+        url = self.base_url.replace("http", "ws", 1) + "/_stcore/stream"
+        self.ws = await websocket_connect(url, subprotocols=["streamlit"], max_message_size=1 << 30)
+
+    def close(self):
+        if self.ws is not None:
+            self.ws.close()
+
+    async def rerun(self, *changes):
+        """Send widget changes, wait for the run (and any st.rerun it triggers) to finish."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ClientState_pb2 import ClientState
+        from streamlit.proto.WidgetStates_pb2 import WidgetStates
+
+        for w in changes:
+            self.state[w.id] = w
+        msg = BackMsg(rerun_script=ClientState(query_string="", page_script_hash="",
+                                               widget_states=WidgetStates(widgets=list(self.state.values()))))
+        for w in changes:   # triggers fire once
+            if w.WhichOneof("value") == "trigger_value":
+                self.state.pop(w.id, None)
+        self.widgets = {}
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        await self._until_finished()
+
+    async def _until_finished(self):
+        from streamlit.proto.Arrow_pb2 import Arrow
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        while True:
+            raw = await self.ws.read_message()
+            if raw is None:
+                raise ConnectionError("server closed the websocket")
+            fwd = ForwardMsg.FromString(raw)
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                el = fwd.delta.new_element
+                etype = el.WhichOneof("type")
+                if etype == "exception":
+                    self.exceptions.append(el.exception.message)
+                elif etype == "arrow_data_frame" and el.arrow_data_frame.editing_mode != Arrow.READ_ONLY:
+                    if self.editor is None or self.editor.id != el.arrow_data_frame.id:
+                        self.edits = {"edited_rows": {}, "added_rows": [], "deleted_rows": []}
+                    self.editor = el.arrow_data_frame
+                elif etype in ("button", "download_button", "radio", "selectbox"):
+                    proto = getattr(el, etype)
+                    self.widgets[(etype, proto.label)] = proto
+            elif kind == "script_finished":
+                status = fwd.script_finished
+                if status == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("app failed to compile")
+                if status != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return
+
+    def widget(self, kind, label):
+        w = self.widgets.get((kind, label))
+        if w is None:
+            raise LookupError(f"no {kind} {label!r} on the page")
+        return w
+
+    @staticmethod
+    def trigger(w):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        return WidgetState(id=w.id, trigger_value=True)
+
+    @staticmethod
+    def index(w, option):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        return WidgetState(id=w.id, int_value=list(w.options).index(option))
+
+    def edit(self, rng, cells):
+        """Grid edits as the data editor reports them: {row: {column: value}}, accumulated like the browser."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        rows = self.editor_rows()
+        for r in rng.integers(0, rows, cells):
+            self.edits["edited_rows"].setdefault(str(int(r)), {})["Shipping (days)"] = int(rng.integers(5, 40))
+        return WidgetState(id=self.editor.id, string_value=json.dumps(self.edits))
+
+    def editor_rows(self):
+        import pyarrow as pa
+        try:
+            return max(1, pa.ipc.open_stream(self.editor.data.data).read_all().num_rows)
+        except Exception:  # unreadable payload: edit the first rows only
+            return 10
+
+    async def download(self, label):
+        from tornado.httpclient import AsyncHTTPClient
+        url = self.widget("download_button", label).url
+        resp = await AsyncHTTPClient().fetch(self.base_url + url)
+        return len(resp.body)
+
+# ---------------- the planner script ----------------
+async def planner(i, base_url, iterations, think, record, seed):
+    rng = np.random.default_rng(seed + i)
+    s = Session(base_url)
+
+    async def timed(action, coro):
+        t0 = time.perf_counter()
+        try:
+            await coro
+            record(action, time.perf_counter() - t0, None)
+        except Exception as e:
+            record(action, time.perf_counter() - t0, f"{type(e).__name__}: {e}")
+        if think:
+            await asyncio.sleep(random.uniform(0, think))
+
+    async def open_project():
+        await s.connect()
+        await s.rerun()
+        await s.rerun(s.index(s.widget("selectbox", "Project"), project_name(i)))
+
+    async def calculate():
+        await s.rerun(s.edit(rng, 3), s.trigger(s.widget("button", "Calculate")))
+
+    async def lock():
+        await s.rerun(s.trigger(s.widget("button", "Lock Baseline")))
+
+    async def compare():
+        if "Compare to Baseline" not in s.widget("radio", "View").options:
+            await s.rerun()   # the View radio renders above the lock button: the option shows up one run later
+        await s.rerun(s.index(s.widget("radio", "View"), "Compare to Baseline"))
+
+    async def download():
+        await s.rerun(s.index(s.widget("radio", "View"), "Current"))
+        await s.download("Download Results (CSV)")
+
+    try:
+        await timed("open", open_project())
+        for _ in range(iterations):
+            await timed("calculate", calculate())
+            await timed("lock_baseline", lock())
+            await timed("compare", compare())
+            await timed("download_csv", download())
+    finally:
+        s.close()
+    return s.exceptions
+
+async def run_level(n, base_url, stats, args):
+    samples = []
+    rss_peak = [0]
+
+    def record(action, seconds, error):
+        samples.append({"sessions": n, "action": action, "seconds": seconds, "error": error})
+
+    async def sample_rss():
+        while True:
+            rss_peak[0] = max(rss_peak[0], stats.rss() or 0) if stats else 0
+            await asyncio.sleep(0.25)
+
+    sampler = asyncio.ensure_future(sample_rss())
+    cpu0, t0 = stats.cpu_s() if stats else None, time.perf_counter()
+    exceptions = await asyncio.gather(*(planner(i, base_url, args.iterations, args.think, record, args.seed)
+                                        for i in range(n)))
+    wall = time.perf_counter() - t0
+    cpu1 = stats.cpu_s() if stats else None
+    sampler.cancel()
+    level = {
+        "sessions": n, "wall_s": wall, "actions": len(samples),
+        "errors": sum(s["error"] is not None for s in samples),
+        "app_exceptions": sum(len(e) for e in exceptions),
+        "cpu_pct": 100 * (cpu1 - cpu0) / wall if cpu0 is not None and cpu1 is not None else None,
+        "rss_peak_mb": rss_peak[0] / 2**20 if rss_peak[0] else None,
+        "rss_end_mb": (stats.rss() or 0) / 2**20 if stats else None,
+    }
+    return samples, level
+
+def summarize(samples):
+    df = pd.DataFrame(samples)
+    ok = df[df["error"].isna()]
+    table = ok.groupby(["sessions", "action"])["seconds"].describe(percentiles=[0.5, 0.9, 0.99])
+    table = table.rename(columns={"50%": "p50", "90%": "p90", "99%": "p99"})[["count", "p50", "p90", "p99", "max"]]
+    table["errors"] = df.groupby(["sessions", "action"])["error"].apply(lambda e: int(e.notna().sum()))
+    order = {a: k for k, a in enumerate(ACTIONS)}
+    return table.reset_index().sort_values(["sessions", "action"], key=lambda c: c.map(order) if c.name == "action" else c)
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+async def main_async(args):
+    levels = [int(x) for x in args.sessions.split(",")]
+    proc, workdir = None, None
+    if args.url:
+        base_url = args.url.rstrip("/")
+        stats = ProcStats(args.pid) if args.pid else None
+    else:
+        workdir = tempfile.mkdtemp(prefix="load-test-")
+        seed_workspace(Path(workdir) / "projects.sqlite", max(levels), args.rows)
+        port = free_port()
+        proc = launch(port, workdir)
+        base_url = f"http://127.0.0.1:{port}"
+        stats = ProcStats(proc.pid)
+    try:
+        await wait_healthy(base_url)
+        samples, levels_out = [], []
+        for n in levels:
+            got, level = await run_level(n, base_url, stats, args)
+            samples += got
+            levels_out.append(level)
+            print(f"{n} session(s): {level['actions']} actions in {level['wall_s']:.1f}s, "
+                  f"{level['errors']} errors", file=sys.stderr)
+        return samples, levels_out
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sessions", default="1,4,8,16", help="comma-separated concurrency levels")
+    ap.add_argument("--rows", type=int, default=500, help="equipment rows per session's project")
+    ap.add_argument("--iterations", type=int, default=3, help="calculate/lock/compare/download rounds per session")
+    ap.add_argument("--think", type=float, default=0.0, help="max random pause between actions (s)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--url", help="drive an already running server instead of launching one "
+                                  "(its workspace needs projects 'Load 001'...)")
+    ap.add_argument("--pid", type=int, help="with --url: server pid for CPU / RSS")
+    ap.add_argument("--out", help="write every sample and the level summaries as JSON")
+    ap.add_argument("--no-log", action="store_true", help="don't append to the history file")
+    args = ap.parse_args(argv)
+    if args.rows >= jobs.BACKGROUND_ROWS:
+        ap.error(f"--rows must stay below {jobs.BACKGROUND_ROWS} (larger tables compute in the background)")
+
+    samples, levels = asyncio.run(main_async(args))
+    table = summarize(samples)
+    with pd.option_context("display.width", 120, "display.float_format", "{:.3f}".format):
+        print(table.to_string(index=False))
+        print()
+        print(pd.DataFrame(levels).to_string(index=False))
+
+    if args.out:
+        Path(args.out).write_text(json.dumps({"samples": samples, "levels": levels}, indent=1), encoding="utf-8")
+    if not args.no_log:
+        new = not HISTORY.exists()
+        with HISTORY.open("a", newline="", encoding="utf-8") as f:
+            fields = ["timestamp", "rev", "rows", "sessions", "cpu_pct", "rss_peak_mb", "errors"] + \
+                     [f"{a}_p90_s" for a in ACTIONS]
+            w = csv.DictWriter(f, fieldnames=fields)
+            if new:
+                w.writeheader()
+            for level in levels:
+                p90 = table[table["sessions"] == level["sessions"]].set_index("action")["p90"]
+                w.writerow({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "rev": git_rev(), "rows": args.rows,
+                            "sessions": level["sessions"],
+                            "cpu_pct": None if level["cpu_pct"] is None else round(level["cpu_pct"], 1),
+                            "rss_peak_mb": None if level["rss_peak_mb"] is None else round(level["rss_peak_mb"], 1),
+                            "errors": level["errors"] + level["app_exceptions"],
+                            **{f"{a}_p90_s": round(float(p90[a]), 4) if a in p90 else None for a in ACTIONS}})
+    return 1 if any(level["errors"] or level["app_exceptions"] for level in levels) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
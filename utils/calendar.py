@@ -1,5 +1,7 @@
 import pandas as pd
 
+PRESETS = ["US Federal","Spain (C. Valenciana)","Netherlands","Italy","UK (England & Wales)","Mexico"]
+
 def build_for_region(name: str):
         if name == "US Federal":
             try:
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+import utils.validation as validation
+
+# ======================= Cash-flow projection =======================
+# Optional "Cost" and "Payment Terms" (deposit / progress / balance %) input columns are
+# carried onto the result rows. Each row then pays cost x terms at three milestones:
+# deposit at PO Execution, progress at Manufacturing End, balance at Delivery Date.
+# `payments` lays the n x 3 amount and date arrays out flat (no row loop), and `monthly`
+# sums any number of projects' payments, current and baseline, with one group-by.
+
+COST = "Cost"
+TERMS = "Payment Terms"
+INPUT_COLS = [COST, TERMS]
+MILESTONES = [("Deposit", "PO Execution"), ("Progress", "Manufacturing End"), ("Balance", "Delivery Date")]
+PAYMENT_COLS = ["Project", "Equipment", "Payment", "Date", "Month", "Amount"]
+
+def attach(results: pd.DataFrame, inputs: pd.DataFrame) -> pd.DataFrame:
+    """Copy the optional cost columns from the input table onto its result rows.
+
+    Results hold the scheduled input rows in input order, so rows pair up by position.
+    """
+    cols = [c for c in INPUT_COLS if c in inputs.columns]
+    if results is None or results.empty or not cols:
+        return results
+    kept = inputs.loc[validation.scheduled(inputs), cols]
+    if len(kept) != len(results):
+        return results
+    out = results.copy()
+    for c in cols:
+        out[c] = kept[c].to_numpy()
+    return out
+
+def has_costs(results: pd.DataFrame) -> bool:
+    return results is not None and COST in results.columns and \
+        pd.to_numeric(results[COST], errors="coerce").gt(0).any()
+
+def payments(results: pd.DataFrame, project: str = "") -> pd.DataFrame:
+    """One row per (result row, milestone) with a positive amount; Date / Month are NaT when unscheduled."""
+    if not has_costs(results):
+        return pd.DataFrame(columns=PAYMENT_COLS)
+    n = len(results)
+    cost = pd.to_numeric(results[COST], errors="coerce").to_numpy(dtype="float64")
+    cost = np.where(np.isfinite(cost) & (cost > 0), cost, 0.0)
+    frac, _ = validation.payment_terms(results[TERMS] if TERMS in results.columns else [""] * n)
+    amount = (cost[:, None] * frac).ravel()
+    dates = np.column_stack([
+        pd.to_datetime(results[c], errors="coerce").to_numpy(dtype="datetime64[D]") if c in results.columns
+        else np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+        for _, c in MILESTONES
+    ]).ravel()
+    keep = np.flatnonzero(amount > 0)
+    dates = dates[keep]
+    return pd.DataFrame({
+        "Project": pd.Categorical([project] * len(keep)),
+        "Equipment": results["Equipment"].to_numpy()[keep // 3],
+        "Payment": pd.Categorical.from_codes(keep % 3, [p for p, _ in MILESTONES]),
+        "Date": dates.astype("datetime64[ns]"),
+        "Month": dates.astype("datetime64[M]").astype("datetime64[ns]"),
+        "Amount": amount[keep],
+    })
+
+def monthly(current: pd.DataFrame, baseline: pd.DataFrame = None) -> pd.DataFrame:
+    """Cash out per (Project, Month): Current, Cumulative and, with a baseline, Baseline and Delta.
+
+    Both inputs are `payments` frames (any number of projects concatenated). Unscheduled
+    amounts land on a NaT month, which sorts last and has no Cumulative.
+    """
+    cols = ["Project", "Month", "Current", "Cumulative"] + (["Baseline", "Delta"] if baseline is not None else [])
+    parts = [p for p in (current, baseline) if p is not None]
+    series = np.repeat(np.arange(len(parts)), [len(p) for p in parts])
+    if not series.size:
+        return pd.DataFrame(columns=cols)
+    project, names = pd.factorize(np.concatenate([p["Project"].astype(str).to_numpy() for p in parts]), sort=True)
+    month = np.concatenate([p["Month"].to_numpy(dtype="datetime64[M]") for p in parts]).astype(np.int64)
+    amount = np.concatenate([p["Amount"].to_numpy(dtype="float64") for p in parts])
+
+    # One group-by over integer keys; NaT months are int64 min and sort first, moved last below.
+    flow = pd.Series(amount).groupby([project, month, series]).sum().unstack(fill_value=0.0)
+    flow = flow.reindex(columns=range(2), fill_value=0.0)
+    p_idx, m_idx = flow.index.get_level_values(0), flow.index.get_level_values(1).to_numpy()
+    nat = m_idx == np.iinfo(np.int64).min
+    out = pd.DataFrame({
+        "Project": names[p_idx],
+        "Month": pd.to_datetime(np.where(nat, 0, m_idx).astype("datetime64[M]")).where(~nat),
+        "Current": flow[0].to_numpy(),
+        "Baseline": flow[1].to_numpy(),
+    })
+    out = out.iloc[np.lexsort((nat, p_idx.to_numpy()))].reset_index(drop=True)
+    out["Cumulative"] = out["Current"].where(out["Month"].notna()).groupby(out["Project"]).cumsum()
+    out["Delta"] = out["Current"] - out["Baseline"]
+    return out[cols]
@@ -1,8 +1,11 @@
+import functools
 import streamlit as st
 import utils.colors as colors
 
-def inject_custom_css():
-  BRAND_CSS = f"""
+@functools.lru_cache(maxsize=None)
+def brand_css():
+  # Static for the life of the process; built once instead of on every rerun.
+  return f"""
     <style>
       @import url('https://fonts.googleapis.com/css2?family=Raleway:wght@300;400;500;600;700&display=swap');
       :root {{
@@ -297,4 +300,6 @@ def inject_custom_css():
       }}
     </style>
     """
-  st.markdown(BRAND_CSS, unsafe_allow_html=True)
\ No newline at end of file
+
+def inject_custom_css():
+  st.markdown(brand_css(), unsafe_allow_html=True)
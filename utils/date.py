@@ -1,4 +1,8 @@
-from datetime import date, timedelta, datetime
+from datetime import date, timedelta
+
+import pandas as pd
+
+import utils.workdays as workdays
 
 # ======================= Holiday helpers (multi-country + Easter) =======================
 def easter_date(year):
@@ -145,6 +149,12 @@ def expand_holidays(country: str, years):
 
 def add_workdays(start_date, duration_days, holidays, workdays_per_week=5):
     if start_date is None or duration_days == 0: return start_date
+    if workdays_per_week == 5:
+        # N-th business day strictly after (before) the start: one ordinal-table lookup
+        step = 1 if duration_days > 0 else -1
+        first = start_date + timedelta(days=step)
+        roll = "forward" if step > 0 else "backward"
+        return workdays.table(holidays).offset([first], [int(duration_days) - step], roll)[0].item()
     d = start_date
     step = 1 if duration_days > 0 else -1
     remaining = abs(int(duration_days))
@@ -159,10 +169,16 @@ def add_workdays(start_date, duration_days, holidays, workdays_per_week=5):
 def to_date(x):
     if not x: return None
     try: return pd.to_datetime(x).date()
-    except: return None
+    except (TypeError, ValueError, OverflowError): return None
 
 def workdays_between(d1, d2, ww=5, holidays=set()):
     if d1 is None or d2 is None: return None
+    if ww == 5:
+        # business days in (d1, d2], negative when d2 is earlier
+        t = workdays.table(holidays)
+        if d2 >= d1:
+            return int(t.count([d1 + timedelta(days=1)], [d2 + timedelta(days=1)])[0])
+        return -int(t.count([d2], [d1])[0])
     days = 0
     step = 1 if d2 >= d1 else -1
     d = d1
@@ -0,0 +1,184 @@
+import re
+import numpy as np
+import pandas as pd
+
+import utils.workdays as workdays
+
+# ======================= Predecessor links (finish-to-start + lag) =======================
+# "UPS Board+5" on the UPS Battery Cabinet row means the cabinet can't start shipping
+# until 5 business days after the UPS Board's Delivery Date. Items that would ship
+# earlier are held at the factory (Manufacturing End stays, Shipping Start moves).
+# All date math runs on workday ordinals (utils.workdays) so both CPM passes are integer array ops.
+
+_INF = np.int64(1) << 40
+
+class CycleError(ValueError):
+    def __init__(self, nodes):
+        self.nodes = list(nodes)
+        super().__init__("Predecessor links form a cycle through: " + ", ".join(map(str, self.nodes)))
+
+def parse_predecessors(text):
+    """'UPS Board+5, Generator' -> [("UPS Board", 5), ("Generator", 0)]."""
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return []
+    out = []
+    for part in str(text).replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        m = re.match(r"^(.*?)\s*([+-])\s*(\d+)$", part)
+        if m and m.group(1):
+            lag = int(m.group(3)) * (-1 if m.group(2) == "-" else 1)
+            out.append((m.group(1).strip(), lag))
+        else:
+            out.append((part, 0))
+    return out
+
+def build_links(equipment, predecessors):
+    """Resolve predecessor names to row positions -> ((src, dst, lag), unresolved names)."""
+    pos = {}
+    for i, name in enumerate(equipment):
+        pos.setdefault(str(name).strip(), i)
+    src, dst, lag, missing = [], [], [], []
+    for j, text in enumerate(predecessors):
+        for name, l in parse_predecessors(text):
+            i = pos.get(name)
+            if i is None:
+                missing.append(name)
+                continue
+            src.append(i); dst.append(j); lag.append(l)
+    links = (np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64), np.asarray(lag, dtype=np.int64))
+    return links, missing
+
+def topo_levels(n, src, dst):
+    """Kahn's algorithm, one vectorized step per level. O(V + E); raises CycleError."""
+    indeg = np.bincount(dst, minlength=n)
+    order = np.argsort(src, kind="stable")
+    out_dst = dst[order]
+    offsets = np.searchsorted(src[order], np.arange(n + 1))
+    level = np.full(n, -1, dtype=np.int64)
+    frontier = np.flatnonzero(indeg == 0)
+    lvl = 0
+    while frontier.size:
+        level[frontier] = lvl
+        counts = offsets[frontier + 1] - offsets[frontier]
+        total = int(counts.sum())
+        if total == 0:
+            break
+        idx = np.repeat(offsets[frontier] - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        targets = out_dst[idx]
+        np.subtract.at(indeg, targets, 1)
+        cand = np.unique(targets)
+        frontier = cand[indeg[cand] == 0]
+        lvl += 1
+    if (level < 0).any():
+        raise CycleError(np.flatnonzero(level < 0))
+    return level
+
+def _groups(keys, n_groups):
+    """Positions grouped by key -> list of index arrays (counting sort)."""
+    order = np.argsort(keys, kind="stable")
+    bounds = np.searchsorted(keys[order], np.arange(n_groups + 1))
+    return [order[bounds[k]:bounds[k + 1]] for k in range(n_groups)]
+
+def _to_ord(values, cal):
+    d = pd.to_datetime(pd.Series(values), errors="coerce").to_numpy(dtype="datetime64[D]")
+    o = np.zeros(len(d), dtype=np.int64)
+    ok = ~np.isnat(d)
+    o[ok] = cal.ordinals(d[ok])  # non-business days roll forward
+    return o, ok
+
+def _from_ord(ords, cal):
+    return pd.to_datetime(cal.dates(ords))
+
+def _shift(out, rows, shift, cols, cal, floor=None):
+    for c in cols:
+        if c not in out.columns or not rows.size:
+            continue
+        o, ok = _to_ord(out[c].to_numpy()[rows], cal)
+        moved = _from_ord(o + shift, cal)
+        if floor is not None:
+            moved = moved.where(moved >= floor, floor)
+        # Only the moved rows are touched; the column stays datetime64 (no object round trip).
+        vals = pd.to_datetime(out[c], errors="coerce").to_numpy(dtype="datetime64[ns]").copy()
+        vals[rows[ok]] = moved[ok].to_numpy(dtype="datetime64[ns]")
+        out[c] = vals
+
+HOLD_COLS = ["Shipping Start", "Shipping End", "Buffer Start", "Delivery Date"]
+PULL_COLS = ["Submittal End", "Manufacturing Start", "Manufacturing End"] + HOLD_COLS
+PO_COLS = ["PO Execution", "Submittal Start"]
+
+def propagate(results: pd.DataFrame, links, holidays, today, started=None, shipped=None):
+    """Apply predecessor links to a compute_all result table.
+
+    1. Late pass (ROJ-constrained): Backward rows whose successors need them
+       sooner get their whole chain pulled earlier (PO still capped at today).
+       `started` rows (progress actuals entered) are never pulled.
+    2. Early pass: rows whose predecessors land late are held before shipping.
+       `shipped` rows are never held.
+    3. Final late pass against ROJ / project finish -> total float per row.
+
+    Returns (frame with shifted dates + "Total Float (bd)" + "Critical Path", changed mask).
+    """
+    out = results.copy().reset_index(drop=True)
+    n = len(out)
+    src, dst, lag = links
+    level = topo_levels(n, src, dst)
+
+    cal = workdays.table(holidays)
+    ss, ss_ok = _to_ord(out["Shipping Start"], cal)
+    dl, dl_ok = _to_ord(out["Delivery Date"], cal)
+    roj, roj_ok = _to_ord(out["ROJ"], cal)
+    valid = ss_ok & dl_ok
+    tail = dl - ss  # ship + buffer, in business days
+
+    keep = valid[src] & valid[dst]
+    src, dst, lag = src[keep], dst[keep], lag[keep]
+    n_lvl = int(level.max()) + 1 if n else 0
+    by_src = _groups(level[src], n_lvl)
+    by_dst = _groups(level[dst], n_lvl)
+    nodes = _groups(level, n_lvl)
+
+    def late_pass(sink_finish):
+        lf = np.where(roj_ok, roj, sink_finish)
+        for lvl in range(n_lvl - 1, -1, -1):
+            e = by_src[lvl]
+            if e.size:
+                np.minimum.at(lf, src[e], lf[dst[e]] - tail[dst[e]] - lag[e])
+        return lf
+
+    # 1) pull Backward rows in to meet successors' needs
+    lf = late_pass(_INF)
+    backward = (out["Mode"].to_numpy() == "Backward") & valid
+    if started is not None:
+        backward &= ~np.asarray(started, dtype=bool)
+    pull = np.where(backward & (lf < dl), dl - lf, 0)
+    rows = np.flatnonzero(pull)
+    _shift(out, rows, -pull[rows], PULL_COLS, cal)
+    _shift(out, rows, -pull[rows], PO_COLS, cal, floor=pd.to_datetime(today))
+    ss -= pull; dl -= pull
+
+    # 2) early pass: hold successors until predecessors deliver (+ lag)
+    req = np.full(n, -_INF, dtype=np.int64)
+    hold = np.zeros(n, dtype=np.int64)
+    movable = ~np.asarray(shipped, dtype=bool) if shipped is not None else np.ones(n, dtype=bool)
+    for lvl in range(1, n_lvl):
+        e = by_dst[lvl]
+        if not e.size:
+            continue
+        np.maximum.at(req, dst[e], dl[src[e]] + lag[e])
+        v = nodes[lvl]
+        hold[v] = np.where(movable[v], np.maximum(req[v] - ss[v], 0), 0)
+        ss[v] += hold[v]; dl[v] += hold[v]
+    rows = np.flatnonzero(hold)
+    _shift(out, rows, hold[rows], HOLD_COLS, cal)
+
+    # 3) total float against ROJ, or project finish where no ROJ constrains the chain
+    finish = dl[valid].max() if valid.any() else 0
+    flt = late_pass(finish) - dl
+    out["Total Float (bd)"] = pd.array(np.where(valid, flt, 0), dtype="Int64")
+    out.loc[~valid, "Total Float (bd)"] = pd.NA
+    linked = np.zeros(n, dtype=bool)
+    linked[src] = True; linked[dst] = True
+    out["Critical Path"] = valid & linked & (flt <= 0)
+    return out, (pull != 0) | (hold != 0)
@@ -0,0 +1,414 @@
+import numpy as np
+import pandas as pd
+
+import utils.schedule as schedule
+import utils.validation as validation
+import utils.workdays as workdays
+
+# ======================= Vectorized scheduling engine =======================
+# Same rules as schedule.compute_all / compare_to_baseline, but every phase is one
+# workday-table offset / count over all rows instead of one call per cell. `cal` is
+# the calendar's shared utils.workdays table.
+
+TABLE_COLS = [
+    "Equipment","Predecessors","Mode","ROJ","PO Execution",
+    "Submittal (days)","Submittal Start","Submittal End","Submittal Actual End",
+    "Manufacturing (days)","Manufacturing Start","Manufacturing End","Manufacturing Actual End",
+    "Shipping (days)","Shipping Start","Shipped","Shipping End",
+    "Buffer (days)","Buffer Start",
+    "Status","Delta/Float (days)","Total Float (bd)","Critical Path",
+    "Delivery Date (committed)","Delivery Date",
+]
+COMPARE_FIELDS = ["PO Execution","Submittal End","Manufacturing End","Shipping End","Delivery Date","ROJ"]
+
+def busdaycal(holiday_set):
+    return workdays.table(holiday_set)
+
+def _col(df, c):
+    return df[c] if c in df.columns else pd.Series([None] * len(df), index=df.index, dtype="object")
+
+def _as_datetime(s):
+    # Already-typed columns skip to_datetime entirely (its cache probe boxes every value).
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    return pd.to_datetime(s, errors="coerce")
+
+def _norm_dates(df):
+    out = df.copy()
+    for c in schedule.DATE_COLS:
+        if c in out.columns:
+            out[c] = _as_datetime(out[c])
+    return out
+
+def to_timestamps(a):
+    """datetime64[D] values (NaT kept) -> a datetime64[ns] Series."""
+    return pd.Series(np.asarray(a, dtype="datetime64[D]").astype("datetime64[ns]"))
+
+def _dates(s):
+    """Coerced timestamps (kept for display) + their calendar-day datetime64[D] values."""
+    ts = _as_datetime(s)
+    return ts, ts.to_numpy(dtype="datetime64[D]")
+
+def _ints(s, default):
+    """Vectorized `as_int`: truncate toward zero, blanks / non-numbers -> default."""
+    x = pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64")
+    ok = np.isfinite(x)
+    return np.where(ok, np.trunc(np.where(ok, x, 0)), default).astype(np.int64), x
+
+def offset(d, n, roll, cal, mask):
+    """`cal.offset` on the rows in `mask`; NaT elsewhere (so invalid rows never reach the table)."""
+    out = np.full(len(d), np.datetime64("NaT"), dtype="datetime64[D]")
+    if mask.any():
+        out[mask] = cal.offset(d[mask], n[mask], roll)
+    return out
+
+def _count(d1, d2, cal, mask):
+    out = np.zeros(len(d1), dtype=np.int64)
+    if mask.any():
+        out[mask] = cal.count(d1[mask], d2[mask])
+    return out
+
+def _int_col(values, present):
+    """ints where present else missing; int64 dtype when nothing is missing (matches the row-wise frame)."""
+    if present.all():
+        return pd.Series(values, dtype="int64")
+    return pd.Series(np.where(present, values, np.nan), dtype="float64")
+
+def compute_all(df: pd.DataFrame, holiday_set, cal=None, as_of=None, link=True) -> pd.DataFrame:
+    if df is None or df.empty:
+        return pd.DataFrame()
+    inp = validation.validate(df)
+    if not inp.valid.any():
+        return pd.DataFrame()
+    return compute_inputs(inp, holiday_set, cal=cal, as_of=as_of, link=link)
+
+def compute_inputs(inp: validation.Inputs, holiday_set, cal=None, as_of=None, link=True) -> pd.DataFrame:
+    """Schedule already-validated inputs; rows without a usable Mode are dropped.
+
+    Rows with progress actuals keep them and are replanned forward from the latest one;
+    phases after it are recomputed from the actual. Phases before it keep the Forward
+    plan from PO, or for Backward rows are walked back from the earliest actual. Such
+    rows are ordered, so their PO is not capped at the as-of date and gets no float.
+    """
+    n = inp.n
+    fwd, bwd = inp.fwd, inp.bwd
+    po, roj, cd = inp.po, inp.roj, inp.cd
+    sub, ship, buf = inp.sub, inp.ship, inp.buf
+    cal = cal if cal is not None else busdaycal(holiday_set)
+    today_d = np.datetime64(schedule.as_of_date(as_of).date())
+
+    # Derive Manufacturing (days) from a committed delivery (Forward, blank/0 manufacturing)
+    derive = fwd & inp.cd_ok & inp.po_ok & inp.mfg_blank
+    me_c = offset(offset(cd, -buf, "backward", cal, derive), -ship, "backward", cal, derive)
+    se_c = offset(po, sub, "forward", cal, derive)
+    mfg = np.where(derive, np.maximum(_count(se_c, me_c, cal, derive), 0), inp.mfg)
+
+    f_ok, b_ok = fwd & inp.po_ok, bwd & inp.roj_ok
+    ok = f_ok | b_ok
+    # Forward chain from PO
+    f_se = offset(po, sub, "forward", cal, f_ok)
+    f_me = offset(f_se, mfg, "forward", cal, f_ok)
+    f_she = offset(f_me, ship, "forward", cal, f_ok)
+    f_be = offset(f_she, buf, "forward", cal, f_ok)
+    # Backward chain from ROJ (required PO capped at the as-of date)
+    b_she = offset(roj, -buf, "backward", cal, b_ok)
+    b_me = offset(b_she, -ship, "backward", cal, b_ok)
+    b_se = offset(b_me, -mfg, "backward", cal, b_ok)
+    b_po = offset(b_se, -sub, "backward", cal, b_ok)
+    b_po = np.where(b_ok & (b_po < today_d), today_d, b_po)
+
+    se = np.where(f_ok, f_se, b_se)
+    me = np.where(f_ok, f_me, b_me)
+    she = np.where(f_ok, f_she, b_she)
+    ss = me
+    po_out = to_timestamps(np.where(b_ok, b_po, np.datetime64("NaT")))
+    po_out = po_out.where(~f_ok, inp.po_ts)                        # Forward: PO as entered
+    po_out = po_out.where(~(bwd & ~inp.roj_ok), inp.po_ts)         # Backward w/o ROJ: echo PO
+    delivery = to_timestamps(np.where(buf > 0, np.where(f_ok, f_be, np.datetime64("NaT")), she))
+    delivery = delivery.where(~(b_ok & (buf > 0)), inp.roj_ts).where(ok)
+
+    # Progress actuals: anchor on the latest one and redo only the downstream phases.
+    act = inp.started & (fwd | bwd)
+    if act.any():
+        sa, ma, sh = inp.actuals
+        # Backward rows: the phases before the earliest actual are walked back from it.
+        back = act & bwd
+        first = np.where(~np.isnat(sa), sa, np.where(~np.isnat(ma), ma, sh))
+        se = np.where(back, offset(first, -mfg, "backward", cal, back & np.isnat(sa)), se)
+        se = np.where(act & ~np.isnat(sa), sa, se)
+        plan_me = offset(se, mfg, "forward", cal, act & np.isnat(ma) & np.isnat(sh) & ~np.isnat(se))
+        me = np.where(act, np.where(~np.isnat(ma), ma, np.where(~np.isnat(sh), sh, plan_me)), me)
+        ss = np.where(act & ~np.isnat(sh), sh, me)                 # shipped later than made: held at the factory
+        she = np.where(act, offset(ss, ship, "forward", cal, act), she)
+        a_be = offset(she, buf, "forward", cal, act)
+        delivery = delivery.where(~act, to_timestamps(np.where(buf > 0, a_be, she)))
+        po_out = po_out.where(~back, to_timestamps(offset(se, -sub, "backward", cal, back)))
+        ok = ok | act
+    sub_start = po_out.where(ok)
+    deliv_d = delivery.to_numpy(dtype="datetime64[D]")
+
+    # Status / Delta vs ROJ / float to required PO
+    has_delta = ok & inp.roj_ok
+    delta = _count(roj, deliv_d, cal, has_delta)
+    has_flt = b_ok & ~act & ~has_delta
+    flt = _count(np.full(n, today_d), b_po, cal, b_ok)
+    status = np.where(has_delta & (delta > 0), "⛔Late vs ROJ",
+             np.where(has_delta, "✓ Meets/early vs ROJ", None)).astype(object)
+    status = np.where(b_ok & ~act & (flt <= 22), "‼️PO is critical. Execute ASAP", status)
+    override = inp.status()
+    status = np.where(override != None, override, status)  # noqa: E711 (elementwise)
+    combo = np.where(has_delta, delta, flt)
+
+    def dt(a):
+        return to_timestamps(np.where(ok, a, np.datetime64("NaT")))
+
+    out = pd.DataFrame({
+        "Equipment": inp.equipment,
+        "Predecessors": inp.predecessors,
+        "Mode": np.where(fwd, "Forward", "Backward"),
+        "ROJ": inp.roj_ts,
+        "PO Execution": po_out.where(~(fwd & ~inp.po_ok)),
+        "Submittal (days)": sub,
+        "Submittal Start": sub_start, "Submittal End": dt(se),
+        "Manufacturing (days)": mfg,
+        "Manufacturing Start": dt(se), "Manufacturing End": dt(me),
+        "Shipping (days)": ship,
+        "Shipping Start": dt(ss), "Shipping End": dt(she),
+        "Buffer (days)": buf, "Buffer Start": dt(she),
+        "Status": status,
+        "Delivery Date (committed)": inp.cd_ts,
+        "Delivery Date": delivery,
+    })
+    if inp.has_actuals:
+        for c, ts in zip(schedule.ACTUAL_COLS, inp.actuals_ts):
+            out[c] = ts
+    keep = inp.valid
+    out = out[keep].reset_index(drop=True)
+    out.insert(out.columns.get_loc("Status") + 1, "Delta/Float (days)",
+               _int_col(combo[keep], (has_delta | has_flt)[keep]))
+    if link and inp.has_predecessors and schedule.has_links(out):
+        out = schedule.apply_predecessors(out, holiday_set, as_of)
+    cols = [c for c in TABLE_COLS if c in out.columns]
+    if not inp.has_predecessors:
+        cols.remove("Predecessors")
+    return out[cols]
+
+def compare_to_baseline(current: pd.DataFrame, baseline: pd.DataFrame, holiday_set, cal=None) -> pd.DataFrame:
+    """Vectorized schedule.compare_to_baseline: same merge, same columns, Δ via one busday_count per field."""
+    if current is None or current.empty or baseline is None or baseline.empty:
+        return pd.DataFrame()
+    cal = cal if cal is not None else busdaycal(holiday_set)
+    merged = pd.merge(
+        _norm_dates(baseline).add_prefix("Base: "),
+        _norm_dates(current).add_prefix("New: "),
+        left_on="Base: Equipment", right_on="New: Equipment",
+        how="outer", indicator=True
+    )
+    changed = np.zeros(len(merged), dtype=bool)
+    for c in COMPARE_FIELDS:
+        bcol, ncol = f"Base: {c}", f"New: {c}"
+        if bcol in merged.columns and ncol in merged.columns:
+            b = _as_datetime(merged[bcol]).to_numpy(dtype="datetime64[D]")
+            nw = _as_datetime(merged[ncol]).to_numpy(dtype="datetime64[D]")
+            both = ~np.isnat(b) & ~np.isnat(nw)
+            delta = _count(b, nw, cal, both)
+            merged[f"Δ {c} (bd)"] = pd.Series(np.where(both, delta, None), dtype="object").where(both, None)
+            # Row-wise flags NaN Δs as changed whenever the column has any Δ at all.
+            changed |= (both & (delta != 0)) | (~both & both.any())
+    merged["Changed?"] = changed
+    keep = [
+        "New: Equipment","Changed?",
+        "Base: Mode","New: Mode",
+        "Base: PO Execution","New: PO Execution","Δ PO Execution (bd)",
+        "Base: Submittal End","New: Submittal End","Δ Submittal End (bd)",
+        "Base: Manufacturing End","New: Manufacturing End","Δ Manufacturing End (bd)",
+        "Base: Shipping End","New: Shipping End","Δ Shipping End (bd)",
+        "Base: Delivery Date","New: Delivery Date","Δ Delivery Date (bd)",
+        "Base: ROJ","New: ROJ","Δ ROJ (bd)",
+        "Base: Status","New: Status","Base: Delta/Float (days)","New: Delta/Float (days)"
+    ]
+    keep = [c for c in keep if c in merged.columns]
+    return merged[keep].rename(columns={"New: Equipment":"Equipment"})
+
+CHANGE_COLS = ["Equipment","Change","Milestone","Old","New","Δ (bd)"]
+
+def _no_changes():
+    return pd.DataFrame({"Equipment": pd.Series(dtype=object), "Change": pd.Series(dtype=object),
+                         "Milestone": pd.Series(dtype=object), "Old": pd.Series(dtype="datetime64[ns]"),
+                         "New": pd.Series(dtype="datetime64[ns]"), "Δ (bd)": pd.Series(dtype="Int64")})
+
+def _milestones(df):
+    """Equipment + COMPARE_FIELDS as datetime64[D] arrays, plus one uint64 hash per row."""
+    cols = {c: (_as_datetime(df[c]).to_numpy(dtype="datetime64[D]") if c in df.columns
+                else np.full(len(df), np.datetime64("NaT"), dtype="datetime64[D]")) for c in COMPARE_FIELDS}
+    mat = np.column_stack([cols[c].view(np.int64) for c in COMPARE_FIELDS])
+    h = pd.util.hash_array(mat.view(f"V{mat.shape[1] * 8}").ravel())  # one hash per row vector
+    return cols, h
+
+def compare_sparse(current: pd.DataFrame, baseline: pd.DataFrame, holiday_set, cal=None) -> pd.DataFrame:
+    """Change list vs baseline: one row per (equipment, milestone) that moved.
+
+    Rows are matched on Equipment like compare_to_baseline. Each side's milestone vector
+    is hashed once, so unchanged rows drop out in a single pass over the hashes and
+    business-day deltas are only counted for the cells that actually differ. Items
+    present on one side only are listed once, as "added" / "removed".
+    """
+    if current is None or current.empty or baseline is None or baseline.empty:
+        return _no_changes()
+    cal = cal if cal is not None else busdaycal(holiday_set)
+    b_cols, b_hash = _milestones(baseline)
+    n_cols, n_hash = _milestones(current)
+    pairs = pd.merge(
+        pd.DataFrame({"Equipment": baseline["Equipment"].to_numpy(), "b": np.arange(len(baseline)), "bh": b_hash}),
+        pd.DataFrame({"Equipment": current["Equipment"].to_numpy(), "n": np.arange(len(current)), "nh": n_hash}),
+        on="Equipment", how="outer")
+    both = pairs["b"].notna() & pairs["n"].notna()
+    moved = pairs[both & (pairs["bh"] != pairs["nh"])]
+    bi, ni = moved["b"].to_numpy(dtype=np.int64), moved["n"].to_numpy(dtype=np.int64)
+
+    parts = []
+    for c in COMPARE_FIELDS:
+        old, new = b_cols[c][bi], n_cols[c][ni]
+        diff = ~((old == new) | (np.isnat(old) & np.isnat(new)))
+        if not diff.any():
+            continue
+        old, new = old[diff], new[diff]
+        ok = ~np.isnat(old) & ~np.isnat(new)
+        parts.append(pd.DataFrame({
+            "Equipment": moved["Equipment"].to_numpy()[diff], "Change": "moved", "Milestone": c,
+            "Old": to_timestamps(old), "New": to_timestamps(new),
+            "Δ (bd)": _int_col(_count(old, new, cal, ok), ok),
+            "_order": ni[diff], "_field": COMPARE_FIELDS.index(c),
+        }))
+    for side, label, col in (("n", "added", "New"), ("b", "removed", "Old")):
+        only = pairs[pairs[side].notna() & pairs["b" if side == "n" else "n"].isna()]
+        if only.empty:
+            continue
+        src = current if side == "n" else baseline
+        idx = only[side].to_numpy(dtype=np.int64)
+        d = _as_datetime(src["Delivery Date"]).to_numpy()[idx] if "Delivery Date" in src.columns \
+            else np.full(len(idx), np.datetime64("NaT"))
+        parts.append(pd.DataFrame({
+            "Equipment": only["Equipment"].to_numpy(), "Change": label, "Milestone": "Delivery Date",
+            "Old": pd.NaT, "New": pd.NaT, "Δ (bd)": pd.array([pd.NA] * len(idx), dtype="Int64"),
+            "_order": idx + (len(current) if side == "b" else 0), "_field": -1,
+        }).assign(**{col: pd.Series(d).astype("datetime64[ns]")}))
+    if not parts:
+        return _no_changes()
+    out = pd.concat(parts, ignore_index=True).sort_values(["_order", "_field"], kind="stable", ignore_index=True)
+    out["Δ (bd)"] = out["Δ (bd)"].astype("Int64")
+    return out[CHANGE_COLS]
+
+SLACK_COLS = [
+    "Equipment","Mode","ROJ","PO Execution",
+    "Latest PO Execution","Latest Submittal End","Latest Manufacturing End","Latest Shipping End",
+    "Slack to ROJ (bd)",
+    "Max Submittal (days)","Max Manufacturing (days)","Max Shipping (days)","Max Buffer (days)",
+]
+
+def solve_latest(results: pd.DataFrame, holiday_set, cal=None, as_of=None) -> pd.DataFrame:
+    """Invert each row's busday chain from ROJ: latest phase dates that still meet ROJ,
+    slack to ROJ, and the most business days each phase could take with the others fixed.
+
+    Takes a compute_all result (typed durations, derived Manufacturing included).
+    The chain starts at the entered PO for Forward rows and at today for Backward rows,
+    since that's the earliest a not-yet-placed PO can go out. busday_offset is a bijection
+    on business days, so stepping back from the latest delivery that still meets ROJ (the
+    first business day on or after it) gives the exact latest dates in one pass per phase.
+    Predecessor holds are not considered; each row is solved on its own chain.
+    """
+    if results is None or results.empty:
+        return pd.DataFrame(columns=SLACK_COLS)
+    cal = cal if cal is not None else busdaycal(holiday_set)
+    n = len(results)
+    today_d = np.datetime64(schedule.as_of_date(as_of).date())
+    roj_ts, roj = _dates(results["ROJ"])
+    po_ts, po = _dates(results["PO Execution"])
+    sub, _ = _ints(results["Submittal (days)"], schedule.DEFAULT_SUBMITTAL_DAYS)
+    mfg, _ = _ints(results["Manufacturing (days)"], 0)
+    ship, _ = _ints(results["Shipping (days)"], schedule.DEFAULT_SHIPPING_DAYS)
+    buf, _ = _ints(results["Buffer (days)"], schedule.DEFAULT_BUFFER_DAYS)
+    bwd = results["Mode"].eq("Backward").to_numpy(dtype=bool)
+    # Forward delivery is Shipping End unless buffer > 0; Backward steps back the raw buffer.
+    buf = np.where(bwd, buf, np.maximum(buf, 0))
+    start = np.where(bwd, today_d, po)
+    ok = ~np.isnat(roj) & ~np.isnat(start) & results["Delivery Date"].notna().to_numpy()
+
+    # Latest dates, walking back from the latest delivery that still meets ROJ
+    # (Status: busday_count(ROJ, delivery) <= 0, so a weekend / holiday ROJ allows the
+    # next business day); delivery = buffer end when buffer > 0.
+    l_dl = offset(roj, np.zeros(n, dtype=np.int64), "forward", cal, ok)
+    l_she = offset(l_dl, -buf, "backward", cal, ok)
+    l_me = offset(l_she, -ship, "backward", cal, ok)
+    l_se = offset(l_me, -mfg, "backward", cal, ok)
+    l_po = offset(l_se, -sub, "backward", cal, ok)
+    start_d = offset(start, np.zeros(n, dtype=np.int64), "forward", cal, ok)
+    slack = _count(start_d, l_po, cal, ok)
+
+    def stretch(days):
+        return _int_col(np.maximum(days + slack, 0), ok)
+
+    def dt(a):
+        return to_timestamps(np.where(ok, a, np.datetime64("NaT")))
+
+    return pd.DataFrame({
+        "Equipment": results["Equipment"].to_numpy(),
+        "Mode": results["Mode"].to_numpy(),
+        "ROJ": roj_ts.to_numpy(),
+        "PO Execution": po_ts.to_numpy(),
+        "Latest PO Execution": dt(l_po),
+        "Latest Submittal End": dt(l_se),
+        "Latest Manufacturing End": dt(l_me),
+        "Latest Shipping End": dt(l_she),
+        "Slack to ROJ (bd)": _int_col(slack, ok),
+        "Max Submittal (days)": stretch(sub),
+        "Max Manufacturing (days)": stretch(mfg),
+        "Max Shipping (days)": stretch(ship),
+        "Max Buffer (days)": stretch(buf),
+    })[SLACK_COLS]
+
+REPLAY_COLS = ["As Of","Equipment","Mode","PO Execution","PO Float (bd)","Status","Delta/Float (days)"]
+
+def replay(results: pd.DataFrame, holiday_set, dates, cal=None) -> pd.DataFrame:
+    """Re-evaluate a compute_all result as of each date in `dates`, in one batched pass.
+
+    Only Backward rows depend on the as-of date (not those with actuals or input errors):
+    the required PO is capped at it and goes critical when it is ≤ 22 business days away.
+    The uncapped required PO is one business-day step back from Submittal End, so every
+    (date, row) pair is a single busday_count over the broadcast arrays. Returns one row per (date, row), with
+    PO Float (bd) negative once the required PO has passed.
+    """
+    if results is None or results.empty or not len(dates):
+        return pd.DataFrame(columns=REPLAY_COLS)
+    cal = cal if cal is not None else busdaycal(holiday_set)
+    days = np.unique(pd.to_datetime(list(dates)).normalize().to_numpy(dtype="datetime64[D]"))
+    n, k = len(results), len(days)
+    _, se = _dates(results["Submittal End"])
+    sub, _ = _ints(results["Submittal (days)"], schedule.DEFAULT_SUBMITTAL_DAYS)
+    # Rows with actuals are already ordered, and input-error statuses are never recomputed.
+    computed = results["Status"].isna() | results["Status"].isin(
+        ["‼️PO is critical. Execute ASAP", "⛔Late vs ROJ", "✓ Meets/early vs ROJ"])
+    bwd = (results["Mode"].eq("Backward").to_numpy(dtype=bool) & ~np.isnat(se)
+           & ~schedule.actual_masks(results)[0] & computed.to_numpy(dtype=bool))
+    req = offset(se, -sub, "backward", cal, bwd)
+
+    at = np.repeat(days, n)
+    rows = np.tile(np.arange(n), k)
+    b = bwd[rows]
+    flt = _count(at, req[rows], cal, b)
+    delta = pd.to_numeric(results["Delta/Float (days)"], errors="coerce").to_numpy(dtype="float64")[rows]
+    status = results["Status"].to_numpy(dtype=object)[rows]
+    status = np.where(b, np.where(flt <= 22, "‼️PO is critical. Execute ASAP",
+                      np.where(delta > 0, "⛔Late vs ROJ",
+                      np.where(np.isnan(delta), None, "✓ Meets/early vs ROJ"))), status)
+    po = to_timestamps(np.where(b, np.maximum(req[rows], at), np.datetime64("NaT")))
+    po = po.where(b, results["PO Execution"].to_numpy()[rows])
+    return pd.DataFrame({
+        "As Of": to_timestamps(at),
+        "Equipment": results["Equipment"].to_numpy()[rows],
+        "Mode": results["Mode"].to_numpy()[rows],
+        "PO Execution": po,
+        "PO Float (bd)": _int_col(flt, b),
+        "Status": status,
+        "Delta/Float (days)": results["Delta/Float (days)"].to_numpy()[rows],
+    })[REPLAY_COLS]
@@ -0,0 +1,315 @@
+import numpy as np
+import pandas as pd
+
+import utils.colors as colors
+import utils.result_cache as result_cache
+import utils.workdays as workdays
+
+# ================= Gantt: bars + figure =================
+# Bars are built column-wise (one array pass per phase, no row loop). A Timeline keeps the
+# last figure per session: reruns on the same results / baseline / filter objects reuse it
+# untouched, and a new result version only rebuilds the bars of rows whose Gantt columns
+# changed (rows are keyed by a hash of those columns), then re-slices the trace arrays.
+# The serialized spec is also shared across sessions through the process-wide result
+# cache (keyed by the displayed rows), and `show` hands it to the browser as is.
+PHASES = [("Submittal","Submittal Start","Submittal End"),
+          ("Manufacturing","Manufacturing Start","Manufacturing End"),
+          ("Shipping","Shipping Start","Shipping End"),
+          ("Buffer","Buffer Start","Delivery Date")]
+MARKS = [p for p, _, _ in PHASES] + ["ROJ", "Milestone"]
+GANTT_COLS = ["Equipment", "ROJ"] + [c for _, s, e in PHASES for c in (s, e)]
+
+PHASE_COLORS = {
+    "Submittal": colors.MANO_BLUE,
+    "Manufacturing": colors.MANUFACTURING,
+    "Shipping": colors.SHIPPING,
+    "Buffer": colors.BUFFER,
+    "ROJ": colors.MANO_GREY,
+    "Milestone": colors.MANO_BLUE,
+}
+_DAY = np.timedelta64(1, "D")
+
+def _col(res, col):
+    if col not in res.columns:
+        return np.full(len(res), np.datetime64("NaT"), dtype="datetime64[ns]")
+    return pd.to_datetime(res[col], errors="coerce").to_numpy(dtype="datetime64[ns]")
+
+def _series_bars(res, series, milestones, cal=None):
+    """Bars for one series, in row order then MARKS order; "Pos" is the source row position."""
+    n = len(res)
+    pos, mark, start, finish = [], [], [], []
+    def add(ok, k, s, f):
+        pos.append(np.flatnonzero(ok)); mark.append(np.full(int(ok.sum()), k)); start.append(s[ok]); finish.append(f[ok])
+
+    has_any = np.zeros(n, dtype=bool)
+    for k, (_, s, e) in enumerate(PHASES):
+        s_val, e_val = _col(res, s), _col(res, e)
+        ok = ~np.isnat(s_val) & ~np.isnat(e_val)
+        has_any |= ok
+        add(ok, k, s_val, e_val)
+    roj = _col(res, "ROJ")
+    add(~np.isnat(roj), MARKS.index("ROJ"), roj, roj + _DAY)
+    if milestones:
+        ms = _col(res, "Delivery Date")
+        add(~has_any & np.isnat(roj) & ~np.isnat(ms), MARKS.index("Milestone"), ms, ms + _DAY)
+
+    pos, mark = np.concatenate(pos), np.concatenate(mark)
+    order = np.lexsort((mark, pos))
+    pos, mark = pos[order], mark[order]
+    out = pd.DataFrame({
+        "Series": series,
+        "Equipment": res["Equipment"].to_numpy()[pos] if n else np.array([], dtype=object),
+        "Phase": np.array(MARKS, dtype=object)[mark],
+        "Start": np.concatenate(start)[order],
+        "Finish": np.concatenate(finish)[order],
+        "Pos": pos,
+    })
+    if cal is not None:
+        phase = mark < len(PHASES)
+        days = np.zeros(len(out), dtype=np.int64)
+        days[phase] = cal.count(out["Start"].to_numpy(dtype="datetime64[D]")[phase],
+                                out["Finish"].to_numpy(dtype="datetime64[D]")[phase])
+        out["Workdays"] = pd.Series(days, dtype="Int64").where(phase)
+    return out
+
+def gantt_bars(res: pd.DataFrame, base: pd.DataFrame = None, holiday_set=None) -> pd.DataFrame:
+    """One row per bar (Series, Equipment, Phase, Start, Finish) for current + baseline.
+
+    With a holiday set, phase bars also get their length in business days ("Workdays").
+    """
+    cal = workdays.table(holiday_set) if holiday_set is not None else None
+    parts = [_series_bars(res, "Current", True, cal)]
+    if base is not None and not base.empty:
+        parts.append(_series_bars(base, "Baseline", False, cal))
+    return pd.concat(parts, ignore_index=True).drop(columns="Pos")
+
+def _row_keys(frame):
+    """Hash of each row's Gantt columns; repeats of an identical row get distinct keys."""
+    cols = [c for c in GANTT_COLS if c in frame.columns]
+    h = pd.util.hash_pandas_object(frame[cols], index=False).to_numpy()
+    dup = pd.Series(h).groupby(h).cumcount().to_numpy().astype(np.uint64)
+    return h ^ (dup * np.uint64(0x9E3779B97F4A7C15))
+
+def _traces(bars, y, series):
+    import plotly.graph_objects as go
+
+    # Dates as epoch ms, numeric y slots and float customdata keep the trace arrays numeric, so
+    # building the figure and Streamlit's to_dict / to_json copy memory blocks, not objects.
+    traces = []
+    ghost = series == "Baseline"
+    phase_of = bars["Phase"].to_numpy()
+    names = bars["Equipment"].astype(str).to_numpy()
+    for phase in MARKS:
+        rows = np.flatnonzero(phase_of == phase)
+        if not rows.size:
+            continue
+        start = bars["Start"].to_numpy(dtype="datetime64[ns]")[rows]
+        finish = bars["Finish"].to_numpy(dtype="datetime64[ns]")[rows]
+        hover = "%{text}<br>Phase=" + phase + "<br>Start=%{base|%Y-%m-%d}<br>Finish=%{x|%Y-%m-%d}"
+        custom = None
+        if "Workdays" in bars.columns and phase not in ("ROJ", "Milestone"):
+            hover += "<br>Workdays=%{customdata}"
+            custom = bars["Workdays"].to_numpy(dtype="float64", na_value=np.nan)[rows]
+        traces.append(go.Bar(
+            base=start.astype(np.int64) / 1e6, x=(finish - start) / np.timedelta64(1, "ms"),
+            y=y[rows], text=names[rows], textposition="none", customdata=custom,
+            orientation="h", name=phase, legendgroup=phase, showlegend=not ghost,
+            marker_color=PHASE_COLORS[phase], opacity=0.25 if ghost else None,
+            width=0.5 if ghost else None, hovertemplate=hover + "<extra></extra>",
+        ))
+    return traces
+
+def build_figure(gantt_df: pd.DataFrame):
+    import plotly.graph_objects as go
+
+    # One y slot per Equipment + Series; Current is always above Baseline
+    gantt_df = gantt_df.reset_index(drop=True)
+    equipment = gantt_df["Equipment"].astype(str)
+    current = (gantt_df["Series"] == "Current").to_numpy()
+    names = pd.unique(equipment)
+    has_base = pd.Index(names).isin(equipment[~current])
+    slot = 1 + has_base.astype(np.int64)            # y rows taken by each equipment
+    first = np.concatenate([[0], slot[:-1]]).cumsum()
+    eq_pos = pd.Index(names).get_indexer(equipment)
+    y = first[eq_pos] + np.where(current, 0, 1)
+    tick_text = np.full(int(slot.sum()), "", dtype=object)
+    tick_text[first] = names                        # show just equipment name, baseline row blank
+
+    fig = go.Figure()
+    for series in ("Current", "Baseline"):
+        rows = np.flatnonzero(current if series == "Current" else ~current)
+        fig.add_traces(_traces(gantt_df.iloc[rows], y[rows], series))
+
+    # Axes + layout
+    fig.update_xaxes(
+      type="date",
+      showgrid=True,
+      gridcolor="lightgray",
+      linewidth=1,
+      linecolor=colors.MANO_BLUE,
+      title="Timeline"
+    )
+    fig.update_yaxes(
+      showgrid=True,
+      autorange="reversed",
+      tickmode="array",
+      tickvals=np.arange(len(tick_text)),
+      ticktext=tick_text,
+      zeroline=False,
+      linewidth=1,
+      linecolor=colors.MANO_BLUE,
+      title="Equipment"
+    )
+
+    fig.update_layout(
+        barmode="overlay",
+        height=520,
+        margin=dict(l=20, r=20, t=20, b=20),
+        legend_title_text="",
+        plot_bgcolor="#FFFFFF",
+        paper_bgcolor=colors.MANO_OFFWHITE
+    )
+    return fig
+
+def figure_json(fig):
+    import plotly.io as pio
+
+    return pio.to_json(fig, validate=False)
+
+def from_json(spec):
+    import plotly.io as pio
+
+    return pio.from_json(spec, skip_invalid=True)
+
+# show() hand-builds the chart element with Streamlit internals; only trusted on the
+# release pinned in requirements.txt, anything else takes the public path.
+_PINNED_STREAMLIT = "1.37."
+
+def _enqueue_spec(st, spec, use_container_width):
+    import json
+
+    from streamlit.elements.form import current_form_id
+    from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    from streamlit.runtime.state.common import compute_widget_id
+
+    dg = st._main
+    proto = PlotlyChartProto()
+    proto.use_container_width = use_container_width
+    proto.theme = "streamlit"
+    proto.form_id = current_form_id(dg)
+    proto.spec = spec
+    proto.config = json.dumps({"showLink": False, "linkText": False})
+    ctx = get_script_run_ctx()
+    proto.id = compute_widget_id(
+        "plotly_chart", user_key=None, key=None, plotly_spec=proto.spec, plotly_config=proto.config,
+        selection_mode=[], is_selection_activated=False, theme="streamlit", form_id=proto.form_id,
+        use_container_width=use_container_width, page=ctx.active_script_hash if ctx else None)
+    return dg._enqueue("plotly_chart", proto)
+
+def show(spec, use_container_width=True):
+    """st.plotly_chart for an already serialized figure: no Figure validation or to_json per rerun.
+    Falls back to st.plotly_chart on any other Streamlit release or if the internals fail."""
+    import streamlit as st
+
+    if st.__version__.startswith(_PINNED_STREAMLIT):
+        try:
+            return _enqueue_spec(st, spec, use_container_width)
+        except Exception:  # internals changed shape: nothing was enqueued, take the public path
+            pass
+    return st.plotly_chart(from_json(spec), use_container_width=use_container_width)
+
+class Timeline:
+    """Per-session Gantt figure, reused across reruns and patched per changed row."""
+
+    def __init__(self):
+        self._src = None   # (results, baseline, mask, calendar table) the figure was built from
+        self._cal = None
+        self._rows = {}    # series -> (source frame, row keys, bars with the "Row" key of their row)
+        self.fig = None
+        self.rebuilt = 0   # rows whose bars were rebuilt by the last change
+        self._spec_src = None
+        self.spec = None   # serialized self.fig (or a shared copy of the same view)
+
+    def _patch(self, series, frame, milestones):
+        """Bars for every row of `frame`, reusing those of rows whose Gantt columns are unchanged."""
+        held = self._rows.get(series)
+        if held is not None and held[0] is frame:
+            return held[1], held[2]
+        keys = _row_keys(frame)
+        if held is not None:
+            old = held[2]
+            keep = old[np.isin(old["Row"].to_numpy(), keys)]
+            fresh = ~np.isin(keys, held[1])
+        else:
+            keep, fresh = None, np.ones(len(keys), dtype=bool)
+        new = _series_bars(frame[fresh], series, milestones, self._cal)
+        new["Row"] = keys[fresh][new.pop("Pos").to_numpy()]
+        bars = new if keep is None else pd.concat([keep, new], ignore_index=True)
+        # Back into the frame's row order; bars of one row stay in MARKS order.
+        rank = pd.Index(keys).get_indexer(bars["Row"])
+        mark = pd.Categorical(bars["Phase"], categories=MARKS).codes
+        bars = bars.iloc[np.lexsort((mark, rank))].reset_index(drop=True)
+        self._rows[series] = (frame, keys, bars)
+        self.rebuilt += int(fresh.sum())
+        return keys, bars
+
+    @staticmethod
+    def _same(src, results, baseline, mask, cal):
+        return (src is not None and src[0] is results and src[1] is baseline and src[3] is cal
+                and (src[2] is None if mask is None else src[2] is not None and np.array_equal(src[2], mask)))
+
+    def serialized(self, results, baseline=None, mask=None, holiday_set=None, shared=None, calendar=""):
+        """JSON spec of `figure(...)`, or None. With `shared` (a result_cache.ResultCache), sessions
+        showing the same rows, baseline and calendar serialize the figure once between them."""
+        if results is None or results.empty:
+            return None
+        cal = workdays.table(holiday_set) if holiday_set is not None else None
+        mask = None if mask is None or np.all(mask) else np.asarray(mask, dtype=bool)
+        if self._same(self._spec_src, results, baseline, mask, cal):
+            return self.spec
+        key = spec = None
+        if shared is not None:
+            shown = results if mask is None else results[mask]
+            base = baseline
+            if base is not None and not base.empty and mask is not None:
+                base = base[base["Equipment"].isin(shown["Equipment"])]
+            key = result_cache.make_key("figure", shown, base, calendar)
+            spec = shared.get(key)
+        if spec is None:
+            fig = self.figure(results, baseline, mask, holiday_set)
+            spec = figure_json(fig) if fig is not None else ""   # "" = nothing to draw
+            if key is not None:
+                shared.put(key, spec)
+        self.spec = spec or None
+        self._spec_src = (results, baseline, mask, cal)
+        return self.spec
+
+    def figure(self, results, baseline=None, mask=None, holiday_set=None):
+        """The Gantt figure for results[mask] (+ baseline rows of the shown equipment), or None."""
+        if results is None or results.empty:
+            return None
+        cal = workdays.table(holiday_set) if holiday_set is not None else None
+        mask = None if mask is None or np.all(mask) else np.asarray(mask, dtype=bool)
+        if self._same(self._src, results, baseline, mask, cal):
+            return self.fig
+        if cal is not self._cal:
+            self._rows = {}
+            self._cal = cal
+        self.rebuilt = 0
+
+        keys, bars = self._patch("Current", results, True)
+        if mask is not None:
+            bars = bars[np.isin(bars["Row"].to_numpy(), keys[mask])]
+        parts = [bars]
+        if baseline is not None and not baseline.empty:
+            _, base_bars = self._patch("Baseline", baseline, False)
+            if mask is not None:
+                base_bars = base_bars[base_bars["Equipment"].isin(results["Equipment"][mask])]
+            parts.append(base_bars)
+        else:
+            self._rows.pop("Baseline", None)
+        bars = pd.concat(parts, ignore_index=True)
+        self.fig = build_figure(bars) if not bars.empty else None
+        self._src = (results, baseline, mask, cal)
+        return self.fig
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+import utils.schedule as schedule
+
+# ======================= Windowed equipment editor =======================
+# The master table (session work_df) keeps a stable integer row ID in its index. The
+# editor only ever gets a window of it: a filtered / paged slice with a fresh
+# RangeIndex (Streamlit keeps added rows only on a RangeIndex) plus the IDs of those
+# rows. On submit `merge` maps the window back by ID: edited rows overwrite their
+# master rows, rows missing from the window are deleted, added rows get new IDs at the
+# end of the table. Browser payload and merge cost follow the window, not the table.
+
+EDITOR_COLS = [
+    "Equipment","Vendor","Predecessors","Mode","ROJ","PO Execution",
+    "Submittal (days)","Manufacturing (days)","Shipping (days)","Buffer (days)",
+    "Delivery Date (committed)",*schedule.ACTUAL_COLS,"Cost","Payment Terms",
+]
+TEXT_COLS = ("Equipment","Vendor","Predecessors","Mode","Payment Terms")
+DATE_COLS = ("ROJ","PO Execution","Delivery Date (committed)",*schedule.ACTUAL_COLS)
+DEFAULT_DAYS = {
+    "Submittal (days)": schedule.DEFAULT_SUBMITTAL_DAYS,
+    "Manufacturing (days)": 0,
+    "Shipping (days)": schedule.DEFAULT_SHIPPING_DAYS,
+    "Buffer (days)": schedule.DEFAULT_BUFFER_DAYS,
+}
+FULL_ROWS = 1_000                     # tables up to this size are edited whole
+PAGE_SIZES = [100, 250, 500, 1_000]
+SEARCH_COLS = ("Equipment", "Vendor")
+
+def ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Add any missing editor column with its default (in place); run once per loaded table."""
+    for c in EDITOR_COLS:
+        if c in df.columns:
+            continue
+        if c in TEXT_COLS:
+            df[c] = ""
+        elif c in DATE_COLS:
+            df[c] = pd.NaT
+        elif c in DEFAULT_DAYS:
+            df[c] = DEFAULT_DAYS[c]
+        else:
+            df[c] = np.nan
+    return df
+
+def matches(df: pd.DataFrame, text: str) -> np.ndarray:
+    """Rows whose Equipment or Vendor contains `text` (case-insensitive); every row when blank."""
+    text = (text or "").strip()
+    if not text:
+        return np.ones(len(df), dtype=bool)
+    hit = np.zeros(len(df), dtype=bool)
+    for c in SEARCH_COLS:
+        if c in df.columns:
+            hit |= df[c].astype("string").str.contains(text, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+    return hit
+
+def window(df: pd.DataFrame, text="", page=1, page_size=PAGE_SIZES[1]):
+    """Row IDs on `page` (1-based, clamped) of the rows matching `text` -> (ids, matching rows, pages)."""
+    ids = df.index[matches(df, text)] if (text or "").strip() else df.index
+    pages = max(1, -(-len(ids) // page_size))
+    page = min(max(int(page), 1), pages)
+    return ids[(page - 1) * page_size:page * page_size].to_numpy(), len(ids), pages
+
+def view(df: pd.DataFrame, ids, cols=EDITOR_COLS) -> pd.DataFrame:
+    """The editor's frame for `ids`: editor columns only, positional index."""
+    return df.loc[ids, cols].reset_index(drop=True)
+
+def _put(col: pd.Series, rows, values: pd.Series) -> pd.Series:
+    """`col` with positions `rows` set to `values`, widened when the dtypes differ."""
+    num, dt = pd.api.types.is_numeric_dtype, pd.api.types.is_datetime64_any_dtype
+    if col.dtype != values.dtype:
+        if num(col) and num(values) and not pd.api.types.is_bool_dtype(col):
+            col, values = col.astype("float64"), values.astype("float64")
+        elif dt(col) and dt(values):
+            values = values.astype(col.dtype)
+        else:
+            col = col.astype(object)
+    out = col.copy()
+    out.iloc[rows] = values.to_numpy()
+    return out
+
+def merge(master: pd.DataFrame, ids, edited: pd.DataFrame) -> pd.DataFrame:
+    """Fold an edited window (from `view(master, ids)`) back into the master table by row ID."""
+    ids = np.asarray(ids)
+    pos = edited.index.to_numpy()
+    kept = pos < len(ids)
+    out = master.drop(index=np.setdiff1d(ids, ids[pos[kept]]))
+    rows = out.index.get_indexer(ids[pos[kept]])
+    cols = [c for c in edited.columns if c in out.columns]
+    if rows.size:
+        for c in cols:
+            out[c] = _put(out[c], rows, edited[c][kept])
+    if not kept.all():
+        start = int(master.index.max()) + 1 if len(master) else 0
+        n_new = int((~kept).sum())
+        out = out.reindex(out.index.append(pd.RangeIndex(start, start + n_new)))
+        rows = np.arange(len(out) - n_new, len(out))
+        for c in cols:
+            out[c] = _put(out[c], rows, edited[c][~kept])
+    return out
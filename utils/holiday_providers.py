@@ -0,0 +1,212 @@
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import time
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import utils.calendar as calendar
+
+# ======================= Holiday calendar providers =======================
+# Providers turn some source (built-in presets, a local folder, an HTTP endpoint) into
+# {region name: sorted datetime64[D] array}. `refresh` loads every provider
+# concurrently and writes one .npy file per region plus index.json; `HolidayRegistry`
+# only reads the index at startup and memory-maps a region's array on first use.
+
+CACHE_DIR = os.environ.get("PROCUREMENT_HOLIDAY_CACHE", ".cache/holidays")
+LOCAL_DIR = os.environ.get("PROCUREMENT_HOLIDAY_DIR", "holidays")
+REMOTE_URL = os.environ.get("PROCUREMENT_HOLIDAY_URL", "")
+REMOTE_TTL_S = 24 * 3600
+
+def _as_days(values) -> np.ndarray:
+    d = pd.to_datetime(pd.Series(list(values), dtype="object"), errors="coerce").dropna()
+    return np.unique(d.to_numpy(dtype="datetime64[D]"))
+
+class BuiltinProvider:
+    """Presets from utils/calendar.py."""
+    key = "builtin"
+
+    def fingerprint(self):
+        return hashlib.sha1(Path(calendar.__file__).read_bytes()).hexdigest()
+
+    async def load(self):
+        return {name: _as_days(calendar.build_for_region(name)) for name in calendar.PRESETS}
+
+class DirectoryProvider:
+    """*.ics / *.csv / *.json files in a local folder; region = file stem unless the file says otherwise.
+
+    CSV: a `date` column and optional `region` column. JSON: a list of dates or
+    {region: [dates]}. ICS: every DTSTART in the file.
+    """
+    key = "directory"
+
+    def __init__(self, path=LOCAL_DIR):
+        self.path = Path(path)
+
+    def _files(self):
+        if not self.path.is_dir():
+            return []
+        return sorted(p for p in self.path.iterdir() if p.suffix.lower() in (".ics", ".csv", ".json"))
+
+    def fingerprint(self):
+        return [[p.name, p.stat().st_mtime_ns, p.stat().st_size] for p in self._files()]
+
+    @staticmethod
+    def parse(name, text, suffix):
+        suffix = suffix.lower()
+        if suffix == ".ics":
+            found = re.findall(r"^DTSTART[^:\n]*:(\d{8})", text, flags=re.M)
+            return {name: _as_days(pd.to_datetime(found, format="%Y%m%d"))}
+        if suffix == ".csv":
+            out = {}
+            for row in csv.DictReader(io.StringIO(text)):
+                out.setdefault(row.get("region") or name, []).append(row.get("date"))
+            return {k: _as_days(v) for k, v in out.items()}
+        data = json.loads(text)
+        if isinstance(data, list):
+            return {name: _as_days(data)}
+        return {k: _as_days(v) for k, v in data.items()}
+
+    async def load(self):
+        async def one(p):
+            text = await asyncio.to_thread(p.read_text, encoding="utf-8")
+            return self.parse(p.stem, text, p.suffix)
+        out = {}
+        for part in await asyncio.gather(*(one(p) for p in self._files())):
+            out.update(part)
+        return out
+
+class HttpProvider:
+    """GET a JSON document shaped {region: [dates]}; any local server can stand in for tests."""
+    key = "http"
+
+    def __init__(self, url=REMOTE_URL, timeout=10, ttl_s=REMOTE_TTL_S):
+        self.url, self.timeout, self.ttl_s = url, timeout, ttl_s
+
+    def fingerprint(self):
+        # Re-fetch once per TTL window; the URL itself is part of the key.
+        return [self.url, int(time.time() // self.ttl_s)]
+
+    def _get(self):
+        with urllib.request.urlopen(self.url, timeout=self.timeout) as resp:
+            return resp.read().decode("utf-8")
+
+    async def load(self):
+        text = await asyncio.to_thread(self._get)
+        return {k: _as_days(v) for k, v in json.loads(text).items()}
+
+def default_providers():
+    providers = [BuiltinProvider(), DirectoryProvider()]
+    if REMOTE_URL:
+        providers.append(HttpProvider())
+    return providers
+
+def _slug(name):
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_") + "-" + hashlib.sha1(name.encode()).hexdigest()[:6]
+
+async def load_all(providers):
+    """Run every provider concurrently -> ([regions per provider, None where it failed], errors).
+    A provider that fails is skipped so one bad source never blanks the others."""
+    parts = await asyncio.gather(*(p.load() for p in providers), return_exceptions=True)
+    errors = {p.key: repr(part) for p, part in zip(providers, parts) if isinstance(part, Exception)}
+    return [None if isinstance(part, Exception) else part for part in parts], errors
+
+def _read_index(cache):
+    try:
+        return json.loads((Path(cache) / "index.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def refresh(cache_dir=CACHE_DIR, providers=None, previous=None):
+    """Rebuild the cache. Later providers override earlier ones per region. A provider that
+    fails keeps the regions it supplied last time (their .npy files stay) and gets no
+    fingerprint, so the next open retries it instead of treating the cache as fresh."""
+    providers = providers if providers is not None else default_providers()
+    parts, errors = asyncio.run(load_all(providers))
+    cache = Path(cache_dir)
+    cache.mkdir(parents=True, exist_ok=True)
+    previous = previous if previous is not None else _read_index(cache) or {}
+    old_regions, old_sources = previous.get("regions", {}), previous.get("sources")
+    fresh = {name for part in parts if part is not None for name in part}
+    kept = {}
+    for p, part in zip(providers, parts):
+        if part is None:
+            # Older indexes don't say which provider a region came from: keep whatever
+            # no working provider supplies this time.
+            names = (old_sources.get(p.key, []) if old_sources is not None
+                     else [r for r in old_regions if r not in fresh])
+            kept[p.key] = [r for r in names if r in old_regions and (cache / old_regions[r]).exists()]
+    regions, sources, fingerprints = {}, {}, {}
+    for i, (p, part) in enumerate(zip(providers, parts)):
+        if part is None:
+            regions.update((r, old_regions[r]) for r in kept[p.key])
+            sources[p.key] = kept[p.key]
+            continue
+        # A region a later, failed provider keeps wins anyway; don't overwrite its file.
+        later = {r for q in providers[i + 1:] for r in kept.get(q.key, [])}
+        for name, days in part.items():
+            if name in later:
+                continue
+            fname = _slug(name) + ".npy"
+            np.save(cache / fname, np.asarray(days, dtype="datetime64[D]"))
+            regions[name] = fname
+        sources[p.key] = sorted(part)
+        fingerprints[p.key] = p.fingerprint()
+    index = {
+        "built_at": time.time(),
+        "fingerprints": fingerprints,
+        "errors": errors,
+        "regions": regions,
+        "sources": sources,
+    }
+    (cache / "index.json").write_text(json.dumps(index, indent=1), encoding="utf-8")
+    return index
+
+class HolidayRegistry:
+    """Region name -> holiday set, backed by the memory-mapped .npy cache."""
+
+    def __init__(self, cache_dir=CACHE_DIR, index=None):
+        self.cache = Path(cache_dir)
+        self.index = index or json.loads((self.cache / "index.json").read_text(encoding="utf-8"))
+        self._arrays = {}
+        self._sets = {}
+
+    def regions(self):
+        presets = [r for r in calendar.PRESETS if r in self.index["regions"]]
+        return ["None"] + presets + sorted(r for r in self.index["regions"] if r not in calendar.PRESETS)
+
+    def array(self, name):
+        """Sorted datetime64[D] array (memory-mapped; empty for unknown / "None")."""
+        if name not in self._arrays:
+            fname = self.index["regions"].get(name)
+            self._arrays[name] = (np.load(self.cache / fname, mmap_mode="r") if fname
+                                  else np.array([], dtype="datetime64[D]"))
+        return self._arrays[name]
+
+    def holidays(self, name):
+        if name not in self._sets:
+            self._sets[name] = set(self.array(name).astype(object))
+        return self._sets[name]
+
+def _stale(index, providers):
+    if index is None:
+        return True
+    fps = index.get("fingerprints", {})
+    if set(fps) != {p.key for p in providers}:
+        return True
+    return any(json.loads(json.dumps(p.fingerprint())) != fps.get(p.key) for p in providers)
+
+def open_registry(cache_dir=CACHE_DIR, providers=None):
+    """Open the cache, rebuilding it first if any provider's source changed."""
+    providers = providers if providers is not None else default_providers()
+    index = _read_index(cache_dir)
+    if _stale(index, providers):
+        index = refresh(cache_dir, providers, index)
+    return HolidayRegistry(cache_dir, index)
@@ -0,0 +1,85 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import utils.dependencies as dependencies
+import utils.engine as engine
+import utils.schedule as schedule
+
+# ======================= Background schedule computation =======================
+# Large tables are computed off the script thread in row chunks. Predecessor links
+# span chunks, so chunks run unlinked and the link pass runs once over the
+# assembled table at the end. The session polls `progress` / `partial()` to draw a
+# progress bar and the rows finished so far. `cancel()` stops the job at the next
+# chunk boundary.
+
+CHUNK_ROWS = 5_000
+BACKGROUND_ROWS = 20_000   # smaller tables just compute inline
+WORKERS = 4
+
+def make_executor(workers=WORKERS):
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compute")
+
+class ComputeJob:
+    def __init__(self, executor, df: pd.DataFrame, holiday_set, as_of=None,
+                 compute=engine.compute_all, chunk_rows=CHUNK_ROWS, on_done=None):
+        self.df = df.reset_index(drop=True)
+        self.holiday_set, self.as_of, self.compute = holiday_set, schedule.as_of_date(as_of), compute
+        self.chunk_rows = chunk_rows
+        self.total = max(1, -(-len(self.df) // chunk_rows))
+        self.done = 0
+        self.result = None
+        self.error = None        # CycleError message when links had to be dropped
+        self.failure = None      # any other exception from the worker
+        self.on_done = on_done
+        self._parts = []
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self.future = executor.submit(self._run)
+
+    def _run(self):
+        try:
+            for start in range(0, len(self.df), self.chunk_rows):
+                if self._cancel.is_set():
+                    return
+                part = self.compute(self.df.iloc[start:start + self.chunk_rows], self.holiday_set,
+                                    as_of=self.as_of, link=False)
+                with self._lock:
+                    self._parts.append(part)
+                    self.done += 1
+            out = self.partial()
+            if schedule.has_links(out) and not self._cancel.is_set():
+                try:
+                    out = schedule.apply_predecessors(out, self.holiday_set, self.as_of)
+                    out = out[[c for c in engine.TABLE_COLS if c in out.columns]]
+                except dependencies.CycleError as e:
+                    self.error = f"{e}. Scheduling items independently until the loop is removed."
+                    out = out.drop(columns=["Predecessors"])  # as run_compute's unlinked fallback
+            if self._cancel.is_set():
+                return
+            self.result = out
+            if self.on_done is not None:
+                self.on_done(self)
+        except Exception as e:  # surfaced by the UI instead of dying silently in the pool
+            self.failure = e
+
+    @property
+    def progress(self) -> float:
+        return self.done / self.total
+
+    @property
+    def finished(self) -> bool:
+        return self.future.done()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def partial(self) -> pd.DataFrame:
+        with self._lock:
+            parts = [p for p in self._parts if not p.empty]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    def cancel(self):
+        self._cancel.set()
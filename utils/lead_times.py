@@ -0,0 +1,208 @@
+import threading
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+import utils.project_store as project_store
+import utils.result_cache as result_cache
+import utils.schedule as schedule
+import utils.workdays as workdays
+
+# ======================= Vendor lead-time library =======================
+# Running statistics (count, mean, M2 for the variance, min, max) per
+# equipment type × vendor × region × phase, kept in the workspace SQLite file.
+# Each observation also updates the "*" (any vendor / any region) rows, so a
+# lookup falls back from the exact key to broader ones without scanning history.
+# Recording merges a batch into the stored stats (Chan et al. parallel update),
+# so nothing but the aggregates is ever stored.
+
+# Values that mean "nobody entered a vendor figure here": safe for the library to replace.
+STOCK_DAYS = {
+    "Submittal (days)": schedule.DEFAULT_SUBMITTAL_DAYS,
+    "Manufacturing (days)": 0,
+    "Shipping (days)": schedule.DEFAULT_SHIPPING_DAYS,
+}
+
+ANY = "*"
+PHASES = {
+    "Submittal (days)": ("PO Execution", "Submittal Actual End"),
+    # Shipped closes manufacturing when no Manufacturing Actual End was entered (as in utils.engine).
+    "Manufacturing (days)": ("Submittal Actual End", ("Manufacturing Actual End", "Shipped")),
+    # No actual arrival date is recorded, so transit is never learned; planners' figures stay.
+    "Shipping (days)": None,
+}
+STAT_COLS = ["equipment", "vendor", "region", "phase", "n", "mean", "m2", "lo", "hi"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lead_times (
+    equipment TEXT NOT NULL,
+    vendor    TEXT NOT NULL,
+    region    TEXT NOT NULL,
+    phase     TEXT NOT NULL,
+    n         INTEGER NOT NULL,
+    mean      REAL NOT NULL,
+    m2        REAL NOT NULL,
+    lo        INTEGER NOT NULL,
+    hi        INTEGER NOT NULL,
+    PRIMARY KEY (equipment, vendor, region, phase)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS lead_time_sources (
+    project TEXT NOT NULL,
+    hash    INTEGER NOT NULL,
+    PRIMARY KEY (project, hash)
+) WITHOUT ROWID;
+"""
+
+def _key(s: pd.Series) -> pd.Series:
+    return s.fillna("").astype(str).str.strip().str.casefold()
+
+class LeadTimeLibrary:
+    """Lead-time history stored next to the projects; safe to share across sessions and threads."""
+
+    def __init__(self, store: project_store.ProjectStore):
+        self._store = store  # same file and connection settings as the projects
+        with closing(self._store._connect()) as con, con:
+            con.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._frame = None    # stats table, reloaded after each record()
+        self._pivot = None    # (equipment, vendor, region) x phase -> mean
+
+    def table(self) -> pd.DataFrame:
+        with self._lock:
+            if self._frame is None:
+                with closing(self._store._connect()) as con:
+                    self._frame = pd.read_sql_query(f"SELECT {', '.join(STAT_COLS)} FROM lead_times", con).astype(
+                        {"n": "int64", "mean": "float64", "m2": "float64", "lo": "int64", "hi": "int64"})
+                f = self._frame
+                self._pivot = f.pivot_table(index=["equipment", "vendor", "region"], columns="phase",
+                                            values="mean", aggfunc="first") if len(f) else None
+            return self._frame
+
+    def summary(self) -> pd.DataFrame:
+        """Readable stats for the exact (equipment, vendor, region) keys."""
+        f = self.table()
+        f = f[(f["vendor"] != ANY) & (f["region"] != ANY)].copy()
+        f["std"] = np.sqrt(np.where(f["n"] > 1, f["m2"] / (f["n"] - 1).clip(lower=1), 0.0)).round(1)
+        f["mean"] = f["mean"].round(1)
+        return f.drop(columns=["m2"]).sort_values(["equipment", "vendor", "region", "phase"], ignore_index=True)
+
+    # ---- lookups ----
+    def lookup(self, equipment, vendor, region) -> pd.DataFrame:
+        """Mean days per phase for each row, falling back exact → any region → any vendor → any.
+
+        One reindex per fallback level over the whole table; NaN where nothing is known.
+        """
+        equipment, vendor = _key(pd.Series(equipment)), _key(pd.Series(vendor))
+        n = len(equipment)
+        out = np.full((n, len(PHASES)), np.nan)
+        self.table()
+        if self._pivot is None or not n:
+            return pd.DataFrame(out, columns=list(PHASES))
+        pivot = self._pivot.reindex(columns=list(PHASES))
+        region = str(region).strip().casefold()
+        for v, r in ((vendor, region), (vendor, ANY), (ANY, region), (ANY, ANY)):
+            idx = pd.MultiIndex.from_arrays([equipment, v if isinstance(v, pd.Series) else [v] * n, [r] * n])
+            found = pivot.reindex(idx).to_numpy()
+            out = np.where(np.isnan(out), found, out)
+        return pd.DataFrame(out, columns=list(PHASES))
+
+    def apply(self, df: pd.DataFrame, region):
+        """Replace blank or stock-default durations with the library's means.
+
+        Manufacturing is left alone where a committed delivery derives it.
+        Returns (new table, number of cells filled).
+        """
+        out = df.copy()
+        vendor = out["Vendor"] if "Vendor" in out.columns else pd.Series([""] * len(out), index=out.index)
+        known = self.lookup(out["Equipment"], vendor, region)
+        filled = 0
+        for c in PHASES:
+            cur = pd.to_numeric(out[c], errors="coerce") if c in out.columns else pd.Series(np.nan, index=out.index)
+            want = (cur.isna() | cur.eq(STOCK_DAYS[c])).to_numpy()
+            if c == "Manufacturing (days)" and "Delivery Date (committed)" in out.columns:
+                want &= pd.to_datetime(out["Delivery Date (committed)"], errors="coerce").isna().to_numpy()
+            vals = known[c].to_numpy()
+            take = want & ~np.isnan(vals)
+            if take.any():
+                cur = cur.astype("float64")
+                cur[take] = np.round(vals[take])
+                out[c] = cur.astype("Int64") if cur.isna().any() else cur.astype("int64")
+                filled += int(take.sum())
+        return out, filled
+
+    # ---- recording ----
+    @staticmethod
+    def observations(results: pd.DataFrame, holiday_set) -> pd.DataFrame:
+        """Long table (row, equipment, vendor, phase, days) of business days each phase
+        actually took, from the progress actuals (schedule.ACTUAL_COLS). The PO date only
+        counts on Forward rows, where it was entered rather than derived from the plan."""
+        cal = workdays.table(holiday_set)
+        eq, vendor = _key(results["Equipment"]), _key(results.get("Vendor", pd.Series("", index=results.index)))
+
+        def days(c):
+            if c not in results.columns:
+                return np.full(len(results), np.datetime64("NaT"), dtype="datetime64[D]")
+            return pd.to_datetime(results[c], errors="coerce").to_numpy(dtype="datetime64[D]")
+
+        fwd = results["Mode"].eq("Forward").to_numpy(dtype=bool) if "Mode" in results.columns else False
+        parts = []
+        for phase, span in PHASES.items():
+            if span is None:
+                continue
+            start, ends = span
+            a = days(start) if start != "PO Execution" else np.where(fwd, days(start), np.datetime64("NaT"))
+            b = np.full(len(results), np.datetime64("NaT"), dtype="datetime64[D]")
+            for c in (ends,) if isinstance(ends, str) else ends:
+                b = np.where(np.isnat(b), days(c), b)
+            ok = ~np.isnat(a) & ~np.isnat(b)
+            n = np.zeros(len(a), dtype=np.int64)
+            n[ok] = cal.count(a[ok], b[ok])
+            ok &= n >= 0
+            parts.append(pd.DataFrame({"row": np.flatnonzero(ok), "equipment": eq.to_numpy()[ok],
+                                       "vendor": vendor.to_numpy()[ok], "phase": phase, "days": n[ok]}))
+        return pd.concat(parts, ignore_index=True)
+
+    def record(self, project, results: pd.DataFrame, region, holiday_set) -> int:
+        """Fold a project's actual durations into the library; only rows with progress
+        actuals count, and rows already recorded for this project (same content hash) are
+        skipped. Returns observations added."""
+        if results is None or results.empty:
+            return 0
+        obs = self.observations(results, holiday_set)
+        obs = obs[obs["equipment"] != ""]
+        hashes = result_cache.row_hashes(obs[["equipment", "vendor", "phase", "days"]]).view(np.int64)
+        with closing(self._store._connect()) as con, con:
+            seen = {h for (h,) in con.execute("SELECT hash FROM lead_time_sources WHERE project = ?", (project,))}
+            fresh = ~pd.Series(hashes).isin(seen).to_numpy()
+            obs, hashes = obs[fresh], hashes[fresh]
+            if obs.empty:
+                return 0
+            region = str(region).strip().casefold()
+            batch = pd.concat([obs.assign(region=region), obs.assign(region=ANY),
+                               obs.assign(vendor=ANY, region=region), obs.assign(vendor=ANY, region=ANY)])
+            batch = batch.drop_duplicates(["row", "equipment", "vendor", "region", "phase"])
+            keys = ["equipment", "vendor", "region", "phase"]
+            g = batch.groupby(keys)["days"]
+            batch["sq"] = (batch["days"] - g.transform("mean")) ** 2
+            new = g.agg(n="count", mean="mean", lo="min", hi="max").reset_index()
+            new["m2"] = batch.groupby(keys)["sq"].sum().to_numpy()
+            old = self.table().set_index(keys)
+            cur = old.reindex(pd.MultiIndex.from_frame(new[keys]))
+            na = cur["n"].fillna(0).to_numpy()
+            ma, m2a = cur["mean"].fillna(0).to_numpy(), cur["m2"].fillna(0).to_numpy()
+            nb, mb, m2b = new["n"].to_numpy(), new["mean"].to_numpy(), new["m2"].to_numpy()
+            tot = na + nb
+            delta = mb - ma
+            new["mean"] = ma + delta * nb / tot
+            new["m2"] = m2a + m2b + delta ** 2 * na * nb / tot
+            new["n"] = tot.astype(np.int64)
+            new["lo"] = np.fmin(cur["lo"].to_numpy(), new["lo"].to_numpy()).astype(np.int64)
+            new["hi"] = np.fmax(cur["hi"].to_numpy(), new["hi"].to_numpy()).astype(np.int64)
+            con.executemany(f"INSERT OR REPLACE INTO lead_times ({', '.join(STAT_COLS)}) VALUES (?,?,?,?,?,?,?,?,?)",
+                            new[STAT_COLS].itertuples(index=False, name=None))
+            con.executemany("INSERT OR IGNORE INTO lead_time_sources (project, hash) VALUES (?, ?)",
+                            [(project, int(h)) for h in hashes])
+        with self._lock:
+            self._frame = self._pivot = None
+        return len(obs)
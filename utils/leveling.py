@@ -0,0 +1,135 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+
+import utils.workdays as workdays
+from utils.dependencies import HOLD_COLS
+from utils.stream import LATE, PO_CRITICAL
+
+# ======================= Delivery capacity leveling =======================
+# Sites can only receive a few large items per week. After compute_all, constrained
+# rows are bucketed by delivery week per site and swept week by week: every item whose
+# computed delivery has arrived waits in a heap ordered by float (least slack to ROJ
+# first), each week takes up to its capacity, the rest roll to the next week. Moved
+# items are held at the factory like a predecessor hold (shipping, buffer and delivery
+# shift by the same business days) and their ROJ delta / status are refreshed.
+# Deliveries are only ever delayed, never pulled earlier. Fixed items (already shipped)
+# take their week's slots first and never move. O(n log n) per site.
+
+LARGE_PATTERNS = ("switchgear", "generator", "modular electrical room")
+DEFAULT_CAPACITY = 2       # large deliveries per site per week
+MEETS = "✓ Meets/early vs ROJ"
+_MONDAY = 4                # day 4 after the 1970-01-01 epoch is a Monday
+
+def is_large(equipment, patterns=LARGE_PATTERNS) -> np.ndarray:
+    """Rows whose equipment name contains any of the patterns (case-insensitive)."""
+    names = pd.Series(equipment).fillna("").astype(str).str.casefold()
+    hit = np.zeros(len(names), dtype=bool)
+    for p in patterns:
+        hit |= names.str.contains(p.casefold(), regex=False).to_numpy()
+    return hit
+
+def _sweep(weeks, slack, days, capacity, fixed=None):
+    """Assigned week per item; items enter on their own week and leave by (slack, day, position).
+
+    `fixed` items keep their week and use up its capacity.
+    """
+    out = weeks.copy()
+    taken = {}
+    if fixed is not None and fixed.any():
+        taken = dict(zip(*np.unique(weeks[fixed], return_counts=True)))
+        order = np.flatnonzero(~fixed)[np.argsort(weeks[~fixed], kind="stable")]
+    else:
+        order = np.argsort(weeks, kind="stable")
+    heap, i, m = [], 0, len(order)
+    week = weeks[order[0]] if m else 0
+    while i < m or heap:
+        if not heap:
+            week = max(week, weeks[order[i]])
+        while i < m and weeks[order[i]] <= week:
+            j = order[i]
+            heapq.heappush(heap, (slack[j], days[j], j))
+            i += 1
+        for _ in range(min(max(capacity - taken.get(week, 0), 0), len(heap))):
+            out[heapq.heappop(heap)[2]] = week
+        week += 1
+    return out
+
+def level(results: pd.DataFrame, holiday_set, constrained, capacity=DEFAULT_CAPACITY, site=None, fixed=None):
+    """Delay constrained deliveries so no site receives more than `capacity` of them per week.
+
+    `constrained` is a boolean mask over the result rows, `site` an optional per-row site
+    label (one site when omitted) and `capacity` an int or a {site: int} mapping.
+    `fixed` rows (e.g. already shipped) count against capacity but are never moved.
+    Returns (leveled results, moves) where moves has one row per delayed item.
+    """
+    moves_cols = ["Equipment", "Site", "Week of", "Computed Delivery", "Leveled Delivery", "Shift (bd)", "Status"]
+    if results is None or results.empty:
+        return results, pd.DataFrame(columns=moves_cols)
+    out = results.reset_index(drop=True).copy()
+    n = len(out)
+    cal = workdays.table(holiday_set)
+    deliv = pd.to_datetime(out["Delivery Date"], errors="coerce").to_numpy(dtype="datetime64[D]")
+    roj = pd.to_datetime(out["ROJ"], errors="coerce").to_numpy(dtype="datetime64[D]")
+    ok = np.asarray(constrained, dtype=bool) & ~np.isnat(deliv)
+    has_roj = ok & ~np.isnat(roj)
+
+    delta = np.zeros(n, dtype=np.int64)
+    delta[has_roj] = cal.count(roj[has_roj], deliv[has_roj])
+    slack = np.where(has_roj, -delta, np.iinfo(np.int64).max)
+    days = deliv.astype("datetime64[D]").astype(np.int64)
+    weeks = (days - _MONDAY) // 7
+    sites = pd.Series(site if site is not None else "", index=out.index).fillna("").astype(str).to_numpy()
+    fixed = np.zeros(n, dtype=bool) if fixed is None else np.asarray(fixed, dtype=bool)
+
+    assigned = weeks.copy()
+    for s in pd.unique(sites[ok]):
+        rows = np.flatnonzero(ok & (sites == s))
+        cap = capacity.get(s, DEFAULT_CAPACITY) if isinstance(capacity, dict) else capacity
+        if int(cap) < 1:
+            raise ValueError(f"Receiving capacity for site {s!r} must be at least 1 per week")
+        assigned[rows] = _sweep(weeks[rows], slack[rows], days[rows], int(cap), fixed[rows])
+
+    moved = np.flatnonzero(ok & (assigned > weeks))
+    if not moved.size:
+        return out, pd.DataFrame(columns=moves_cols)
+    week_start = (assigned[moved] * 7 + _MONDAY).astype("datetime64[D]")
+    new_day = np.maximum(cal.offset(week_start, 0, "forward"), deliv[moved])
+    shift = cal.count(deliv[moved], new_day)
+
+    for c in HOLD_COLS:
+        if c == "Delivery Date" or c not in out.columns:
+            continue
+        d = pd.to_datetime(out[c], errors="coerce").to_numpy(dtype="datetime64[D]")[moved]
+        have = ~np.isnat(d)
+        vals = pd.to_datetime(out[c], errors="coerce").to_numpy(dtype="datetime64[ns]")
+        vals[moved[have]] = cal.dates(cal.ordinals(d[have]) + shift[have]).astype("datetime64[ns]")
+        out[c] = vals
+    vals = pd.to_datetime(out["Delivery Date"], errors="coerce").to_numpy(dtype="datetime64[ns]")
+    vals[moved] = new_day.astype("datetime64[ns]")
+    out["Delivery Date"] = vals
+
+    # Delivery moved, PO did not: ROJ delta and late / meets change, PO-critical stays.
+    r = moved[has_roj[moved]]
+    new_delta = cal.count(roj[r], out["Delivery Date"].to_numpy(dtype="datetime64[D]")[r])
+    status = out["Status"].astype(object).to_numpy()
+    status[r] = np.where(status[r] == PO_CRITICAL, PO_CRITICAL, np.where(new_delta > 0, LATE, MEETS))
+    out["Status"] = status
+    if "Delta/Float (days)" in out.columns:
+        col = out["Delta/Float (days)"].to_numpy(dtype="float64", na_value=np.nan).copy()
+        col[r] = new_delta
+        out["Delta/Float (days)"] = col.astype(np.int64) if not np.isnan(col).any() else col
+
+    moves = pd.DataFrame({
+        "Equipment": out["Equipment"].to_numpy()[moved],
+        "Site": sites[moved],
+        "Week of": pd.to_datetime(week_start.astype("datetime64[ns]")),
+        "Computed Delivery": pd.to_datetime(deliv[moved].astype("datetime64[ns]")),
+        "Leveled Delivery": pd.to_datetime(new_day.astype("datetime64[ns]")),
+        "Shift (bd)": shift,
+        "Status": status[moved],
+    })[moves_cols]
+    if site is None:
+        moves = moves.drop(columns=["Site"])
+    return out, moves.sort_values(["Week of", "Equipment"], ignore_index=True)
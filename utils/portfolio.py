@@ -0,0 +1,144 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import utils.cashflow as cashflow
+from utils.stream import LATE, PO_CRITICAL
+
+# ======================= Portfolio roll-up =======================
+# Aggregates across every project's computed results, keyed by
+# (equipment type, holiday calendar, ROJ month). Each cell holds counts plus a
+# Delta/Float histogram. A project recalculation only touches the cells its changed
+# rows fall in: rows are matched to the project's previous contribution by content
+# hash, and only the rows that appeared or disappeared are added / subtracted.
+# Projects with costs also keep their payment rows for the portfolio cash-flow curve.
+
+GROUP_KEYS = ["Equipment", "Calendar", "ROJ Month"]
+BIN_EDGES = [-20, -10, -5, 0, 1, 6, 11, 21]   # Delta/Float (days); > 0 is late vs ROJ
+BIN_LABELS = ["≤ -21", "-20..-11", "-10..-6", "-5..-1", "0", "1..5", "6..10", "11..20", "≥ 21"]
+METRICS = ["Items", "Late", "PO Critical", "Not computed"]
+_NO_DELTA = len(BIN_LABELS)  # bin slot for rows without a Delta/Float
+USED_COLS = ["Equipment", "ROJ", "Delta/Float (days)", "Status", "Delivery Date"]
+
+def row_keys(results: pd.DataFrame, calendar: str) -> np.ndarray:
+    """uint64 per result row over what `contributions` reads; repeated rows get distinct keys."""
+    if results is None or results.empty:
+        return np.zeros(0, dtype=np.uint64)
+    # Hashed as-is (no result_cache canonical form): " Late" must not match "Late" here.
+    h = pd.util.hash_pandas_object(results[USED_COLS].assign(Calendar=calendar), index=False).to_numpy()
+    nth = pd.Series(h).groupby(h, sort=False).cumcount().to_numpy(dtype=np.uint64)
+    return pd.util.hash_pandas_object(pd.DataFrame({"h": h, "n": nth}), index=False).to_numpy()
+
+def contributions(results: pd.DataFrame, calendar: str) -> pd.DataFrame:
+    """One row per result row: group keys + the metric flags / histogram bin it adds."""
+    cols = GROUP_KEYS + ["late", "critical", "missing", "bin"]
+    if results is None or results.empty:
+        return pd.DataFrame(columns=cols)
+    roj = pd.to_datetime(results["ROJ"], errors="coerce")
+    delta = pd.to_numeric(results["Delta/Float (days)"], errors="coerce").to_numpy(dtype="float64")
+    bins = np.where(np.isnan(delta), _NO_DELTA, np.digitize(np.nan_to_num(delta), BIN_EDGES))
+    status = results["Status"].astype("object")
+    return pd.DataFrame({
+        "Equipment": results["Equipment"].fillna("").astype(str).str.strip().to_numpy(),
+        "Calendar": calendar,
+        "ROJ Month": roj.dt.strftime("%Y-%m").fillna("").to_numpy(),
+        "late": status.eq(LATE).to_numpy(dtype=np.int64),
+        "critical": status.eq(PO_CRITICAL).to_numpy(dtype=np.int64),
+        "missing": results["Delivery Date"].isna().to_numpy(dtype=np.int64),
+        "bin": bins.astype(np.int64),
+    })[cols]
+
+class Portfolio:
+    """Thread-safe aggregates shared by every session (held via st.cache_resource)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._projects = {}  # name -> contributions frame last applied, indexed by row_keys
+        self._cells = {}     # (equipment, calendar, month) -> int64 [items, late, critical, missing, *bins]
+        self._payments = {}  # name -> cashflow.payments of the last results (projects with costs only)
+        self.touched = 0     # cells changed by the last update (for the UI / benchmarks)
+
+    def _apply(self, net: pd.DataFrame):
+        width = len(METRICS) + len(BIN_LABELS) + 1
+        for row in net.itertuples(index=False):
+            key = (row.Equipment, row.Calendar, row[2])
+            cell = self._cells.get(key)
+            if cell is None:
+                cell = self._cells[key] = np.zeros(width, dtype=np.int64)
+            w = row.weight
+            cell[0] += w
+            cell[1] += w * row.late
+            cell[2] += w * row.critical
+            cell[3] += w * row.missing
+            cell[len(METRICS) + row.bin] += w
+            if not cell[0]:
+                del self._cells[key]
+        self.touched = len(net)
+
+    def update(self, project: str, calendar: str, results: pd.DataFrame):
+        keys = row_keys(results, calendar)
+        paid = cashflow.payments(results, project)
+        with self._lock:
+            if paid.empty:
+                self._payments.pop(project, None)
+            else:
+                self._payments[project] = paid
+            old = self._projects.get(project)
+            if old is None:
+                old = contributions(None, calendar)
+            added = ~np.isin(keys, old.index.to_numpy())
+            gone = old[~old.index.isin(keys)]
+            new = contributions(results[added] if len(keys) else results, calendar).set_axis(keys[added])
+            kept = old.drop(gone.index)
+            self._projects[project] = pd.concat([kept, new]) if len(kept) and len(new) else new if len(new) else kept
+            changed = [f for f in (gone.assign(weight=-1), new.assign(weight=1)) if len(f)]
+            if not changed:
+                self.touched = 0
+                return
+            both = pd.concat(changed, ignore_index=True)
+            net = both.groupby(list(new.columns), sort=False, as_index=False)["weight"].sum()
+            self._apply(net[net["weight"] != 0])
+
+    def remove(self, project: str):
+        with self._lock:
+            self._payments.pop(project, None)
+            old = self._projects.pop(project, None)
+            if old is not None and not old.empty:
+                net = old.groupby(list(old.columns), sort=False, as_index=False).size()
+                self._apply(net.rename(columns={"size": "weight"}).assign(weight=lambda d: -d["weight"]))
+
+    def projects(self):
+        with self._lock:
+            return sorted(self._projects)
+
+    def frame(self, by=GROUP_KEYS) -> pd.DataFrame:
+        """Cells rolled up to the `by` keys (a subset of GROUP_KEYS)."""
+        with self._lock:
+            keys = list(self._cells)
+            vals = np.array(list(self._cells.values())) if keys else np.zeros((0, len(METRICS) + len(BIN_LABELS) + 1))
+        df = pd.DataFrame(keys, columns=GROUP_KEYS)
+        stats = pd.DataFrame(vals[:, :len(METRICS) + len(BIN_LABELS)].astype(np.int64),
+                             columns=METRICS + BIN_LABELS)
+        df = pd.concat([df, stats], axis=1)
+        by = list(by)
+        if not by:
+            return df[METRICS + BIN_LABELS].sum().to_frame().T
+        return df.groupby(by, as_index=False)[METRICS + BIN_LABELS].sum().sort_values(
+            ["Late", "PO Critical"], ascending=False, ignore_index=True)
+
+    def cash_flow(self) -> pd.DataFrame:
+        """Monthly cash out per project (cashflow.monthly) across every project with costs."""
+        with self._lock:
+            paid = list(self._payments.values())
+        if not paid:
+            return cashflow.monthly(pd.DataFrame(columns=cashflow.PAYMENT_COLS))
+        return cashflow.monthly(pd.concat(paid, ignore_index=True))
+
+    def totals(self) -> dict:
+        t = self.frame(by=[])
+        return {m: int(t[m].iloc[0]) for m in METRICS}
+
+    def histogram(self) -> pd.Series:
+        t = self.frame(by=[])
+        return t[BIN_LABELS].iloc[0].astype(int).rename("Items")
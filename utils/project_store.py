@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import utils.result_cache as result_cache
+
+# ======================= Project workspace (SQLite) =======================
+# One row per equipment line, keyed by (project, row ID) and stored as JSON next to
+# a 64-bit content hash and a sort key. Row IDs are the master table's stable index
+# (see utils/grid.py), so inserting or deleting a line doesn't renumber the others:
+# `save` re-hashes the editor table with one vectorized pass and only writes rows whose
+# hash moved or that are new (new lines get a sort key between their neighbours), and
+# deletes the IDs that went away. Autosaving a 5,000-line project after editing one
+# cell, adding or removing a line is a one-row write.
+# Nothing is kept in memory here; the session holds only the active project's table.
+
+STORE_PATH = os.environ.get("PROCUREMENT_WORKSPACE", "workspace/projects.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    name       TEXT PRIMARY KEY,
+    calendar   TEXT,
+    columns    TEXT NOT NULL,   -- JSON [[column, kind], ...]; kind is date / number / text
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS project_rows (
+    project TEXT NOT NULL REFERENCES projects(name) ON DELETE CASCADE,
+    rid     INTEGER NOT NULL,   -- stable row ID (the table's index)
+    ord     REAL NOT NULL,      -- sort key; row order on load
+    hash    INTEGER NOT NULL,
+    data    TEXT NOT NULL,
+    PRIMARY KEY (project, rid)
+) WITHOUT ROWID;
+"""
+
+def _migrate(con):
+    """Workspaces saved before row IDs keyed rows by position: that position becomes the ID."""
+    cols = [r[1] for r in con.execute("PRAGMA table_info(project_rows)")]
+    if "pos" in cols:
+        con.execute("ALTER TABLE project_rows RENAME COLUMN pos TO rid")
+        con.execute("ALTER TABLE project_rows ADD COLUMN ord REAL NOT NULL DEFAULT 0")
+        con.execute("UPDATE project_rows SET ord = rid")
+
+def _row_ids(df: pd.DataFrame) -> np.ndarray:
+    """The table's stable row IDs; positions when the index can't serve as one."""
+    if pd.api.types.is_integer_dtype(df.index) and df.index.is_unique:
+        return df.index.to_numpy(dtype=np.int64)
+    return np.arange(len(df), dtype=np.int64)
+
+def _sort_keys(ords: np.ndarray) -> np.ndarray:
+    """Fill the NaN (new) slots of `ords` between their known neighbours. Renumbers
+    everything when the known keys are out of order (rows were reordered) or a gap ran
+    out of float precision."""
+    known = ~np.isnan(ords)
+    if known.all() and (np.diff(ords) > 0).all():
+        return ords
+    if known.any() and (np.diff(ords[known]) > 0).all():
+        out = ords.copy()
+        new = np.flatnonzero(~known)
+        for run in np.split(new, np.flatnonzero(np.diff(new) > 1) + 1):
+            lo = out[run[0] - 1] if run[0] > 0 else None
+            hi = out[run[-1] + 1] if run[-1] + 1 < len(out) else None
+            if lo is None:
+                lo = (hi if hi is not None else 0.0) - len(run) - 1
+            if hi is None:
+                hi = lo + len(run) + 1
+            out[run] = lo + (hi - lo) * np.arange(1, len(run) + 1) / (len(run) + 1)
+        if (np.diff(out) > 0).all():
+            return out
+    return np.arange(len(ords), dtype="float64")
+
+def _kind(s: pd.Series) -> str:
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return "date"
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return "number"
+    return "text"
+
+class ProjectStore:
+    """Named equipment tables in one SQLite file; safe to share across sessions and threads."""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as con, con:
+            con.executescript(SCHEMA)
+            _migrate(con)
+
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=10)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA foreign_keys=ON")
+        return con
+
+    def projects(self):
+        with closing(self._connect()) as con:
+            return [r[0] for r in con.execute("SELECT name FROM projects ORDER BY name")]
+
+    def meta(self, name):
+        with closing(self._connect()) as con:
+            row = con.execute("SELECT calendar, updated_at, (SELECT COUNT(*) FROM project_rows WHERE project = ?) "
+                              "FROM projects WHERE name = ?", (name, name)).fetchone()
+        if row is None:
+            return None
+        return {"calendar": row[0], "updated_at": row[1], "rows": row[2]}
+
+    def load(self, name):
+        """The project's table with its saved column order, dtypes and row IDs (the index);
+        None if it doesn't exist."""
+        with closing(self._connect()) as con:
+            head = con.execute("SELECT columns FROM projects WHERE name = ?", (name,)).fetchone()
+            if head is None:
+                return None
+            rows = con.execute("SELECT rid, data FROM project_rows WHERE project = ? ORDER BY ord", (name,)).fetchall()
+        columns = json.loads(head[0])
+        df = pd.DataFrame.from_records([json.loads(d) for _, d in rows], columns=[c for c, _ in columns],
+                                       index=pd.Index([r for r, _ in rows], dtype="int64"))
+        for c, kind in columns:
+            if kind == "date":
+                df[c] = pd.to_datetime(df[c], errors="coerce")
+            elif kind == "number":
+                df[c] = pd.to_numeric(df[c], errors="coerce")
+            else:
+                df[c] = df[c].astype("object").where(df[c].notna(), None)
+        return df
+
+    def save(self, name, df: pd.DataFrame, calendar=None) -> int:
+        """Write the rows that changed since the last save; returns how many were written."""
+        ids = _row_ids(df)
+        hashes = result_cache.row_hashes(df).view(np.int64)
+        columns = json.dumps([[str(c), _kind(df[c])] for c in df.columns])
+        with closing(self._connect()) as con, con:
+            old = pd.DataFrame(con.execute("SELECT rid, hash, ord FROM project_rows WHERE project = ?", (name,)).fetchall(),
+                               columns=["rid", "hash", "ord"]).set_index("rid")
+            old["hash"] = old["hash"].astype("Int64")  # nullable: reindexing must not round via float
+            old_cols = con.execute("SELECT columns FROM projects WHERE name = ?", (name,)).fetchone()
+            if old_cols is not None and old_cols[0] != columns:
+                old["hash"] = pd.Series(pd.NA, index=old.index, dtype="Int64")  # schema changed: rewrite every row
+            prev = old.reindex(ids)
+            ords = _sort_keys(prev["ord"].to_numpy(dtype="float64"))
+            changed = np.flatnonzero(prev["hash"].ne(hashes).fillna(True).to_numpy(dtype=bool)
+                                     | (prev["ord"].to_numpy(dtype="float64") != ords))
+            gone = old.index.difference(ids)
+            con.execute(
+                "INSERT INTO projects (name, calendar, columns, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET calendar = COALESCE(excluded.calendar, calendar), "
+                "columns = excluded.columns, updated_at = excluded.updated_at",
+                (name, calendar, columns, time.time()))
+            if changed.size:
+                records = json.loads(df.iloc[changed].to_json(orient="records", date_format="iso", date_unit="s"))
+                con.executemany(
+                    "INSERT OR REPLACE INTO project_rows (project, rid, ord, hash, data) VALUES (?, ?, ?, ?, ?)",
+                    [(name, int(ids[i]), float(ords[i]), int(hashes[i]), json.dumps(r, ensure_ascii=False))
+                     for i, r in zip(changed, records)])
+            if len(gone):
+                con.executemany("DELETE FROM project_rows WHERE project = ? AND rid = ?",
+                                [(name, int(r)) for r in gone])
+        return len(changed)
+
+    def delete(self, name):
+        with closing(self._connect()) as con, con:
+            con.execute("DELETE FROM projects WHERE name = ?", (name,))
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+import utils.workdays as workdays
+
+# ======================= Query index over computed schedules =======================
+DATE_KEYS = ["PO Execution", "Delivery Date", "ROJ"]
+EQUALITY_KEYS = ["Status", "Mode"]
+
+class ScheduleIndex:
+    """Sorted date indexes + per-value bitmaps over a `compute_all` result table.
+
+    Range filters on DATE_KEYS are two binary searches into a presorted array;
+    equality filters on EQUALITY_KEYS OR together precomputed boolean masks.
+    All filters return a boolean mask aligned with the source rows.
+    """
+
+    def __init__(self, results: pd.DataFrame):
+        self.source = results
+        self.n = 0 if results is None else len(results)
+        self._sorted = {}   # col -> (sorted datetime64[D] values, row positions)
+        self._bitmaps = {}  # col -> {value: bool mask}
+        if not self.n:
+            return
+        for c in DATE_KEYS:
+            if c not in results.columns:
+                continue
+            vals = pd.to_datetime(results[c], errors="coerce").to_numpy(dtype="datetime64[D]")
+            pos = np.flatnonzero(~np.isnat(vals))
+            order = pos[np.argsort(vals[pos], kind="stable")]
+            self._sorted[c] = (vals[order], order)
+        for c in EQUALITY_KEYS:
+            if c not in results.columns:
+                continue
+            codes, uniques = pd.factorize(results[c].fillna(""), sort=True)
+            self._bitmaps[c] = {u: codes == i for i, u in enumerate(uniques)}
+
+    def all(self) -> np.ndarray:
+        return np.ones(self.n, dtype=bool)
+
+    def values(self, col) -> list:
+        """Distinct values for an equality key (empty string = blank)."""
+        return list(self._bitmaps.get(col, {}).keys())
+
+    def date_range(self, col, start=None, end=None) -> np.ndarray:
+        """Rows whose `col` falls in [start, end] (either bound optional). NaT never matches."""
+        mask = np.zeros(self.n, dtype=bool)
+        if col not in self._sorted:
+            return mask
+        vals, order = self._sorted[col]
+        lo = 0 if start is None else np.searchsorted(vals, np.datetime64(pd.to_datetime(start).date()), side="left")
+        hi = len(vals) if end is None else np.searchsorted(vals, np.datetime64(pd.to_datetime(end).date()), side="right")
+        if hi > lo:
+            mask[order[lo:hi]] = True
+        return mask
+
+    def equals(self, col, values) -> np.ndarray:
+        """Rows whose `col` is any of `values`."""
+        mask = np.zeros(self.n, dtype=bool)
+        bitmaps = self._bitmaps.get(col, {})
+        for v in values:
+            bm = bitmaps.get("" if v is None else v)
+            if bm is not None:
+                mask |= bm
+        return mask
+
+    def text_contains(self, col, needle) -> np.ndarray:
+        """Case-insensitive substring match (plain scan; free text isn't indexed)."""
+        if not needle or col not in self.source.columns:
+            return self.all()
+        return self.source[col].fillna("").astype(str).str.contains(needle, case=False, regex=False).to_numpy()
+
+    def select(self, mask) -> pd.DataFrame:
+        return self.source[mask]
+
+def within_business_days(today, days, holidays=None):
+    """Inclusive [today, today + N business days] window for 'due in the next N bd' filters."""
+    start = np.datetime64(pd.to_datetime(today).date())
+    end = workdays.table(holidays).offset([start], [int(days)], "forward")[0]
+    return pd.Timestamp(start), pd.Timestamp(end)
+
+def apply_filters(index: ScheduleIndex, filters: dict, today=None, holidays=None) -> np.ndarray:
+    """Combine the sidebar filter spec into a single row mask.
+
+    `filters` keys (all optional): "Status", "Mode" (lists), "Equipment" (substring),
+    "Date field" + "Date range" (start, end), "Due within (bd)" (PO Execution window).
+    """
+    mask = index.all()
+    for c in EQUALITY_KEYS:
+        chosen = filters.get(c)
+        if chosen:
+            mask &= index.equals(c, chosen)
+    mask &= index.text_contains("Equipment", filters.get("Equipment"))
+    field = filters.get("Date field")
+    rng = filters.get("Date range")
+    if field in DATE_KEYS and rng:
+        start, end = (list(rng) + [None, None])[:2]
+        mask &= index.date_range(field, start, end)
+    due = filters.get("Due within (bd)")
+    if due and today is not None:
+        start, end = within_business_days(today, due, holidays)
+        mask &= index.date_range("PO Execution", start, end)
+    return mask
@@ -0,0 +1,152 @@
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# ======================= Process-wide result cache =======================
+# Shared by every session on the server (held via st.cache_resource). Values are
+# treated as immutable: callers must copy before mutating anything they get back.
+
+MAX_ENTRIES = 512
+MAX_BYTES = 256 * 1024 * 1024
+TTL_S = 3600
+
+_DATE_HINTS = ("Start", "End", "Date", "ROJ", "PO Execution")
+_MISS = object()
+
+def _canonical_col(s: pd.Series) -> pd.Series:
+    name = str(s.name)
+    if pd.api.types.is_datetime64_any_dtype(s) or (s.dtype == object and any(h in name for h in _DATE_HINTS)):
+        return pd.to_datetime(s, errors="coerce").dt.normalize().astype("datetime64[ns]")
+    if "(days)" in name or "(bd)" in name:
+        return pd.to_numeric(s, errors="coerce").astype("float64")
+    if s.dtype == object:
+        return s.map(lambda v: "" if v is None or (not isinstance(v, str) and pd.isna(v)) else str(v).strip())
+    return s
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Content hash that ignores row index and dtype noise (object vs datetime, int vs float)."""
+    if df is None or df.empty:
+        return "empty"
+    h = hashlib.sha1()
+    cols = [str(c) for c in df.columns]
+    h.update("\x1f".join(cols).encode())
+    h.update(row_hashes(df).tobytes())
+    return h.hexdigest()
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """uint64 per row over the same canonical form as `frame_digest` (index ignored)."""
+    if df is None or df.empty:
+        return np.zeros(0, dtype=np.uint64)
+    canon = pd.DataFrame({c: _canonical_col(df[c]) for c in df.columns})
+    return pd.util.hash_pandas_object(canon, index=False).to_numpy()
+
+def make_key(*parts) -> str:
+    h = hashlib.sha1()
+    for p in parts:
+        h.update((p if isinstance(p, str) else frame_digest(p) if isinstance(p, pd.DataFrame) else repr(p)).encode())
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+def sizeof(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+class ResultCache:
+    """Thread-safe LRU with per-entry TTL and a byte cap.
+
+    `get_or_compute` also collapses concurrent misses for the same key: the first
+    caller computes, the others wait for its result instead of duplicating the work.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, ttl_s=TTL_S):
+        self.max_entries, self.max_bytes, self.ttl_s = max_entries, max_bytes, ttl_s
+        self._data = OrderedDict()  # key -> (value, nbytes, expires_at)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def _drop(self, key):
+        _, nbytes, _ = self._data.pop(key)
+        self.bytes -= nbytes
+
+    def _lookup(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return _MISS
+        if item[2] < time.monotonic():
+            self._drop(key)
+            self.evictions += 1
+            return _MISS
+        self._data.move_to_end(key)
+        return item[0]
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISS:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def put(self, key, value, nbytes=None):
+        nbytes = sizeof(value) if nbytes is None else nbytes
+        if nbytes > self.max_bytes:
+            return value
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (value, nbytes, time.monotonic() + self.ttl_s)
+            self.bytes += nbytes
+            while self._data and (len(self._data) > self.max_entries or self.bytes > self.max_bytes):
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key, fn):
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISS:
+                self.hits += 1
+                return value
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                self.misses += 1
+                event = self._inflight[key] = threading.Event()
+        if not owner:
+            event.wait()
+            with self._lock:
+                value = self._lookup(key)
+                if value is not _MISS:
+                    self.hits += 1
+            if value is not _MISS:
+                return value
+            return self.get_or_compute(key, fn)  # owner failed; try ourselves
+        try:
+            return self.put(key, fn())
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._data), "bytes": self.bytes, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,326 @@
+import pandas as pd
+import numpy as np
+from datetime import date
+
+import utils.dependencies as dependencies
+import utils.workdays as workdays
+
+# ================= Defaults / Constants =================
+DEFAULT_SUBMITTAL_DAYS = 15
+DEFAULT_SHIPPING_DAYS  = 15
+DEFAULT_BUFFER_DAYS    = 20
+
+# Optional progress actuals, in phase order (utils.engine replans only what comes after the latest).
+ACTUAL_COLS = ["Submittal Actual End", "Manufacturing Actual End", "Shipped"]
+
+def as_of_date(as_of=None) -> pd.Timestamp:
+    """Midnight of `as_of`, or of the real current date when None (read at call time, never cached)."""
+    return pd.Timestamp(date.today() if as_of is None else as_of).normalize()
+
+# ================= Helpers =================
+def as_int(x, default=0):
+    try:
+        if pd.isna(x) or x == "":
+            return default
+        return int(float(x))
+    except Exception:
+        return default
+
+def bday_add(start, days, holidays=None):
+    if pd.isna(start) or days is None: return pd.NaT
+    return pd.Timestamp(workdays.table(holidays).offset([pd.to_datetime(start).date()], [int(days)], "forward")[0])
+
+def bday_sub(end, days, holidays=None):
+    if pd.isna(end) or days is None: return pd.NaT
+    return pd.Timestamp(workdays.table(holidays).offset([pd.to_datetime(end).date()], [-int(days)], "backward")[0])
+
+def bday_diff(d1, d2, holidays):
+    if pd.isna(d1) or pd.isna(d2): return None
+    return int(workdays.table(holidays).count([pd.to_datetime(d1).date()], [pd.to_datetime(d2).date()])[0])
+
+def _needs_mfg_calc(val):
+    if pd.isna(val):
+        return True
+    if isinstance(val, str) and val.strip() == "":
+        return True
+    try:
+        return float(val) == 0.0
+    except (TypeError, ValueError):
+        return False
+
+def compute_pass(row, mode, holidays, as_of=None):
+    sub  = as_int(row.get("Submittal (days)"), DEFAULT_SUBMITTAL_DAYS)
+    mfg  = as_int(row.get("Manufacturing (days)"), 0)
+    ship = as_int(row.get("Shipping (days)"),  DEFAULT_SHIPPING_DAYS)
+    buf  = as_int(row.get("Buffer (days)"),    DEFAULT_BUFFER_DAYS)
+    po   = pd.to_datetime(row.get("PO Execution"), errors="coerce")
+    roj  = pd.to_datetime(row.get("ROJ"), errors="coerce")
+
+    if mode == "Forward":
+        if pd.isna(po): return {}
+        sub_end = bday_add(po, sub, holidays)
+        mfg_end = bday_add(sub_end, mfg, holidays)
+        ship_end = bday_add(mfg_end, ship, holidays)
+        roj_calc = bday_add(ship_end, buf, holidays)
+        return {"PO Execution": po,
+                "Submittal Start": po, "Submittal End": sub_end,
+                "Manufacturing Start": sub_end, "Manufacturing End": mfg_end,
+                "Shipping Start": mfg_end, "Shipping End": ship_end,
+                "Buffer Start": ship_end, "ROJ_calc": roj_calc, "Buffer End": roj_calc}
+
+    if mode == "Backward":
+        if pd.isna(roj): return {}
+        ship_end = bday_sub(roj, buf, holidays)
+        mfg_end  = bday_sub(ship_end, ship, holidays)
+        sub_end  = bday_sub(mfg_end, mfg, holidays)
+        po_calc  = bday_sub(sub_end, sub, holidays)
+        today = as_of_date(as_of)
+        if pd.notna(po_calc) and po_calc < today:
+            po_calc = today
+        return {"PO Execution": po_calc,
+                "Submittal Start": po_calc, "Submittal End": sub_end,
+                "Manufacturing Start": sub_end, "Manufacturing End": mfg_end,
+                "Shipping Start": mfg_end, "Shipping End": ship_end,
+                "Buffer Start": ship_end, "ROJ_calc": roj, "Buffer End": roj}
+    return {}
+
+def row_status(mode, roj_user, final_delivery, po_req, holiday_set, as_of=None):
+    """Status text + Delta/Float (days) for one computed row."""
+    delta = None
+    status = ""
+    if pd.notna(roj_user) and pd.notna(final_delivery):
+        delta = bday_diff(roj_user, final_delivery, holiday_set)
+        if delta is not None and delta > 0:
+            status = "⛔Late vs ROJ"
+        elif delta is not None and delta <= 0:
+            status = "✓ Meets/early vs ROJ"
+
+    flt = None
+    if mode == "Backward":
+        if pd.notna(po_req):
+            flt = bday_diff(as_of_date(as_of), po_req, holiday_set)
+            if flt is not None and flt <= 22:
+                status = "‼️PO is critical. Execute ASAP"
+
+    combo = delta if delta is not None else flt
+    return status, combo
+
+def compute_all(df: pd.DataFrame, holiday_set, as_of=None, link=True) -> pd.DataFrame:
+    recs = []
+    if df is None or df.empty:
+        return pd.DataFrame()
+    as_of = as_of_date(as_of)
+
+    calc = df.copy()
+    for c in ["ROJ","PO Execution","Delivery Date (committed)"]:
+        calc[c] = pd.to_datetime(calc.get(c), errors="coerce")
+    for c in ["Submittal (days)","Manufacturing (days)","Shipping (days)","Buffer (days)"]:
+        calc[c] = pd.to_numeric(calc.get(c), errors="coerce")
+
+    for _, row in calc.iterrows():
+        mode = str(row.get("Mode","") or "")
+        if mode not in ("Forward","Backward"):
+            continue
+
+        committed_delivery = row.get("Delivery Date (committed)")
+        po = row.get("PO Execution")
+        sub = as_int(row.get("Submittal (days)"), DEFAULT_SUBMITTAL_DAYS)
+        mfg = row.get("Manufacturing (days)")
+        ship = as_int(row.get("Shipping (days)"), DEFAULT_SHIPPING_DAYS)
+        buf = as_int(row.get("Buffer (days)"), DEFAULT_BUFFER_DAYS)
+
+        # Derive Manufacturing (days) if committed delivery is present (Forward)
+        if mode == "Forward" and pd.notna(committed_delivery) and _needs_mfg_calc(mfg) and pd.notna(po):
+            mfg_end = bday_sub(committed_delivery, buf, holiday_set)
+            mfg_end = bday_sub(mfg_end, ship, holiday_set)
+            sub_end = bday_add(po, sub, holiday_set)
+            if pd.notna(sub_end) and pd.notna(mfg_end):
+                mfg_dur = bday_diff(sub_end, mfg_end, holiday_set)
+                if mfg_dur is not None and mfg_dur < 0:
+                    mfg_dur = 0
+                row["Manufacturing (days)"] = mfg_dur
+
+        res = compute_pass(row, mode, holiday_set, as_of)
+        if not res:
+            status_msg = "Missing inputs for calculation."
+            po_display = row.get("PO Execution")
+            if mode == "Forward" and pd.isna(po):
+                status_msg = "⚠️Missing PO Execution; dates not computed"
+                po_display = None
+
+            recs.append({
+                "Equipment": row.get("Equipment",""),
+                "Predecessors": row.get("Predecessors"),
+                "Mode": mode,
+                "ROJ": row.get("ROJ"),
+                "PO Execution": po_display,
+                "Submittal (days)": sub,
+                "Submittal Start": None,
+                "Submittal End": None,
+                "Manufacturing (days)": as_int(row.get("Manufacturing (days)"), 0),
+                "Manufacturing Start": None,
+                "Manufacturing End": None,
+                "Shipping (days)": ship,
+                "Shipping Start": None,
+                "Shipping End": None,
+                "Buffer (days)": buf,
+                "Buffer Start": None,
+                "Status": status_msg,
+                "Delta/Float (days)": None,
+                "Delivery Date (committed)": committed_delivery,
+                "Delivery Date": None,
+            })
+            continue
+
+        ship_end = res.get("Shipping End")
+        buffer_end = res.get("Buffer End")
+        computed_delivery = buffer_end if buf > 0 else ship_end
+        final_delivery = computed_delivery
+
+        roj_user = row.get("ROJ")
+        status, combo = row_status(mode, roj_user, final_delivery, res.get("PO Execution"), holiday_set, as_of)
+
+        d = {
+            "Equipment": row.get("Equipment",""),
+            "Predecessors": row.get("Predecessors"),
+            "Mode": mode,
+            "ROJ": roj_user,
+            "PO Execution": res.get("PO Execution"),
+            "Submittal (days)": sub,
+            "Submittal Start": res.get("Submittal Start"), "Submittal End": res.get("Submittal End"),
+            "Manufacturing (days)": as_int(row.get("Manufacturing (days)"), 0),
+            "Manufacturing Start": res.get("Manufacturing Start"), "Manufacturing End": res.get("Manufacturing End"),
+            "Shipping (days)": ship,
+            "Shipping Start": res.get("Shipping Start"), "Shipping End": res.get("Shipping End"),
+            "Buffer (days)": buf, "Buffer Start": res.get("Buffer Start"),
+            "Status": status if status else None,
+            "Delta/Float (days)": combo,
+            "Delivery Date (committed)": committed_delivery,
+            "Delivery Date": final_delivery,
+        }
+        recs.append(d)
+
+    if not recs:
+        return pd.DataFrame()
+
+    out = pd.DataFrame(recs)
+    if link and has_links(out):
+        out = apply_predecessors(out, holiday_set, as_of)
+    table_cols = [
+        "Equipment","Predecessors","Mode","ROJ","PO Execution",
+        "Submittal (days)","Submittal Start","Submittal End",
+        "Manufacturing (days)","Manufacturing Start","Manufacturing End",
+        "Shipping (days)","Shipping Start","Shipping End",
+        "Buffer (days)","Buffer Start",
+        "Status","Delta/Float (days)","Total Float (bd)","Critical Path",
+        "Delivery Date (committed)","Delivery Date",
+    ]
+    if "Predecessors" not in df.columns:
+        table_cols.remove("Predecessors")
+    existing = [c for c in table_cols if c in out.columns]
+    return out[existing]
+
+def has_links(out: pd.DataFrame) -> bool:
+    return "Predecessors" in out.columns and bool(out["Predecessors"].map(dependencies.parse_predecessors).map(len).any())
+
+def actual_masks(out: pd.DataFrame):
+    """(started, shipped) per row: any actual date entered / a Shipped date entered."""
+    def has(c):
+        if c not in out.columns:
+            return np.zeros(len(out), dtype=bool)
+        return pd.to_datetime(out[c], errors="coerce").notna().to_numpy()
+    started = np.zeros(len(out), dtype=bool)
+    for c in ACTUAL_COLS:
+        started |= has(c)
+    return started, has("Shipped")
+
+def apply_predecessors(out: pd.DataFrame, holiday_set, as_of=None) -> pd.DataFrame:
+    """Shift dates for finish-to-start links, then refresh Status / Delta for moved rows.
+
+    Rows with actuals are already ordered, so they are never pulled earlier, and shipped
+    rows are never held.
+    """
+    links, _ = dependencies.build_links(out["Equipment"], out["Predecessors"])
+    started, shipped = actual_masks(out)
+    try:
+        out, changed = dependencies.propagate(out, links, holiday_set, as_of_date(as_of),
+                                              started=started, shipped=shipped)
+    except dependencies.CycleError as e:
+        raise dependencies.CycleError(out["Equipment"].iloc[e.nodes]) from None
+    mode, roj, delivery, po = (out[c].to_numpy() for c in ("Mode", "ROJ", "Delivery Date", "PO Execution"))
+    for i in np.flatnonzero(changed):
+        m = "Forward" if started[i] else mode[i]   # ordered: no PO float
+        status, combo = row_status(m, roj[i], delivery[i], po[i], holiday_set, as_of)
+        out.at[i, "Status"] = status if status else None
+        out.at[i, "Delta/Float (days)"] = combo
+    return out
+
+# ====== NEW: Baseline helpers ===================================================
+DATE_COLS = [
+    "PO Execution","Submittal Start","Submittal End",
+    "Manufacturing Start","Manufacturing End",
+    "Shipping Start","Shipping End",
+    "Buffer Start","Delivery Date","ROJ","Delivery Date (committed)"
+]
+
+def _norm_dates(df: pd.DataFrame) -> pd.DataFrame:
+    if df is None or df.empty:
+        return df
+    out = df.copy()
+    for c in DATE_COLS:
+        if c in out.columns:
+            out[c] = pd.to_datetime(out[c], errors="coerce")
+    return out
+
+def compare_to_baseline(current: pd.DataFrame, baseline: pd.DataFrame, holiday_set) -> pd.DataFrame:
+    """Return a tidy comparison with Δ (business days) per key date."""
+    if current is None or current.empty or baseline is None or baseline.empty:
+        return pd.DataFrame()
+
+    cur = _norm_dates(current)
+    base = _norm_dates(baseline)
+
+    # Merge on Equipment (assumes unique Equipment per row; if not, consider adding an ID)
+    merged = pd.merge(
+        base.add_prefix("Base: "),
+        cur.add_prefix("New: "),
+        left_on="Base: Equipment", right_on="New: Equipment",
+        how="outer", indicator=True
+    )
+
+    # Compute deltas for each comparable date field
+    def delta_col(col_name):
+        bcol = f"Base: {col_name}"
+        ncol = f"New: {col_name}"
+        if bcol in merged.columns and ncol in merged.columns:
+            merged[f"Δ {col_name} (bd)"] = merged.apply(
+                lambda r: bday_diff(r[bcol], r[ncol], holiday_set) if not (pd.isna(r[bcol]) or pd.isna(r[ncol])) else None,
+                axis=1
+            )
+
+    for c in ["PO Execution","Submittal End","Manufacturing End","Shipping End","Delivery Date","ROJ"]:
+        delta_col(c)
+
+    # Flags
+    merged["Changed?"] = merged.apply(
+        lambda r: any([
+            r.get(f"Δ {c} (bd)") not in (None, 0) for c in ["PO Execution","Submittal End","Manufacturing End","Shipping End","Delivery Date","ROJ"]
+        ]),
+        axis=1
+    )
+
+    # Pretty ordering
+    keep = [
+        "New: Equipment","Changed?",
+        "Base: Mode","New: Mode",
+        "Base: PO Execution","New: PO Execution","Δ PO Execution (bd)",
+        "Base: Submittal End","New: Submittal End","Δ Submittal End (bd)",
+        "Base: Manufacturing End","New: Manufacturing End","Δ Manufacturing End (bd)",
+        "Base: Shipping End","New: Shipping End","Δ Shipping End (bd)",
+        "Base: Delivery Date","New: Delivery Date","Δ Delivery Date (bd)",
+        "Base: ROJ","New: ROJ","Δ ROJ (bd)",
+        "Base: Status","New: Status","Base: Delta/Float (days)","New: Delta/Float (days)"
+    ]
+    keep = [c for c in keep if c in merged.columns]
+    merged = merged[keep].rename(columns={"New: Equipment":"Equipment"})
+    return merged
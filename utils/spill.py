@@ -0,0 +1,228 @@
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+
+import pandas as pd
+
+from utils.result_cache import sizeof
+
+try:  # optional: Arrow IPC files are memory-mapped on reload; without pyarrow frames are pickled
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+# ======================= Session memory budget =======================
+# Between script runs a session's large frames (work_df, results, baseline) live in a
+# SessionFrames object instead of st.session_state. A session over its budget, or the
+# least recently active sessions once the whole server is over its budget, write their
+# frames to disk and drop them from memory; objects derived from those frames (the
+# results index, the timeline figure) are simply dropped and rebuilt. Spilled frames
+# stay on disk until the script first asks for one (`get`), so a run that never reads
+# the baseline never loads it. Files live in one directory per process and are removed
+# when the session goes away.
+
+SPILL_DIR = os.environ.get("PROCUREMENT_SPILL_DIR", ".cache/spill")
+SESSION_BUDGET = int(float(os.environ.get("PROCUREMENT_SESSION_MB", 64)) * 2**20)
+SERVER_BUDGET = int(float(os.environ.get("PROCUREMENT_SERVER_MB", 2048)) * 2**20)
+_MIN_SPILL_BYTES = 256 * 1024   # smaller frames aren't worth a file
+
+def _arrow_safe(df: pd.DataFrame) -> bool:
+    """Arrow round-trips the frame exactly (object columns hold only strings / missing)."""
+    if pa is None:
+        return False
+    for c in df.columns:
+        if df[c].dtype == object and pd.api.types.infer_dtype(df[c], skipna=True) not in ("string", "empty"):
+            return False
+    return all(isinstance(c, str) for c in df.columns)
+
+def _write(df: pd.DataFrame, stem: str) -> str:
+    if _arrow_safe(df):
+        path = stem + ".arrow"
+        feather.write_feather(df, path, compression="uncompressed")
+    else:
+        path = stem + ".pkl"
+        df.to_pickle(path)
+    return path
+
+def _read(path: str) -> pd.DataFrame:
+    if path.endswith(".arrow"):
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all().to_pandas()
+    return pd.read_pickle(path)
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def process_rss():
+    """Resident set size of this process in bytes (peak RSS where /proc is unavailable), or None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+class SessionFrames:
+    """One session's large frames between runs; `checkout` at the top of the script, `checkin` at the end."""
+
+    def __init__(self, registry, budget=SESSION_BUDGET):
+        self.registry, self.budget = registry, budget
+        self.dir = os.path.join(registry.dir, f"s{next(registry._ids)}")
+        self.last_active = time.monotonic()
+        self._lock = threading.Lock()
+        self._held = {}      # name -> frame kept in memory
+        self._spilled = {}   # name -> (file path, rows); read back on first `get`
+        self._derived = {}   # name -> object rebuilt from the frames; dropped on spill
+        self._sizes = {}     # name -> (frame, bytes), so unchanged frames aren't re-measured
+        weakref.finalize(self, shutil.rmtree, self.dir, True)
+
+    @property
+    def held_bytes(self):
+        return sum(self._sizes[n][1] for n in self._held)
+
+    @property
+    def spilled_bytes(self):
+        return sum(self._sizes[n][1] for n in self._spilled)
+
+    @property
+    def live_bytes(self):
+        """Frames currently checked out into session state (the session is running)."""
+        return sum(b for n, (_, b) in self._sizes.items() if n not in self._held and n not in self._spilled)
+
+    def checkout(self, state):
+        """Put the held frames back into session state; spilled ones wait for `get`.
+
+        A name already in the state was set since the last checkin (a fragment run) and wins.
+        """
+        with self._lock:
+            for name, frame in self._held.items():
+                if name not in state:
+                    state[name] = frame
+            for name, obj in self._derived.items():
+                if name not in state:
+                    state[name] = obj
+            self._held, self._derived = {}, {}
+            self.last_active = time.monotonic()
+
+    def get(self, state, name, default=None):
+        """`state[name]`, reading the frame back from disk first if it was spilled."""
+        with self._lock:
+            path, _ = self._spilled.pop(name, (None, 0))
+            if path is not None:
+                if name not in state:
+                    state[name] = _read(path)
+                    self.registry.loads += 1
+                _remove(path)
+        return state.get(name, default)
+
+    def rows(self, state, name):
+        """Row count of a frame without reading it back from disk."""
+        with self._lock:
+            if name in self._spilled and name not in state:
+                return self._spilled[name][1]
+        frame = state.get(name)
+        return len(frame) if isinstance(frame, pd.DataFrame) else 0
+
+    def checkin(self, state, frames, derived=()):
+        """Move `frames` (and `derived` objects) out of session state; spill if over budget.
+        Spilled frames the run never asked for stay where they are."""
+        with self._lock:
+            for name in frames:
+                frame = state.get(name)
+                if not isinstance(frame, pd.DataFrame):
+                    continue
+                if name in self._spilled:  # replaced without being read: the file is stale
+                    _remove(self._spilled.pop(name)[0])
+                prev = self._sizes.get(name)
+                if prev is None or prev[0] is not frame:
+                    self._sizes[name] = (frame, sizeof(frame))
+                self._held[name] = frame
+                del state[name]
+            for name in derived:
+                if name in state:
+                    self._derived[name] = state[name]
+                    del state[name]
+            self._sizes = {n: v for n, v in self._sizes.items() if n in self._held or n in self._spilled}
+            self.last_active = time.monotonic()
+            if self.held_bytes > self.budget:
+                self._spill()
+        self.registry.enforce()
+
+    def spill(self):
+        """Write every held frame to disk; returns the bytes released."""
+        with self._lock:
+            return self._spill()
+
+    def _spill(self):
+        freed = 0
+        for name, frame in sorted(self._held.items(), key=lambda kv: -self._sizes[kv[0]][1]):
+            nbytes = self._sizes[name][1]
+            if nbytes < _MIN_SPILL_BYTES:
+                continue
+            os.makedirs(self.dir, exist_ok=True)
+            self._spilled[name] = (_write(frame, os.path.join(self.dir, name)), len(frame))
+            self._sizes[name] = (None, nbytes)
+            del self._held[name]
+            freed += nbytes
+            self.registry.spills += 1
+        if freed:
+            self._derived.clear()
+        return freed
+
+class MemoryRegistry:
+    """Every session's SessionFrames in this process, with a server-wide budget (held via st.cache_resource)."""
+
+    def __init__(self, budget=SERVER_BUDGET, directory=SPILL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.dir = tempfile.mkdtemp(prefix=f"{os.getpid()}-", dir=directory)
+        self.budget = budget
+        self.spills = self.loads = 0
+        self._ids = itertools.count()
+        self._sessions = weakref.WeakSet()
+        self._lock = threading.Lock()
+        weakref.finalize(self, shutil.rmtree, self.dir, True)
+
+    def session(self, budget=SESSION_BUDGET) -> SessionFrames:
+        frames = SessionFrames(self, budget)
+        with self._lock:
+            self._sessions.add(frames)
+        return frames
+
+    def _snapshot(self):
+        with self._lock:
+            return list(self._sessions)
+
+    def enforce(self):
+        """Spill the least recently active sessions until held frames fit the server budget."""
+        sessions = sorted(self._snapshot(), key=lambda s: s.last_active)
+        total = sum(s.held_bytes for s in sessions)
+        for s in sessions:
+            if total <= self.budget:
+                break
+            total -= s.spill()
+
+    def stats(self):
+        sessions = self._snapshot()
+        return {
+            "sessions": len(sessions),
+            "running_bytes": sum(s.live_bytes for s in sessions),
+            "held_bytes": sum(s.held_bytes for s in sessions),
+            "spilled_bytes": sum(s.spilled_bytes for s in sessions),
+            "spills": self.spills,
+            "loads": self.loads,
+            "rss_bytes": process_rss(),
+        }
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+import utils.engine as engine
+import utils.schedule as schedule
+
+# ======================= Streaming schedule evaluation =======================
+# For inputs too big to hold at once (nightly portfolio roll-ups, multi-year history):
+# pull row batches from any iterator, run each through the vectorized engine with one
+# shared busday calendar, yield the result batch, and fold it into running totals.
+# Only the current batch and the per-category totals are ever in memory.
+#
+# Predecessor links resolve within a batch only; keep linked rows in the same chunk.
+
+LATE = "⛔Late vs ROJ"
+PO_CRITICAL = "‼️PO is critical. Execute ASAP"
+BATCH_ROWS = 50_000
+
+def csv_batches(path, batch_rows=BATCH_ROWS, **read_csv_kw):
+    yield from pd.read_csv(path, chunksize=batch_rows, **read_csv_kw)
+
+def parquet_batches(path, batch_rows=BATCH_ROWS, columns=None):
+    import pyarrow.parquet as pq
+    for rb in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+        yield rb.to_pandas()
+
+def cursor_batches(cursor, batch_rows=BATCH_ROWS):
+    """DB-API cursor (sqlite3, psycopg, ...) after `execute`; column names from `description`."""
+    cols = [d[0] for d in cursor.description]
+    while rows := cursor.fetchmany(batch_rows):
+        yield pd.DataFrame.from_records(rows, columns=cols)
+
+def frame_batches(df, batch_rows=BATCH_ROWS):
+    for start in range(0, len(df), batch_rows):
+        yield df.iloc[start:start + batch_rows]
+
+class RunningTotals:
+    """Counts and worst slack folded in batch by batch; memory grows with categories, not rows.
+
+    Slack is business days of room vs ROJ (-Delta/Float), so the worst item is the minimum.
+    """
+
+    def __init__(self, category="Equipment"):
+        self.category = category
+        self.rows = self.late = self.po_critical = self.not_computed = 0
+        self.by_category = {}  # name -> {"rows", "late", "po_critical", "worst_slack"}
+
+    def update(self, res: pd.DataFrame):
+        if res is None or res.empty:
+            return self
+        status = res["Status"].astype("object")
+        late = status.eq(LATE).to_numpy()
+        crit = status.eq(PO_CRITICAL).to_numpy()
+        slack = -pd.to_numeric(res["Delta/Float (days)"], errors="coerce").to_numpy(dtype="float64")
+        self.rows += len(res)
+        self.late += int(late.sum())
+        self.po_critical += int(crit.sum())
+        self.not_computed += int(res["Delivery Date"].isna().sum())
+
+        cat = res[self.category].fillna("").astype(str).str.strip() if self.category in res.columns \
+            else pd.Series([""] * len(res))
+        codes, names = pd.factorize(cat)
+        k = len(names)
+        n_rows = np.bincount(codes, minlength=k)
+        n_late = np.bincount(codes, weights=late, minlength=k)
+        n_crit = np.bincount(codes, weights=crit, minlength=k)
+        worst = np.full(k, np.inf)
+        ok = ~np.isnan(slack)
+        np.minimum.at(worst, codes[ok], slack[ok])
+        for i, name in enumerate(names):
+            agg = self.by_category.setdefault(name, {"rows": 0, "late": 0, "po_critical": 0, "worst_slack": None})
+            agg["rows"] += int(n_rows[i])
+            agg["late"] += int(n_late[i])
+            agg["po_critical"] += int(n_crit[i])
+            if np.isfinite(worst[i]) and (agg["worst_slack"] is None or worst[i] < agg["worst_slack"]):
+                agg["worst_slack"] = int(worst[i])
+        return self
+
+    def summary(self) -> dict:
+        return {"rows": self.rows, "late": self.late, "po_critical": self.po_critical,
+                "not_computed": self.not_computed}
+
+    def to_frame(self) -> pd.DataFrame:
+        if not self.by_category:
+            return pd.DataFrame(columns=[self.category, "rows", "late", "po_critical", "worst_slack"])
+        df = pd.DataFrame.from_dict(self.by_category, orient="index").rename_axis(self.category).reset_index()
+        df["worst_slack"] = df["worst_slack"].astype("Int64")
+        return df.sort_values(["late", "po_critical", "worst_slack"], ascending=[False, False, True],
+                              na_position="last", ignore_index=True)
+
+def stream_schedule(batches, holiday_set, totals=None, as_of=None):
+    """Yield one computed result batch per input batch, updating `totals` as it goes.
+
+    `batches` is any iterable of DataFrames (see *_batches above). Pass a
+    RunningTotals to read the aggregates after (or during) iteration.
+    """
+    cal = engine.busdaycal(holiday_set)
+    as_of = schedule.as_of_date(as_of)  # one date for the whole run, even across midnight
+    for batch in batches:
+        res = engine.compute_all(batch, holiday_set, cal=cal, as_of=as_of)
+        if totals is not None:
+            totals.update(res)
+        yield res
+
+def rollup(batches, holiday_set, category="Equipment", as_of=None) -> RunningTotals:
+    """Drain the stream and keep only the aggregates."""
+    totals = RunningTotals(category)
+    for _ in stream_schedule(batches, holiday_set, totals, as_of):
+        pass
+    return totals
@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+
+import utils.schedule as schedule
+
+# ======================= Input validation / normalization =======================
+# One pass over the raw editor (or API) table: every column is coerced once, blanks and
+# junk get their defaults with array fills, and each row gets an error bitmask. The
+# vectorized engine only reads the typed arrays on `Inputs`, never the raw frame.
+
+NO_MODE         = 1 << 0   # Mode left blank: row not scheduled yet, skipped quietly
+MODE_INVALID    = 1 << 1   # Mode filled with something other than Forward/Backward: skipped
+MISSING_PO      = 1 << 2   # Forward without a PO Execution date
+MISSING_ROJ     = 1 << 3   # Backward without an ROJ
+BAD_PO          = 1 << 4   # something typed in PO Execution that isn't a date
+BAD_ROJ         = 1 << 5
+BAD_COMMITTED   = 1 << 6
+BAD_SUBMITTAL   = 1 << 7   # non-numeric duration: default used
+BAD_MFG         = 1 << 8
+BAD_SHIPPING    = 1 << 9
+BAD_BUFFER      = 1 << 10
+NEGATIVE_DAYS   = 1 << 11  # a duration below zero (kept, but almost always a typo)
+BAD_COST        = 1 << 12  # optional Cost column: not a number, or negative
+BAD_TERMS       = 1 << 13  # optional Payment Terms column: not deposit/progress/balance percentages
+BAD_ACTUAL      = 1 << 14  # something typed in an actual-date column that isn't a date
+ACTUAL_ORDER    = 1 << 15  # actual dates out of phase order (kept as entered)
+
+DEFAULT_TERMS = (30.0, 40.0, 30.0)   # % paid at PO Execution / Manufacturing End / Delivery Date
+
+SKIPPED = NO_MODE | MODE_INVALID
+FATAL = SKIPPED | MISSING_PO | MISSING_ROJ
+
+# Bits that replace the computed status, in the wording the row-wise engine uses.
+STATUS = {
+    MISSING_PO: "⚠️Missing PO Execution; dates not computed",
+    MISSING_ROJ: "Missing inputs for calculation.",
+}
+
+MESSAGES = {
+    MODE_INVALID: "Mode must be Forward or Backward; row skipped",
+    MISSING_PO: "Forward row has no PO Execution",
+    MISSING_ROJ: "Backward row has no ROJ",
+    BAD_PO: "PO Execution isn't a date; treated as blank",
+    BAD_ROJ: "ROJ isn't a date; treated as blank",
+    BAD_COMMITTED: "Delivery Date (committed) isn't a date; treated as blank",
+    BAD_SUBMITTAL: f"Submittal (days) isn't a number; {schedule.DEFAULT_SUBMITTAL_DAYS} used",
+    BAD_MFG: "Manufacturing (days) isn't a number; 0 used",
+    BAD_SHIPPING: f"Shipping (days) isn't a number; {schedule.DEFAULT_SHIPPING_DAYS} used",
+    BAD_BUFFER: f"Buffer (days) isn't a number; {schedule.DEFAULT_BUFFER_DAYS} used",
+    NEGATIVE_DAYS: "A duration is negative",
+    BAD_COST: "Cost isn't a non-negative number; left out of the cash flow",
+    BAD_TERMS: "Payment Terms should be three percentages adding to 100 (e.g. 30/40/30); 30/40/30 used",
+    BAD_ACTUAL: "An actual date isn't a date; treated as blank",
+    ACTUAL_ORDER: "Actual dates are out of order (Submittal ≤ Manufacturing ≤ Shipped)",
+}
+
+_TERMS_RE = r"^\s*(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)\s*%?\s*$"
+
+def _col(df, c):
+    return df[c] if c in df.columns else pd.Series([None] * len(df), index=df.index, dtype="object")
+
+def _junk(raw, missing):
+    """Rows that failed to coerce although something was typed (blank strings count as blank)."""
+    junk = missing & raw.notna().to_numpy()
+    if junk.any() and raw.dtype == object:
+        idx = np.flatnonzero(junk)
+        junk[idx] = ~raw.iloc[idx].astype(str).str.strip().eq("").to_numpy(dtype=bool)
+    return junk
+
+def _date(df, c, bit, errors):
+    raw = _col(df, c)
+    ts = raw if pd.api.types.is_datetime64_any_dtype(raw) else pd.to_datetime(raw, errors="coerce", format="mixed")
+    ts = ts.reset_index(drop=True)
+    days = ts.to_numpy(dtype="datetime64[D]")
+    errors[_junk(raw, np.isnat(days))] |= bit
+    return ts, days
+
+def _days(df, c, default, bit, errors):
+    raw = _col(df, c)
+    x = pd.to_numeric(raw, errors="coerce").to_numpy(dtype="float64")
+    ok = np.isfinite(x)
+    errors[_junk(raw, ~ok)] |= bit
+    errors[ok & (x < 0)] |= NEGATIVE_DAYS
+    return np.where(ok, np.trunc(np.where(ok, x, 0)), default).astype(np.int64), x
+
+def payment_terms(values):
+    """'30/40/30' per row -> (n x 3 payment fractions, bad mask). Blank rows get DEFAULT_TERMS quietly.
+
+    Distinct strings are parsed once, so a large table with a handful of terms costs one factorize.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype="object").fillna("").astype(str).str.strip())
+    if not len(uniques):
+        return np.zeros((0, 3)), np.zeros(0, dtype=bool)
+    parsed = pd.Series(uniques, dtype="object").str.extract(_TERMS_RE).astype("float64").to_numpy()
+    ok = ~np.isnan(parsed).any(axis=1) & np.isclose(np.nansum(parsed, axis=1), 100.0)
+    blank = np.asarray(uniques, dtype=object) == ""
+    frac = np.where(ok[:, None], parsed, np.asarray(DEFAULT_TERMS)) / 100.0
+    return frac[codes], (~ok & ~blank)[codes]
+
+def scheduled(df: pd.DataFrame) -> np.ndarray:
+    """Rows that reach the output table (same as `Inputs.valid`) without validating the rest."""
+    mode = _col(df, "Mode").astype("object")
+    return (mode.eq("Forward") | mode.eq("Backward")).to_numpy(dtype=bool)
+
+class Inputs:
+    """Typed, defaulted columns of one input table plus a per-row error bitmask.
+
+    Dates come as both display timestamps (`*_ts`, datetime64[ns] Series) and
+    calendar days (datetime64[D] arrays); durations are int64 with defaults filled
+    and truncated toward zero like `schedule.as_int`. `actuals` holds the optional
+    progress actuals (schedule.ACTUAL_COLS order) as datetime64[D] arrays.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        n = self.n = len(df)
+        errors = np.zeros(n, dtype=np.int64)
+        self.equipment = (df["Equipment"] if "Equipment" in df.columns else pd.Series([""] * n)).reset_index(drop=True)
+        self.predecessors = _col(df, "Predecessors").reset_index(drop=True)
+        self.has_predecessors = "Predecessors" in df.columns
+
+        mode = _col(df, "Mode").astype("object")
+        self.fwd = mode.eq("Forward").to_numpy(dtype=bool)
+        self.bwd = mode.eq("Backward").to_numpy(dtype=bool)
+        other = ~(self.fwd | self.bwd)
+        errors[other] |= NO_MODE
+        errors[_junk(mode, other)] ^= NO_MODE | MODE_INVALID
+
+        self.po_ts, self.po = _date(df, "PO Execution", BAD_PO, errors)
+        self.roj_ts, self.roj = _date(df, "ROJ", BAD_ROJ, errors)
+        self.cd_ts, self.cd = _date(df, "Delivery Date (committed)", BAD_COMMITTED, errors)
+        self.po_ok, self.roj_ok, self.cd_ok = ~np.isnat(self.po), ~np.isnat(self.roj), ~np.isnat(self.cd)
+
+        self.has_actuals = any(c in df.columns for c in schedule.ACTUAL_COLS)
+        self.actuals_ts, self.actuals = [], []
+        for c in schedule.ACTUAL_COLS:
+            if c in df.columns:
+                ts, days = _date(df, c, BAD_ACTUAL, errors)
+            else:
+                ts = pd.Series(pd.NaT, index=range(n), dtype="datetime64[ns]")
+                days = np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+            self.actuals_ts.append(ts)
+            self.actuals.append(days)
+        self.started = np.zeros(n, dtype=bool)
+        last = np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+        for days in self.actuals:
+            have = ~np.isnat(days)
+            errors[have & ~np.isnat(last) & (days < last)] |= ACTUAL_ORDER
+            last = np.where(have, days, last)
+            self.started |= have
+        # A row with actuals is ordered: it schedules from them without a PO / ROJ.
+        errors[self.fwd & ~self.po_ok & ~self.started] |= MISSING_PO
+        errors[self.bwd & ~self.roj_ok & ~self.started] |= MISSING_ROJ
+
+        self.sub, _ = _days(df, "Submittal (days)", schedule.DEFAULT_SUBMITTAL_DAYS, BAD_SUBMITTAL, errors)
+        self.mfg, mfg_raw = _days(df, "Manufacturing (days)", 0, BAD_MFG, errors)
+        self.ship, _ = _days(df, "Shipping (days)", schedule.DEFAULT_SHIPPING_DAYS, BAD_SHIPPING, errors)
+        self.buf, _ = _days(df, "Buffer (days)", schedule.DEFAULT_BUFFER_DAYS, BAD_BUFFER, errors)
+        # Blank / 0 manufacturing means "derive it from the committed delivery".
+        self.mfg_blank = np.isnan(mfg_raw) | (mfg_raw == 0)
+        if "Cost" in df.columns:
+            raw = df["Cost"].reset_index(drop=True)
+            cost = pd.to_numeric(raw, errors="coerce").to_numpy(dtype="float64")
+            errors[_junk(raw, np.isnan(cost)) | (cost < 0)] |= BAD_COST
+        if "Payment Terms" in df.columns:
+            errors[payment_terms(df["Payment Terms"])[1]] |= BAD_TERMS
+        self.errors = errors
+
+    @property
+    def valid(self):
+        """Rows that reach the output table (Forward / Backward, computed or not)."""
+        return (self.errors & SKIPPED) == 0
+
+    def status(self):
+        """Status override per row (None where the engine's own status applies)."""
+        out = np.full(self.n, None, dtype=object)
+        for bit, msg in STATUS.items():
+            out[(self.errors & bit) != 0] = msg
+        return out
+
+    def issues(self) -> pd.DataFrame:
+        """One row per (table row, problem) for display; rows without a Mode are left out."""
+        rows = []
+        for bit, msg in MESSAGES.items():
+            for i in np.flatnonzero(((self.errors & bit) != 0) & ((self.errors & NO_MODE) == 0)):
+                rows.append({"Row": int(i) + 1, "Equipment": self.equipment.iloc[i], "Issue": msg})
+        return pd.DataFrame(rows, columns=["Row", "Equipment", "Issue"]).sort_values("Row", kind="stable",
+                                                                                    ignore_index=True)
+
+def validate(df: pd.DataFrame) -> Inputs:
+    return Inputs(df if df is not None else pd.DataFrame())
@@ -0,0 +1,282 @@
+import hashlib
+import json
+import smtplib
+import sys
+import time
+import urllib.request
+from contextlib import closing
+from datetime import date
+from email.message import EmailMessage
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import utils.engine as engine
+import utils.project_store as project_store
+import utils.schedule as schedule
+import utils.validation as validation
+from utils.leveling import MEETS
+from utils.stream import LATE, PO_CRITICAL
+
+# ======================= PO-critical watcher =======================
+# A Backward row goes "PO is critical" once its required PO (one backward step of
+# Submittal (days) from Submittal End, as in engine.replay) is ≤ CRITICAL_BD business
+# days away. That date does not depend on the as-of date, so it is indexed once per
+# saved project version in the workspace file. A row is critical on `day` exactly when
+# required_po ≤ offset(day, CRITICAL_BD), so the rows that crossed between two runs
+# are one range query per calendar: offset(last) < required_po ≤ offset(today).
+# Only projects saved (or whose calendar changed) since the last run are recomputed;
+# their rows alert when they are critical now but were not at the last run.
+
+CRITICAL_BD = 22
+ALERT_COLS = ["Project", "Equipment", "Calendar", "Required PO", "PO Float (bd)", "Reason"]  # crossed / edited / new
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS po_watch_projects (
+    project    TEXT PRIMARY KEY,
+    calendar   TEXT NOT NULL,
+    holidays   TEXT NOT NULL,   -- hash of the calendar's holiday dates when indexed
+    indexed_at REAL NOT NULL    -- projects.updated_at of the version indexed
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS po_watch_index (
+    project     TEXT NOT NULL,
+    pos         INTEGER NOT NULL,
+    equipment   TEXT,
+    calendar    TEXT NOT NULL,
+    required_po TEXT NOT NULL,  -- ISO date
+    PRIMARY KEY (project, pos)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS po_watch_by_date ON po_watch_index (calendar, required_po);
+CREATE TABLE IF NOT EXISTS po_watch_runs (
+    run_on TEXT PRIMARY KEY,    -- ISO as-of date
+    ran_at REAL NOT NULL,
+    alerts INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+def required_pos(df: pd.DataFrame, holiday_set, cal=None, as_of=None) -> pd.DataFrame:
+    """Required PO per watchable row of an equipment table -> frame [pos, equipment, required_po].
+
+    Watchable rows are scheduled Backward, have no progress actuals and carry a computed
+    status (input errors override it, so those rows never show as critical).
+    """
+    empty = pd.DataFrame({"pos": pd.Series(dtype="int64"), "equipment": pd.Series(dtype="object"),
+                          "required_po": pd.Series(dtype="datetime64[ns]")})
+    if df is None or df.empty:
+        return empty
+    inp = validation.validate(df)
+    if not inp.valid.any():
+        return empty
+    cal = cal if cal is not None else engine.busdaycal(holiday_set)
+    res = engine.compute_inputs(inp, holiday_set, cal=cal, as_of=as_of)
+    se = res["Submittal End"].to_numpy(dtype="datetime64[D]")
+    sub = res["Submittal (days)"].to_numpy(dtype=np.int64)
+    status = res["Status"]
+    ok = (res["Mode"].eq("Backward").to_numpy(dtype=bool) & ~np.isnat(se)
+          & ~schedule.actual_masks(res)[0]
+          & (status.isna() | status.isin([PO_CRITICAL, LATE, MEETS])).to_numpy(dtype=bool))
+    req = engine.offset(se, -sub, "backward", cal, ok)
+    return pd.DataFrame({
+        "pos": np.flatnonzero(inp.valid)[ok],
+        "equipment": res["Equipment"].to_numpy(dtype=object)[ok],
+        "required_po": engine.to_timestamps(req[ok]),
+    })
+
+def _row_keys(equipment: pd.Series) -> pd.Series:
+    """Stable identity per indexed row: equipment name plus its occurrence among same-named rows."""
+    name = equipment.fillna("").astype(str).reset_index(drop=True)
+    return name + "\x1f" + name.groupby(name).cumcount().astype(str)
+
+def critical_limit(day, cal) -> np.datetime64:
+    """Latest required PO that is critical on `day` (float ≤ CRITICAL_BD business days)."""
+    d = np.array([np.datetime64(pd.Timestamp(day).date())], dtype="datetime64[D]")
+    return cal.offset(d, np.array([CRITICAL_BD]), "forward")[0]
+
+# ---- notifiers: anything with send(alerts: DataFrame) ----
+
+def _lines(alerts: pd.DataFrame):
+    for proj, equip, cal, req, flt in zip(alerts["Project"], alerts["Equipment"], alerts["Calendar"],
+                                          alerts["Required PO"], alerts["PO Float (bd)"]):
+        yield f"{proj}: {equip} - required PO {req:%Y-%m-%d} ({flt} business days, {cal})"
+
+class LogNotifier:
+    """Writes one line per alert to a stream (stdout by default)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, alerts: pd.DataFrame):
+        for line in _lines(alerts):
+            print(line, file=self.stream)
+
+class SmtpNotifier:
+    """One plain-text e-mail per run through an SMTP relay (e.g. a local debugging server)."""
+
+    def __init__(self, host="localhost", port=25, sender="procurement@localhost", to=(), timeout=30):
+        self.host, self.port, self.sender, self.to, self.timeout = host, port, sender, list(to), timeout
+
+    def send(self, alerts: pd.DataFrame):
+        msg = EmailMessage()
+        msg["Subject"] = f"{len(alerts)} PO(s) became critical"
+        msg["From"] = self.sender
+        msg["To"] = ", ".join(self.to)
+        msg.set_content("\n".join(_lines(alerts)) + "\n")
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(msg)
+
+class WebhookNotifier:
+    """POSTs {"alerts": [records]} as JSON to `url`; any non-2xx response raises."""
+
+    def __init__(self, url, timeout=30):
+        self.url, self.timeout = url, timeout
+
+    def send(self, alerts: pd.DataFrame):
+        body = json.dumps({"alerts": json.loads(alerts.to_json(orient="records", date_format="iso", date_unit="s"))})
+        req = urllib.request.Request(self.url, data=body.encode("utf-8"), method="POST",
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+def notifier_from_url(url):
+    """"log" (or blank), "smtp://host:port?to=a@x,b@y&from=me@x", or an http(s) webhook URL."""
+    if not url or url == "log":
+        return LogNotifier()
+    parts = urlsplit(url)
+    if parts.scheme == "smtp":
+        q = parse_qs(parts.query)
+        to = [a for v in q.get("to", []) for a in v.split(",") if a]
+        return SmtpNotifier(parts.hostname or "localhost", parts.port or 25,
+                            q.get("from", ["procurement@localhost"])[0], to)
+    if parts.scheme in ("http", "https"):
+        return WebhookNotifier(url)
+    raise ValueError(f"unsupported notifier: {url}")
+
+# ---- the watcher ----
+
+class Watcher:
+    """Daily incremental PO-critical check over every project in a ProjectStore.
+
+    `registry` is a holiday_providers.HolidayRegistry (each project uses the calendar
+    it was last saved with). `run` sends the new alerts first and only then records the
+    refreshed index and the run, so a failed notification is retried on the next run.
+    """
+
+    def __init__(self, store: project_store.ProjectStore, registry, notifier=None):
+        self._store = store  # same file and connection settings as the projects
+        self.registry = registry
+        self.notifier = notifier or LogNotifier()
+        self._cals = {}
+        with closing(self._store._connect()) as con, con:
+            con.executescript(SCHEMA)
+
+    def _calendar(self, name):
+        """(holiday set, workday table, holiday hash) for a calendar name; unknown names use "None"."""
+        name = name if name in self.registry.regions() else "None"
+        if name not in self._cals:
+            days = np.asarray(self.registry.array(name), dtype="datetime64[D]")
+            hs = self.registry.holidays(name)
+            self._cals[name] = (hs, engine.busdaycal(hs), hashlib.sha1(days.tobytes()).hexdigest()[:16])
+        return self._cals[name]
+
+    def last_run(self):
+        """As-of date of the latest recorded run, or None before the first one."""
+        with closing(self._store._connect()) as con:
+            row = con.execute("SELECT MAX(run_on) FROM po_watch_runs").fetchone()
+        return date.fromisoformat(row[0]) if row[0] else None
+
+    def _stale(self, con):
+        """Saved projects whose index is missing or out of date, and indexed projects since removed.
+
+        -> ({project: (calendar, updated_at, indexed before)}, [removed project]).
+        """
+        saved = {name: (cal or "None", updated) for name, cal, updated in
+                 con.execute("SELECT name, calendar, updated_at FROM projects")}
+        indexed = {p: (cal, h, at) for p, cal, h, at in
+                   con.execute("SELECT project, calendar, holidays, indexed_at FROM po_watch_projects")}
+        stale = {}
+        for name, (cal, updated) in saved.items():
+            old = indexed.get(name)
+            if old is None or updated > old[2] or cal != old[0] or self._calendar(cal)[2] != old[1]:
+                stale[name] = (cal, updated, old is not None)
+        return stale, [p for p in indexed if p not in saved]
+
+    def run(self, as_of=None) -> pd.DataFrame:
+        """Alert the rows that became PO-critical since the last run; returns the alerts sent."""
+        today = schedule.as_of_date(as_of).date()
+        last = self.last_run()
+        if last is not None and last > today:
+            last = None  # clock went backwards: treat as a first run
+        alerts, fresh = [], {}
+        with closing(self._store._connect()) as con:
+            stale, removed = self._stale(con)
+            # 1) Re-index changed projects; alert rows critical now that weren't at the last run.
+            for name, (cal_name, updated, seen) in stale.items():
+                hs, cal, _ = self._calendar(cal_name)
+                rows = required_pos(self._store.load(name), hs, cal=cal, as_of=today)
+                fresh[name] = (cal_name, updated, rows)
+                now = rows["required_po"].to_numpy(dtype="datetime64[D]") <= critical_limit(today, cal)
+                if last is not None and now.any():
+                    old = pd.DataFrame(con.execute(
+                        "SELECT equipment, required_po FROM po_watch_index WHERE project = ? ORDER BY pos",
+                        (name,)).fetchall(), columns=["equipment", "required_po"])
+                    # Match rows by name (k-th row of that name), not position: a row inserted or
+                    # deleted above must not re-alert, or hide, the rows below it.
+                    crit = _row_keys(old["equipment"])[old["required_po"].le(str(critical_limit(last, cal))).to_numpy()]
+                    was = _row_keys(rows["equipment"]).isin(crit).to_numpy(dtype=bool)
+                    now &= ~was
+                if now.any():
+                    alerts.append(self._alerts(name, cal_name, rows[now], today, "edited" if seen else "new"))
+            # 2) Unchanged projects: the rows whose required PO entered the critical window.
+            for (cal_name,) in con.execute("SELECT DISTINCT calendar FROM po_watch_index").fetchall():
+                _, cal, _ = self._calendar(cal_name)
+                sql = ("SELECT project, pos, equipment, required_po FROM po_watch_index "
+                       "WHERE calendar = ? AND required_po <= ?")
+                args = [cal_name, str(critical_limit(today, cal))]
+                if last is not None:
+                    sql += " AND required_po > ?"
+                    args.append(str(critical_limit(last, cal)))
+                hits = pd.DataFrame(con.execute(sql, args).fetchall(),
+                                    columns=["project", "pos", "equipment", "required_po"])
+                hits = hits[~hits["project"].isin(list(fresh) + removed)]
+                for name, rows in hits.groupby("project", sort=True):
+                    rows = rows.assign(required_po=pd.to_datetime(rows["required_po"]))
+                    alerts.append(self._alerts(name, cal_name, rows, today, "crossed"))
+
+        out = (pd.concat(alerts, ignore_index=True) if alerts else pd.DataFrame(columns=ALERT_COLS))
+        out = out.sort_values(["Required PO", "Project"], kind="stable", ignore_index=True)
+        if len(out):
+            self.notifier.send(out)
+        self._commit(today, fresh, removed, len(out))
+        return out
+
+    def _alerts(self, project, cal_name, rows, today, reason) -> pd.DataFrame:
+        _, cal, _ = self._calendar(cal_name)
+        req = rows["required_po"].to_numpy(dtype="datetime64[D]")
+        flt = cal.count(np.full(len(req), np.datetime64(today)), req)
+        return pd.DataFrame({
+            "Project": project,
+            "Equipment": rows["equipment"].to_numpy(dtype=object),
+            "Calendar": cal_name,
+            "Required PO": engine.to_timestamps(req),
+            "PO Float (bd)": flt.astype(np.int64),
+            "Reason": reason,
+        })
+
+    def _commit(self, today, fresh, removed, n_alerts):
+        with closing(self._store._connect()) as con, con:
+            for name in removed:
+                con.execute("DELETE FROM po_watch_index WHERE project = ?", (name,))
+                con.execute("DELETE FROM po_watch_projects WHERE project = ?", (name,))
+            for name, (cal_name, updated, rows) in fresh.items():
+                con.execute("DELETE FROM po_watch_index WHERE project = ?", (name,))
+                con.executemany(
+                    "INSERT INTO po_watch_index (project, pos, equipment, calendar, required_po) VALUES (?, ?, ?, ?, ?)",
+                    [(name, int(p), e, cal_name, str(d)) for p, e, d in zip(
+                        rows["pos"].tolist(), rows["equipment"].tolist(),
+                        rows["required_po"].to_numpy(dtype="datetime64[D]"))])
+                con.execute(
+                    "INSERT OR REPLACE INTO po_watch_projects (project, calendar, holidays, indexed_at) "
+                    "VALUES (?, ?, ?, ?)", (name, cal_name, self._calendar(cal_name)[2], updated))
+            con.execute("INSERT OR REPLACE INTO po_watch_runs (run_on, ran_at, alerts) VALUES (?, ?, ?)",
+                        (today.isoformat(), time.time(), n_alerts))
@@ -0,0 +1,135 @@
+import threading
+
+import numpy as np
+
+# ======================= Workday ordinal tables =======================
+# Per holiday calendar, two int32 arrays over a span of calendar days starting at `origin`:
+#   ordinal[i] = business days in [origin, origin + i)      (date -> workday ordinal)
+#   day[k]     = offset from origin of the k-th business day (workday ordinal -> date)
+# busday_count is then two lookups and a subtraction, busday_offset a lookup, an add and
+# an inverse lookup, for any number of rows at once. Results match np.busday_count /
+# np.busday_offset exactly. Tables are built around the first dates asked for and
+# rebuilt wider (with margin) whenever a date or result falls outside the span.
+
+MARGIN_DAYS = 3 * 366
+_CACHE_IDS = 64
+
+class WorkdayTable:
+    """Business-day arithmetic for one holiday calendar; safe to share across threads."""
+
+    def __init__(self, holidays):
+        self.holidays = np.array(sorted(holidays or ()), dtype="datetime64[D]")
+        self.cal = np.busdaycalendar(holidays=self.holidays)
+        self._lock = threading.Lock()
+        self._anchor = None  # day number that has ordinal 0 in ordinals() / dates(); fixed once set
+        self._state = None   # (origin day number, ordinal, day, ordinal of the anchor), swapped whole
+
+    def _build(self, lo, hi):
+        days = np.arange(lo, hi, dtype=np.int64).astype("datetime64[D]")
+        bd = np.is_busday(days, busdaycal=self.cal)
+        ordinal = np.zeros(len(days) + 1, dtype=np.int32)
+        np.cumsum(bd, out=ordinal[1:])
+        return lo, ordinal, np.flatnonzero(bd).astype(np.int32), int(ordinal[self._anchor - lo])
+
+    def _cover(self, lo, hi):
+        """State whose span includes calendar days [lo, hi] (day numbers)."""
+        state = self._state
+        if state is not None and lo >= state[0] and hi < state[0] + len(state[1]) - 1:
+            return state
+        with self._lock:
+            state = self._state
+            if state is None:
+                self._anchor = lo
+            else:
+                lo, hi = min(lo, state[0]), max(hi, state[0] + len(state[1]) - 2)
+            self._state = state = self._build(lo - MARGIN_DAYS, hi + 1 + MARGIN_DAYS)
+        return state
+
+    @staticmethod
+    def _days(d):
+        return np.asarray(d, dtype="datetime64[D]").astype(np.int64)
+
+    def _span(self, *days):
+        if not any(x.size for x in days):
+            return None
+        lo = min(int(x.min()) for x in days if x.size)
+        hi = max(int(x.max()) for x in days if x.size)
+        return self._cover(lo, hi)
+
+    def _lookup(self, k, state):
+        """Dates of span ordinals `k` (counted in `state`), growing the span as needed."""
+        origin, ordinal, day, _ = state
+        while k.size and (k.min() < 0 or k.max() >= len(day)):
+            # Two calendar days per business day is ample for any real calendar.
+            short = max(-int(k.min()), int(k.max()) - len(day) + 1, 0)
+            state = self._cover(origin - 2 * short - 14, origin + len(ordinal) + 2 * short + 14)
+            k = k + int(state[1][origin - state[0]])  # re-count from the wider span's origin
+            origin, ordinal, day, _ = state
+        return (day[k].astype(np.int64) + origin).astype("datetime64[D]")
+
+    def ordinals(self, d):
+        """Workday ordinal of each non-NaT date (stable for the table's lifetime); non-business
+        days share the next business day's ordinal."""
+        x = self._days(d)
+        state = self._span(x)
+        if state is None:
+            return np.zeros(x.shape, dtype=np.int64)
+        origin, ordinal, _, zero = state
+        return ordinal[x - origin].astype(np.int64) - zero
+
+    def dates(self, k):
+        """Inverse of `ordinals` on business days."""
+        k = np.asarray(k, dtype=np.int64)
+        state = self._state if self._state is not None else self._cover(0, 0)
+        return self._lookup(k + state[3], state)
+
+    def count(self, d1, d2):
+        """np.busday_count(d1, d2) for non-NaT dates."""
+        a, b = self._days(d1), self._days(d2)
+        state = self._span(a, b)
+        if state is None:
+            return np.zeros(np.broadcast(a, b).shape, dtype=np.int64)
+        origin, ordinal = state[0], state[1]
+        # numpy counts [d1, d2) forward but (d2, d1] when d2 < d1
+        shift = (b < a).astype(np.int64)
+        return ordinal[b - origin + shift].astype(np.int64) - ordinal[a - origin + shift]
+
+    def offset(self, d, n, roll="forward"):
+        """np.busday_offset(d, n, roll) for non-NaT dates; roll is "forward" or "backward"."""
+        x, n = self._days(d), np.asarray(n, dtype=np.int64)
+        if not x.size:
+            return x.astype("datetime64[D]")
+        state = self._span(x)
+        origin, ordinal = state[0], state[1]
+        i = x - origin
+        k = (ordinal[i] if roll == "forward" else ordinal[i + 1] - 1).astype(np.int64) + n
+        return self._lookup(k, state)
+
+    def is_busday(self, d):
+        x = self._days(d)
+        state = self._span(x)
+        if state is None:
+            return np.zeros(x.shape, dtype=bool)
+        origin, ordinal = state[0], state[1]
+        i = x - origin
+        return ordinal[i + 1] != ordinal[i]
+
+_tables = {}    # frozenset(holidays) -> WorkdayTable
+_by_id = {}     # id(holiday set) -> (holiday set, table): skips re-hashing the same set object
+_registry_lock = threading.Lock()
+
+def table(holidays) -> WorkdayTable:
+    """The shared table for a holiday set (sets are treated as immutable once used)."""
+    hit = _by_id.get(id(holidays))
+    if hit is not None and hit[0] is holidays:
+        return hit[1]
+    key = frozenset(np.asarray(sorted(holidays or ()), dtype="datetime64[D]").tolist())
+    with _registry_lock:
+        t = _tables.get(key)
+        if t is None:
+            t = _tables[key] = WorkdayTable(key)
+        if holidays is not None:
+            if len(_by_id) >= _CACHE_IDS:
+                _by_id.clear()
+            _by_id[id(holidays)] = (holidays, t)
+    return t